@@ -0,0 +1,140 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+# Questions about the asker's own situation or with concrete figures get their own answer
+PERSONAL_PATTERN = re.compile(r"\b(?:i|i'm|i've|i'd|me|my|mine|myself)\b|\d", re.I)
+
+
+def is_personalised(question: str) -> bool:
+    return bool(PERSONAL_PATTERN.search(question))
+
+
+class SemanticAnswerCache:
+    """Cache of LLM answers looked up by query embedding similarity.
+
+    An entry is reused when a new question's embedding has cosine similarity
+    of at least `threshold` with a cached question and retrieval returned the
+    same set of chunk ids, so a paraphrase only hits when it is grounded in
+    the same documents. Entries expire after `ttl` seconds, the least recently
+    used one is evicted beyond `max_entries`, and `invalidate()` drops
+    everything when the vector store changes. An answer generated against an
+    index version older than the last invalidation is not stored.
+
+    Embeddings live in one preallocated matrix, so a lookup is a single
+    matrix-vector product over all slots.
+    """
+
+    def __init__(self, threshold: float = 0.95, max_entries: int = 1000, ttl: float = 3600.0):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+
+        self._vectors: Optional[np.ndarray] = None
+        self._valid = np.zeros(max_entries, dtype=bool)
+        self._entries: "OrderedDict[int, Dict]" = OrderedDict()
+        self._free = list(range(max_entries - 1, -1, -1))
+        # Index version of the last invalidate(); older answers are stale on arrival
+        self._min_version = 0
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "stores": 0, "stale": 0, "evictions": 0, "expirations": 0,
+                         "invalidations": 0, "latency_saved_seconds": 0.0}
+
+    @staticmethod
+    def _normalise(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _release(self, slot: int):
+        del self._entries[slot]
+        self._valid[slot] = False
+        self._free.append(slot)
+
+    def lookup(self, query_embedding, chunk_ids: Iterable[str]) -> Optional[str]:
+        """Return a cached answer for a similar question over the same chunks, or None."""
+        query = self._normalise(query_embedding)
+        chunk_ids = frozenset(chunk_ids)
+        now = time.time()
+
+        with self._lock:
+            if self._vectors is None or not self._entries:
+                self.counters["misses"] += 1
+                return None
+
+            scores = self._vectors @ query
+            scores[~self._valid] = -np.inf
+            # Best candidates first; the chunk set check usually passes on the first
+            for slot in np.argsort(-scores)[:8]:
+                if scores[slot] < self.threshold:
+                    break
+                entry = self._entries[int(slot)]
+                if now - entry["created_at"] > self.ttl:
+                    self._release(int(slot))
+                    self.counters["expirations"] += 1
+                    continue
+                if entry["chunk_ids"] != chunk_ids:
+                    continue
+                self._entries.move_to_end(int(slot))
+                entry["hits"] += 1
+                self.counters["hits"] += 1
+                self.counters["latency_saved_seconds"] += entry["latency"]
+                return entry["answer"]
+
+            self.counters["misses"] += 1
+            return None
+
+    def store(self, query_embedding, chunk_ids: Iterable[str], answer: str, latency: float, version: int = None):
+        """Cache an answer with the LLM latency a future hit will save.
+
+        `version` is the index version read before retrieval started; if an
+        invalidation for a newer version ran while the LLM was answering, the
+        answer is dropped.
+        """
+        query = self._normalise(query_embedding)
+        with self._lock:
+            if version is not None and version < self._min_version:
+                self.counters["stale"] += 1
+                return
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_entries, len(query)), dtype=np.float32)
+            if not self._free:
+                slot, _ = next(iter(self._entries.items()))
+                self._release(slot)
+                self.counters["evictions"] += 1
+
+            slot = self._free.pop()
+            self._vectors[slot] = query
+            self._valid[slot] = True
+            self._entries[slot] = {
+                "chunk_ids": frozenset(chunk_ids),
+                "answer": answer,
+                "latency": latency,
+                "created_at": time.time(),
+                "hits": 0
+            }
+            self.counters["stores"] += 1
+
+    def invalidate(self, version: int = None, *_):
+        """Drop every entry; called with the new index version when documents are ingested."""
+        with self._lock:
+            if version is not None:
+                self._min_version = max(self._min_version, version)
+            for slot in list(self._entries):
+                self._release(slot)
+            self.counters["invalidations"] += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.counters["hits"] + self.counters["misses"]
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+                "hit_rate": self.counters["hits"] / lookups if lookups else 0.0,
+                **self.counters
+            }
@@ -0,0 +1,66 @@
+"""ASGI entry point for production serving.
+
+Run from the backend directory:
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5001 --workers 4
+
+Each worker process has one long-lived event loop (uvicorn's). Async views,
+background explanations and the pooled HTTP clients all run on it, so
+connections and async clients are reused across requests instead of being
+rebuilt on a fresh loop per request as under the Flask dev server.
+"""
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import SyncToAsync
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+
+from background_loop import background_loop
+from main import app as flask_app, components, start_warm_up
+
+# Threads running Flask request handling; each in-flight request holds one
+ASGI_THREADS = int(os.getenv("ASGI_THREADS", 32))
+
+_request_executor = ThreadPoolExecutor(max_workers=ASGI_THREADS, thread_name_prefix="asgi-request")
+
+
+class _PooledWsgiInstance(WsgiToAsgiInstance):
+    # asgiref runs every WSGI call on one shared thread (thread_sensitive=True),
+    # which serialises all requests; run them on a pool instead. The pool is
+    # separate from the loop's default executor so requests waiting on
+    # asyncio.to_thread work can never starve it.
+    run_wsgi_app = SyncToAsync(
+        WsgiToAsgiInstance.__dict__["run_wsgi_app"].func,
+        thread_sensitive=False,
+        executor=_request_executor
+    )
+
+
+class FlaskASGI(WsgiToAsgi):
+    """The Flask app as an ASGI application sharing the server's event loop."""
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+            return
+        await _PooledWsgiInstance(self.wsgi_application)(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                # Background work (explanations, translations from sync code) joins this loop
+                background_loop.attach(asyncio.get_running_loop())
+                # Models load in the background; the worker accepts requests straight away
+                start_warm_up()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                speech_processor = components["speech_processor"].peek()
+                if speech_processor:
+                    await speech_processor.http.aclose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+app = FlaskASGI(flask_app)
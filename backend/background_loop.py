@@ -0,0 +1,52 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Coroutine
+
+
+class BackgroundLoop:
+    """A long-lived asyncio event loop running in a daemon thread.
+
+    Work scheduled here outlives the request that started it, and async clients
+    bound to this loop stay usable across requests.
+    """
+
+    def __init__(self, name: str = "background-loop"):
+        self.name = name
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            with self._lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    self._thread = threading.Thread(target=loop.run_forever, name=self.name, daemon=True)
+                    self._thread.start()
+                    self._loop = loop
+        return self._loop
+
+    def attach(self, loop: asyncio.AbstractEventLoop):
+        """Adopt a loop that is already running in the calling thread (the ASGI server's)."""
+        with self._lock:
+            self._loop = loop
+            self._thread = threading.current_thread()
+
+    def submit(self, coro: Coroutine) -> Future:
+        """Schedule a coroutine on the loop and return a thread-safe future for its result."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Coroutine, timeout: float = None):
+        """Run a coroutine on the loop and block the calling thread until it finishes."""
+        if self.in_loop_thread():
+            raise RuntimeError("BackgroundLoop.run() called from the loop's own thread would deadlock")
+        return self.submit(coro).result(timeout)
+
+    def in_loop_thread(self) -> bool:
+        return self._thread is not None and threading.current_thread() is self._thread
+
+
+# Process-wide loop for background work such as deferred explanations
+background_loop = BackgroundLoop()
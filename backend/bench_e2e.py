@@ -0,0 +1,488 @@
+"""End-to-end benchmark of the backend against local stand-ins.
+
+Run from the backend directory:
+
+    python bench_e2e.py [--scenarios chat,explain,speech,pdf] [--requests 100] [--concurrency 8] \\
+        [--llm-latency-ms 300] [--llm-tokens-per-second 50] [--answer-tokens 120] \\
+        [--translate-latency-ms 40] [--stt-latency-ms 250] [--embed-latency-ms 5] [--real-embeddings] \\
+        [--mongo-uri mongodb://localhost:27017] [--json results.json] [--baseline previous.json]
+
+Nothing external is called. Gemini is replaced by a fake chat model with a
+fixed time to first token and token rate, Google Translate and Sarvam by a
+local stub server (through GOOGLE_TRANSLATE_BASE_URL and SARVAM_BASE_URL), and
+MongoDB by the in-memory session store unless --mongo-uri is given. Embeddings
+are a hashing stand-in with a fixed cost per call unless --real-embeddings is
+given. The app runs under uvicorn in a child process with a throwaway vector
+store, seeded with a synthetic corpus. Every other setting (answer cache,
+rerank, retrieval sizes, ...) comes from the environment as in production.
+
+Each scenario runs --requests requests at --concurrency and reports
+throughput, p50/p95/p99 latency and the per-stage breakdown from the
+Server-Timing header (embed, retrieve, llm, translate, ...). With --baseline,
+the run fails (exit 1) if any scenario's p95 regressed by more than
+--max-regression against an earlier --json output.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Optional
+
+import httpx
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+SCENARIOS = ("chat", "explain", "speech", "pdf")
+
+QUERIES = [
+    "What is the surrender value of an LIC endowment policy?",
+    "How do I claim term insurance after the death of the policyholder?",
+    "What documents are needed to apply for a passport?",
+    "What is the grace period for paying a missed premium?",
+    "Is maturity benefit taxable in India?",
+    "hello, can you help me?",
+    "प्रीमियम भुगतान की छूट अवधि क्या है?",
+    "पॉलिसी का सरेंडर मूल्य कैसे निकाला जाता है?",
+]
+
+TOPICS = ["premium", "surrender", "claim", "maturity", "grace period", "nominee", "rider", "bonus",
+          "passport", "aadhaar", "ration card", "pension", "tax deduction", "revival", "loan", "annuity"]
+
+EXPLANATION_KEYS = ["query_analysis", "retrieval_analysis", "context_integration",
+                    "evidence_evaluation", "response_strategy"]
+
+
+def synthetic_corpus(count: int, seed: int = 0) -> List[str]:
+    """Chunk-sized (~1000 character) passages about government services and insurance."""
+    rng = random.Random(seed)
+    chunks = []
+    for i in range(count):
+        topic, other = rng.sample(TOPICS, 2)
+        sentences = [
+            f"Section {i} explains the {topic} rules that apply to the policyholder.",
+            f"The {topic} depends on the premiums paid, the policy term and any {other} attached.",
+            f"Applicants must submit the {topic} form with proof of identity at the nearest branch.",
+            f"Requests about {other} are handled separately and may take up to fifteen working days.",
+        ]
+        text = " ".join(rng.choice(sentences) for _ in range(12))
+        chunks.append(text[:1000])
+    return chunks
+
+
+def minimal_pdf(pages: List[str]) -> bytes:
+    """A small valid PDF with one line of Helvetica text per page."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in pages:
+        escaped = text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+        stream = f"BT /F1 9 Tf 36 760 Td ({escaped}) Tj ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return out
+
+
+class FakeChatModel:
+    """Stand-in for the Gemini chat model with a fixed time to first token and token rate.
+
+    Supports invoke, ainvoke and stream. Explanation prompts get a valid JSON
+    explanation, everything else a Markdown answer of `answer_tokens` words.
+    """
+
+    def __init__(self, latency_ms: float = 300, tokens_per_second: float = 50, answer_tokens: int = 120):
+        self.latency = latency_ms / 1000
+        self.token_interval = 1 / tokens_per_second if tokens_per_second > 0 else 0.0
+        self.answer_tokens = answer_tokens
+
+    def _tokens(self, messages) -> List[str]:
+        prompt = messages[-1].content
+        if "JSON OUTPUT" in prompt:
+            explanation = {key: f"Stand-in {key.replace('_', ' ')}." for key in EXPLANATION_KEYS}
+            return [json.dumps(explanation)]
+        words = re.findall(r"\w+", prompt.lower())[:8] or ["answer"]
+        body = [words[i % len(words)] for i in range(self.answer_tokens)]
+        return ["#### Answer\n"] + [f"- {word}" if i % 12 == 0 else f" {word}" for i, word in enumerate(body)]
+
+    def _duration(self, tokens: List[str]) -> float:
+        return self.latency + self.token_interval * len(tokens)
+
+    def invoke(self, messages, **kwargs) -> AIMessage:
+        tokens = self._tokens(messages)
+        time.sleep(self._duration(tokens))
+        return AIMessage(content="".join(tokens))
+
+    async def ainvoke(self, messages, **kwargs) -> AIMessage:
+        tokens = self._tokens(messages)
+        await asyncio.sleep(self._duration(tokens))
+        return AIMessage(content="".join(tokens))
+
+    def stream(self, messages, **kwargs) -> Iterator[AIMessageChunk]:
+        time.sleep(self.latency)
+        for token in self._tokens(messages):
+            time.sleep(self.token_interval)
+            yield AIMessageChunk(content=token)
+
+
+class FakeEmbeddings(Embeddings):
+    """Hashed bag-of-words embeddings with a fixed cost per call and per text.
+
+    Texts sharing words get similar vectors, so routing and retrieval behave
+    plausibly without loading a model.
+    """
+
+    def __init__(self, dim: int = 768, call_ms: float = 5.0, per_text_ms: float = 0.5):
+        self.dim = dim
+        self.call_ms = call_ms
+        self.per_text_ms = per_text_ms
+
+    def _vector(self, text: str) -> List[float]:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in re.findall(r"\w+", text.lower()):
+            digest = hashlib.md5(word.encode("utf-8")).digest()
+            vector[int.from_bytes(digest[:4], "little") % self.dim] += 1.0 if digest[4] & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        time.sleep((self.call_ms + self.per_text_ms * len(texts)) / 1000)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Google Translate v2 (detect, translate) and Sarvam speech-to-text stand-ins."""
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, payload: Dict):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        path = self.path.split("?")[0]
+        if path.endswith("/speech-to-text"):
+            time.sleep(self.server.stt_latency)
+            with self.server.lock:
+                self.server.transcripts += 1
+                transcript = QUERIES[self.server.transcripts % len(QUERIES)]
+            self._reply({"transcript": transcript})
+            return
+
+        time.sleep(self.server.translate_latency)
+        query = json.loads(body or b"{}").get("q", "")
+        texts = query if isinstance(query, list) else [query]
+        if path.endswith("/detect"):
+            self._reply({"data": {"detections": [[{"language": "en" if text.isascii() else "hi",
+                                                   "confidence": 1.0}] for text in texts]}})
+        else:
+            # Identity translation: the text itself is what matters for the rest of the pipeline
+            self._reply({"data": {"translations": [{"translatedText": text} for text in texts]}})
+
+
+def start_stub_server(translate_latency_ms: float, stt_latency_ms: float) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    server.translate_latency = translate_latency_ms / 1000
+    server.stt_latency = stt_latency_ms / 1000
+    server.transcripts = 0
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, name="bench-stubs", daemon=True).start()
+    return server
+
+
+def serve(args):
+    """Child process: build the app with stand-ins injected and serve it with uvicorn."""
+    import uvicorn
+
+    import main
+    from embedding_registry import DEFAULT_EMBEDDING_MODEL, embedding_registry
+    from ingest_manifest import chunk_id
+    from lazy_component import LazyComponent
+
+    if not args.real_embeddings:
+        embedding_registry.register(DEFAULT_EMBEDDING_MODEL, FakeEmbeddings(call_ms=args.embed_latency_ms))
+    model = FakeChatModel(args.llm_latency_ms, args.llm_tokens_per_second, args.answer_tokens)
+    main.components["rag_chat"] = LazyComponent(
+        "rag_chat", lambda: main.RAGChat(session_store=main.create_session_store(main.get_db()), model=model)
+    )
+
+    rag_chat = main.get_rag_chat()
+    corpus = synthetic_corpus(args.corpus_size)
+    ids = [chunk_id(text) for text in corpus]
+    metadatas = [{"file_name": "synthetic.pdf", "page_start": i + 1, "page_end": i + 1, "source": "synthetic.pdf"}
+                 for i in range(len(corpus))]
+    for start in range(0, len(corpus), 256):
+        rag_chat.vector_store.add_texts(corpus[start:start + 256], metadatas=metadatas[start:start + 256],
+                                        ids=ids[start:start + 256])
+    if rag_chat.lexical_index:
+        rag_chat.lexical_index.add(ids, corpus, metadatas)
+    main.get_speech_processor()
+    embedding_registry.warm_up()
+
+    from asgi import app
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def parse_server_timing(header: Optional[str]) -> Dict[str, float]:
+    stages = {}
+    for entry in (header or "").split(","):
+        match = re.match(r"\s*([\w-]+);dur=([\d.]+)", entry)
+        if match:
+            stages[match.group(1)] = float(match.group(2))
+    return stages
+
+
+async def poll(client: httpx.AsyncClient, url: str, done, timeout: float):
+    """Poll url until done(response) is true; (seconds taken, last response), seconds None on timeout."""
+    start = time.perf_counter()
+    while True:
+        response = await client.get(url)
+        if done(response):
+            return time.perf_counter() - start, response
+        if time.perf_counter() - start > timeout:
+            return None, response
+        await asyncio.sleep(0.05)
+
+
+async def one_request(client: httpx.AsyncClient, scenario: str, i: int, args) -> Dict:
+    query = QUERIES[i % len(QUERIES)]
+    session_id = f"bench-{scenario}-{i % args.sessions}"
+    extra = {}
+    start = time.perf_counter()
+    if scenario in ("chat", "explain"):
+        response = await client.post("/chat", json={"message": query, "session_id": session_id,
+                                                    "explain": scenario == "explain"})
+    elif scenario == "speech":
+        response = await client.post("/speech-to-text", data={"session_id": session_id},
+                                     files={"audio": ("query.wav", b"RIFF" + bytes(4096), "audio/wav")})
+    else:
+        # Fresh content per upload, so every job really chunks and embeds
+        pdf = minimal_pdf(synthetic_corpus(args.pdf_pages, seed=1000 + i))
+        response = await client.post("/process-pdf", data={"session_id": session_id},
+                                     files={"pdf": (f"bench-{i}.pdf", pdf, "application/pdf")})
+    latency = time.perf_counter() - start
+    ok = response.status_code < 300 and "Sorry, I encountered an error" not in response.text
+    if not ok:
+        extra["error"] = f"HTTP {response.status_code}: {response.text[:300]}"
+
+    # Background work finishing after the response: explanations and ingestion jobs
+    if ok and scenario == "explain":
+        url = response.json()["response"].get("explanation_url")
+        if url:
+            extra["explanation_ready"], final = await poll(client, url, lambda r: r.status_code != 202, args.timeout)
+            ok = final.status_code == 200
+    elif ok and scenario == "pdf":
+        extra["ingestion_done"], final = await poll(
+            client, response.json()["status_url"], lambda r: r.json().get("status") in ("done", "failed"), args.timeout
+        )
+        ok = final.json().get("status") == "done"
+        if not ok:
+            extra["error"] = final.json().get("error") or "ingestion timed out"
+    return {"ok": ok, "latency": latency, "stages": parse_server_timing(response.headers.get("server-timing")),
+            **extra}
+
+
+async def run_scenario(base_url: str, scenario: str, args) -> Dict:
+    queue: asyncio.Queue = asyncio.Queue()
+    for i in range(args.requests):
+        queue.put_nowait(i)
+    results = []
+
+    async def worker(client):
+        while True:
+            try:
+                i = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                results.append(await one_request(client, scenario, i, args))
+            except Exception as e:
+                results.append({"ok": False, "latency": 0.0, "stages": {}, "error": str(e)})
+
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - start
+
+    ok = [result for result in results if result["ok"]]
+    latencies = [result["latency"] for result in ok]
+    stages = {}
+    for name in sorted({name for result in ok for name in result["stages"]}):
+        # Requests that skipped a stage (e.g. answer cache hits skip llm) count as 0, so means add up to total
+        values = [result["stages"].get(name, 0.0) for result in ok]
+        stages[name] = {"mean_ms": sum(values) / len(values), "p95_ms": percentile(values, 0.95)}
+    background = {}
+    for name in ("explanation_ready", "ingestion_done"):
+        values = [result[name] for result in ok if result.get(name) is not None]
+        if values:
+            background[name] = {"p50": percentile(values, 0.5), "p95": percentile(values, 0.95)}
+
+    return {
+        "requests": len(results),
+        "errors": len(results) - len(ok),
+        "throughput": len(ok) / elapsed if elapsed else 0.0,
+        "p50": percentile(latencies, 0.5),
+        "p95": percentile(latencies, 0.95),
+        "p99": percentile(latencies, 0.99),
+        "stages": stages,
+        "background": background,
+        "sample_error": next((result.get("error") for result in results if result.get("error")), None)
+    }
+
+
+def print_report(results: Dict):
+    print(f"{'scenario':<9} {'requests':>8} {'errors':>6} {'req/s':>7} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for scenario, result in results.items():
+        print(f"{scenario:<9} {result['requests']:>8} {result['errors']:>6} {result['throughput']:>7.1f} "
+              f"{result['p50'] * 1000:>6.0f}ms {result['p95'] * 1000:>6.0f}ms {result['p99'] * 1000:>6.0f}ms")
+    for scenario, result in results.items():
+        if result["stages"]:
+            breakdown = ", ".join(f"{name} {stage['mean_ms']:.1f}/{stage['p95_ms']:.1f}"
+                                  for name, stage in result["stages"].items())
+            print(f"  {scenario} stages (mean/p95 ms): {breakdown}")
+        for name, values in result["background"].items():
+            print(f"  {scenario} {name}: p50 {values['p50'] * 1000:.0f}ms, p95 {values['p95'] * 1000:.0f}ms")
+        if result["sample_error"]:
+            print(f"  {scenario} error: {result['sample_error']}")
+
+
+def compare(results: Dict, baseline_path: str, max_regression: float) -> bool:
+    """Print p95 changes against a baseline run; False if any scenario regressed past the limit."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)["results"]
+    passed = True
+    for scenario, result in results.items():
+        if scenario not in baseline or not baseline[scenario]["p95"]:
+            continue
+        change = result["p95"] / baseline[scenario]["p95"] - 1
+        regressed = change > max_regression
+        passed = passed and not regressed
+        print(f"{scenario}: p95 {change:+.1%} vs baseline{' REGRESSION' if regressed else ''}")
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=100, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--sessions", type=int, default=16, help="Distinct session ids per scenario")
+    parser.add_argument("--llm-latency-ms", type=float, default=300, help="Fake LLM time to first token")
+    parser.add_argument("--llm-tokens-per-second", type=float, default=50)
+    parser.add_argument("--answer-tokens", type=int, default=120)
+    parser.add_argument("--translate-latency-ms", type=float, default=40)
+    parser.add_argument("--stt-latency-ms", type=float, default=250)
+    parser.add_argument("--embed-latency-ms", type=float, default=5, help="Fake embedding cost per call")
+    parser.add_argument("--real-embeddings", action="store_true", help="Load the real embedding model instead")
+    parser.add_argument("--corpus-size", type=int, default=2000, help="Synthetic chunks in the vector store")
+    parser.add_argument("--pdf-pages", type=int, default=5)
+    parser.add_argument("--mongo-uri", help="Keep sessions in this MongoDB instead of memory")
+    parser.add_argument("--port", type=int, default=5098)
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--baseline", help="Earlier --json output to compare p95 against")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args)
+        return
+
+    stubs = start_stub_server(args.translate_latency_ms, args.stt_latency_ms)
+    stub_url = f"http://127.0.0.1:{stubs.server_address[1]}"
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(
+            os.environ,
+            VECTOR_DB_DIR=os.path.join(tmp, "vector_db"),
+            EMBEDDING_CACHE_DIR=os.path.join(tmp, "embedding_cache"),
+            GOOGLE_TRANSLATE_BASE_URL=stub_url,
+            SARVAM_BASE_URL=stub_url,
+            GOOGLE_API_KEY="bench",
+            SARVAM_API_KEY="bench",
+            SESSION_STORE="mongo" if args.mongo_uri else "memory",
+            MONGO_URI=args.mongo_uri or "mongodb://127.0.0.1:27017",
+            WARM_UP="0"
+        )
+        command = [sys.executable, os.path.abspath(__file__), "--serve"] + sys.argv[1:]
+        log_path = os.path.join(tmp, "server.log")
+        with open(log_path, "w") as log:
+            server = subprocess.Popen(command, env=env, stdout=log, stderr=subprocess.STDOUT)
+        try:
+            print("Starting the app with stand-ins...")
+            deadline = time.time() + args.timeout
+            while time.time() < deadline and server.poll() is None:
+                try:
+                    if httpx.get(f"{base_url}/ready", timeout=2).status_code == 200:
+                        break
+                except httpx.HTTPError:
+                    pass
+                time.sleep(0.2)
+            else:
+                with open(log_path) as log:
+                    print(f"Server did not become ready:\n{log.read()[-3000:]}")
+                sys.exit(1)
+
+            results = {}
+            for scenario in args.scenarios.split(","):
+                print(f"Running {scenario}: {args.requests} requests at concurrency {args.concurrency}")
+                results[scenario] = asyncio.run(run_scenario(base_url, scenario, args))
+        finally:
+            server.terminate()
+            try:
+                server.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                server.kill()
+            stubs.shutdown()
+
+    print_report(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": {key: value for key, value in vars(args).items() if key != "serve"},
+                       "results": results}, f, indent=2)
+    if args.baseline and not compare(results, args.baseline, args.max_regression):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Compare the torch and ONNX embedding backends.
+
+Run from the backend directory after export_onnx.py:
+
+    python bench_embeddings.py [--backends torch,onnx] [--queries 200] [--docs 512] [--batch-size 64]
+
+Each backend runs in its own subprocess, so resident memory is measured in
+isolation. Reports model load time, single-query latency, batch throughput
+on chunk-sized texts, RSS, and the cosine agreement of every backend with the
+torch output against COSINE_TOLERANCE.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+QUERIES = [
+    "LIC surrender value",
+    "how to claim maxlife policy",
+    "What is the grace period for paying my premium?",
+    "documents needed for a death claim",
+    "deduction under section 80C for premiums",
+    "how do I update the address on my aadhaar card",
+    "free look period for term insurance",
+    "is maturity benefit taxable",
+]
+
+SENTENCES = [
+    "The policyholder may surrender the policy after premiums for three full years have been paid.",
+    "The surrender value is a percentage of the premiums paid plus any vested bonuses.",
+    "A claim must be intimated to the nearest branch along with the death certificate.",
+    "Premiums paid towards life insurance are eligible for deduction under section 80C.",
+    "If the premium is not paid within the grace period the policy lapses without value.",
+    "Revival of a lapsed policy requires payment of arrears with interest and proof of health.",
+]
+
+
+def chunk_texts(count: int):
+    """Chunk-sized (~1000 character) texts like those produced at ingestion."""
+    texts = []
+    for i in range(count):
+        sentences = [SENTENCES[(i + j) % len(SENTENCES)] for j in range(11)]
+        texts.append(f"Section {i}. " + " ".join(sentences))
+    return texts
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def run_worker(args):
+    os.environ["EMBEDDING_BACKEND"] = args.worker
+    # Measure the backend, not cache hits on the repeated query and document texts
+    os.environ["EMBEDDING_CACHE"] = "0"
+    from embedding_registry import _rss_bytes, embedding_registry
+
+    rss_start = _rss_bytes()
+    start = time.perf_counter()
+    embeddings = embedding_registry.get()
+    load_time = time.perf_counter() - start
+    embeddings.embed_query("warm up")
+
+    latencies = []
+    for i in range(args.queries):
+        start = time.perf_counter()
+        embeddings.embed_query(QUERIES[i % len(QUERIES)])
+        latencies.append(time.perf_counter() - start)
+
+    documents = chunk_texts(args.docs)
+    start = time.perf_counter()
+    for offset in range(0, len(documents), args.batch_size):
+        embeddings.embed_documents(documents[offset:offset + args.batch_size])
+    throughput = len(documents) / (time.perf_counter() - start)
+
+    reference = embeddings.embed_documents(QUERIES + chunk_texts(32))
+    np.save(args.out, np.asarray(reference, dtype=np.float32))
+
+    print(json.dumps({
+        "backend": args.worker,
+        "load_time": load_time,
+        "query_p50_ms": percentile(latencies, 0.5) * 1000,
+        "query_p95_ms": percentile(latencies, 0.95) * 1000,
+        "docs_per_second": throughput,
+        "rss_mb": _rss_bytes() / 2**20,
+        "model_rss_mb": (_rss_bytes() - rss_start) / 2**20
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", default="torch,onnx")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--docs", type=int, default=512)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--out", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return
+
+    from onnx_embeddings import COSINE_TOLERANCE
+
+    results = {}
+    vectors = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in args.backends.split(","):
+            out = os.path.join(tmp, f"{backend}.npy")
+            command = [sys.executable, __file__, "--worker", backend, "--out", out, "--queries", str(args.queries),
+                       "--docs", str(args.docs), "--batch-size", str(args.batch_size)]
+            completed = subprocess.run(command, capture_output=True, text=True)
+            if completed.returncode != 0:
+                print(f"{backend}: failed\n{completed.stderr[-2000:]}")
+                continue
+            results[backend] = json.loads(completed.stdout.strip().splitlines()[-1])
+            vectors[backend] = np.load(out)
+
+    print(f"{'backend':<8} {'load s':>7} {'query p50':>10} {'query p95':>10} {'docs/s':>8} {'RSS MB':>8} {'model MB':>9}")
+    for backend, result in results.items():
+        print(f"{backend:<8} {result['load_time']:>7.2f} {result['query_p50_ms']:>8.2f}ms {result['query_p95_ms']:>8.2f}ms "
+              f"{result['docs_per_second']:>8.1f} {result['rss_mb']:>8.0f} {result['model_rss_mb']:>9.0f}")
+
+    if "torch" in vectors:
+        reference = vectors["torch"] / np.linalg.norm(vectors["torch"], axis=1, keepdims=True)
+        for backend, matrix in vectors.items():
+            if backend == "torch":
+                continue
+            cosines = (matrix / np.linalg.norm(matrix, axis=1, keepdims=True) * reference).sum(axis=1)
+            status = "OK" if cosines.min() >= COSINE_TOLERANCE else "BELOW TOLERANCE"
+            print(f"{backend} vs torch: cosine min {cosines.min():.5f}, mean {cosines.mean():.5f} "
+                  f"(tolerance {COSINE_TOLERANCE}): {status}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Micro-benchmark: compiled KeywordMatcher vs the original fuzzy keyword scan.
+
+Run from the backend directory:
+
+    python bench_keyword_matcher.py [--repeat 5]
+
+Reports per-query latency of both implementations on a realistic query corpus
+and checks that they return the same true/false answer for every query.
+"""
+import argparse
+import statistics
+import time
+import warnings
+
+from keyword_matcher import contains_insurance_keywords_fuzzy, insurance_keyword_matcher
+
+QUERY_CORPUS = [
+    "hi",
+    "hello",
+    "thanks",
+    "good morning",
+    "ok",
+    "can you help me",
+    "Tell me a joke",
+    "What's the weather today",
+    "What is the surrender value of my LIC Jeevan policy?",
+    "how to claim maxlife policy",
+    "LIC surrender value",
+    "maxlife customer care number",
+    "What is sum assured in a term plan?",
+    "How do I add a nominee to my policy",
+    "nomine change procedure",
+    "insurence claim status",
+    "What documents are needed for a death claim?",
+    "Is ULIP better than a mutual fund?",
+    "What is the free-look period for health insurance",
+    "Can I take a loan against policy from LIC",
+    "What is section 80C deduction",
+    "how is bonus calculation done for endowment plans",
+    "my premium payment failed what should I do",
+    "renew policy online",
+    "lapse policy revival rules",
+    "Explain the riders available with max life insurance",
+    "What is the maturity benefit of LIC Jeevan Anand",
+    "apply for passport",
+    "aadhaar card update",
+    "How do I apply for a new Aadhaar card?",
+    "how to link pan card with aadhaar",
+    "book a train ticket to delhi",
+    "order an iPad from amazon",
+    "what is the process for voter id registration",
+    "ration card eligibility in maharashtra",
+    "income certificate kaise banaye",
+    "mera policy ka status kya hai",
+    "Which retirement plan gives a monthly pension?",
+    "Is health insurance premium tax deductible?",
+    "compare term plan and whole life insurance",
+    "child plan for education",
+    "How can I update my mobile number in bank account",
+    "what is the capital of france",
+    "write a poem about the monsoon",
+    "Summarise the uploaded document",
+    "how much tax do I pay on fixed deposit interest",
+    "xyz",
+    "What is the settlement ratio of max life",
+    "accidental cover vs health rider",
+    "wealth creation through investment plan",
+]
+
+
+def time_per_query(func, queries, repeat):
+    timings = []
+    for _ in range(repeat):
+        for query in queries:
+            start = time.perf_counter()
+            func(query)
+            timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="passes over the corpus per implementation")
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore", module="fuzzywuzzy")
+
+    mismatches = []
+    for query in QUERY_CORPUS:
+        expected = contains_insurance_keywords_fuzzy(query)
+        actual = insurance_keyword_matcher.get().matches(query)
+        if expected != actual:
+            mismatches.append((query, expected, actual))
+
+    legacy = time_per_query(contains_insurance_keywords_fuzzy, QUERY_CORPUS, args.repeat)
+    # Cold pass first so the compiled timings include per-word cache misses
+    insurance_keyword_matcher.get()._word_matches.cache_clear()
+    compiled_cold = time_per_query(insurance_keyword_matcher.get().matches, QUERY_CORPUS, 1)
+    compiled = time_per_query(insurance_keyword_matcher.get().matches, QUERY_CORPUS, args.repeat)
+
+    def describe(name, timings):
+        ordered = sorted(timings)
+        p95 = ordered[int(len(ordered) * 0.95) - 1]
+        print(f"{name:<22} mean {statistics.mean(timings) * 1e3:8.3f} ms   p95 {p95 * 1e3:8.3f} ms")
+
+    print(f"Corpus: {len(QUERY_CORPUS)} queries x {args.repeat} passes")
+    describe("fuzzy scan (legacy)", legacy)
+    describe("compiled (cold cache)", compiled_cold)
+    describe("compiled (warm)", compiled)
+    print(f"Speedup (cold): {statistics.mean(legacy) / statistics.mean(compiled_cold):.0f}x, "
+          f"(warm): {statistics.mean(legacy) / statistics.mean(compiled):.0f}x")
+    print(f"Agreement: {len(QUERY_CORPUS) - len(mismatches)}/{len(QUERY_CORPUS)}")
+    for query, expected, actual in mismatches:
+        print(f"  MISMATCH {query!r}: legacy={expected} compiled={actual}")
+
+
+if __name__ == "__main__":
+    main()
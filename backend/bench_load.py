@@ -0,0 +1,109 @@
+"""Load test concurrent /chat throughput against running servers.
+
+Start the servers to compare from the backend directory, e.g. the Flask dev
+server and the ASGI serving mode:
+
+    python main.py                                        # http://localhost:5001
+    uvicorn asgi:app --port 5002 --workers 4              # http://localhost:5002
+
+then run:
+
+    python bench_load.py --url http://localhost:5001 --url http://localhost:5002 \\
+        --concurrency 16 --requests 200
+
+Reports throughput, latency percentiles and errors for each server.
+"""
+import argparse
+import asyncio
+import time
+from typing import Dict, List
+
+import httpx
+
+QUERIES = [
+    "What is the surrender value of an LIC endowment policy?",
+    "How do I claim term insurance after the death of the policyholder?",
+    "What documents are needed to apply for a passport?",
+    "How can I update my address on my aadhaar card?",
+    "What is the grace period for paying a missed premium?",
+    "hello, can you help me?",
+    "Is maturity benefit taxable in India?",
+    "How do I check the status of my ration card application?",
+]
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_load(base_url: str, total: int, concurrency: int, explain: bool, timeout: float) -> Dict:
+    latencies = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker(client: httpx.AsyncClient, worker_id: int):
+        nonlocal errors
+        for index in counter:
+            payload = {
+                "message": QUERIES[index % len(QUERIES)],
+                # One session per worker keeps chat history bounded and comparable across servers
+                "session_id": f"load-{worker_id}",
+                "explain": explain
+            }
+            start = time.perf_counter()
+            try:
+                response = await client.post(f"{base_url}/chat", json=payload)
+                ok = response.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+        # Warm-up request so model loading is not counted
+        await client.post(f"{base_url}/chat", json={"message": QUERIES[0], "session_id": "load-warmup"})
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client, worker_id) for worker_id in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return {
+        "url": base_url,
+        "requests": total,
+        "errors": errors,
+        "elapsed": elapsed,
+        "throughput": len(latencies) / elapsed if elapsed else 0.0,
+        "p50": percentile(latencies, 0.50),
+        "p95": percentile(latencies, 0.95),
+        "p99": percentile(latencies, 0.99)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", action="append", required=True, help="Server base URL (repeat to compare)")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--explain", action="store_true", help="Request explanations as the frontend does")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+
+    print(f"{args.requests} /chat requests at concurrency {args.concurrency}")
+    print(f"{'server':<32} {'req/s':>8} {'p50 s':>8} {'p95 s':>8} {'p99 s':>8} {'errors':>7}")
+    for base_url in args.url:
+        result = asyncio.run(run_load(
+            base_url.rstrip("/"), args.requests, args.concurrency, args.explain, args.timeout
+        ))
+        print(f"{result['url']:<32} {result['throughput']:>8.2f} {result['p50']:>8.2f} "
+              f"{result['p95']:>8.2f} {result['p99']:>8.2f} {result['errors']:>7}")
+
+
+if __name__ == "__main__":
+    main()
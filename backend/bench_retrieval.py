@@ -0,0 +1,152 @@
+"""Benchmark dense-only against hybrid (dense + BM25, RRF) retrieval.
+
+Run from the backend directory against the existing vector store:
+
+    python bench_retrieval.py [--runs 20] [--max-overhead 0.10] [--rerank-pools 10,20,50]
+
+Both paths embed the query, search Chroma and rescore the candidate pool the
+way RAGChat.hybrid_retrieval does; the hybrid path also queries the lexical
+index and fuses the two rankings. The stated bound is that hybrid p95 stays
+within --max-overhead (default 10%) of dense-only p95. The script reports
+both latencies, the lexical search alone, and exits non-zero if the bound is
+not met.
+
+With --rerank-pools, it also times the cross-encoder rerank pass for each
+candidate pool size, without a budget, and counts how often each size would
+exceed the serving budget (--rerank-budget-ms).
+"""
+import argparse
+import os
+import sys
+import time
+from typing import List
+
+import numpy as np
+from langchain_chroma import Chroma
+
+from embedding_registry import get_embeddings
+from lexical_index import get_lexical_index, reciprocal_rank_fusion
+from reranker import CrossEncoderReranker, DEFAULT_RERANK_MODEL
+
+QUERIES = [
+    "LIC surrender value",
+    "how to claim maxlife policy",
+    "LIC Jeevan Anand bonus rates",
+    "deduction under section 80C for premiums",
+    "section 10(10D) maturity proceeds tax",
+    "policy number 1234567 status",
+    "What happens if I miss a premium payment?",
+    "free look period for term insurance",
+    "grace period for yearly premium",
+    "accidental death benefit rider",
+    "how do I nominate a beneficiary",
+    "documents required for death claim",
+    "ULIP fund switching charges",
+    "revival of lapsed policy",
+    "loan against LIC policy interest rate",
+    "maturity claim discharge form",
+]
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def dense_ranking(collection, query_embedding, pool_size: int) -> List[str]:
+    results = collection.query(
+        query_embeddings=[query_embedding],
+        n_results=pool_size,
+        include=["documents", "metadatas", "distances", "embeddings"]
+    )
+    ids = results["ids"][0]
+    if not ids:
+        return []
+    candidates = np.asarray(results["embeddings"][0], dtype=np.float32)
+    query = np.asarray(query_embedding, dtype=np.float32)
+    scores = candidates @ query / (np.linalg.norm(candidates, axis=1) * np.linalg.norm(query))
+    return [ids[idx] for idx in np.argsort(-scores)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--persist-directory", default="./vector_db")
+    parser.add_argument("--runs", type=int, default=20, help="Passes over the query set")
+    parser.add_argument("--pool-size", type=int, default=10)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--max-overhead", type=float, default=0.10)
+    parser.add_argument("--rerank-pools", default="", help="Comma-separated pool sizes to time the reranker at")
+    parser.add_argument("--rerank-model", default=DEFAULT_RERANK_MODEL)
+    parser.add_argument("--rerank-budget-ms", type=float, default=150.0)
+    args = parser.parse_args()
+
+    # Time the model itself: repeated queries would otherwise be served from the embedding cache
+    os.environ["EMBEDDING_CACHE"] = "0"
+    embeddings = get_embeddings()
+    collection = Chroma(persist_directory=args.persist_directory, embedding_function=embeddings)._collection
+    lexical_index = get_lexical_index(args.persist_directory)
+    lexical_index.backfill(collection)
+    print(f"Chunks: {collection.count()} in Chroma, {lexical_index.count()} in the lexical index")
+
+    # Warm up the model, HNSW index and SQLite page cache
+    for query in QUERIES:
+        dense_ranking(collection, embeddings.embed_query(query), args.pool_size)
+        lexical_index.search(query, args.pool_size)
+
+    dense_times, hybrid_times, lexical_times = [], [], []
+    changed = 0
+    for _ in range(args.runs):
+        for query in QUERIES:
+            start = time.perf_counter()
+            dense = dense_ranking(collection, embeddings.embed_query(query), args.pool_size)[:args.k]
+            dense_times.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            ranking = dense_ranking(collection, embeddings.embed_query(query), args.pool_size)
+            lexical_start = time.perf_counter()
+            lexical = [row[0] for row in lexical_index.search(query, args.pool_size)]
+            lexical_times.append(time.perf_counter() - lexical_start)
+            hybrid = [cid for cid, _ in reciprocal_rank_fusion([ranking, lexical])[:args.k]]
+            hybrid_times.append(time.perf_counter() - start)
+            changed += hybrid != dense
+
+    dense_p95 = percentile(dense_times, 0.95)
+    hybrid_p95 = percentile(hybrid_times, 0.95)
+    bound = dense_p95 * (1 + args.max_overhead)
+    print(f"Queries: {len(dense_times)}")
+    print(f"Dense-only  p50 {percentile(dense_times, 0.5) * 1e3:7.2f} ms   p95 {dense_p95 * 1e3:7.2f} ms")
+    print(f"Hybrid      p50 {percentile(hybrid_times, 0.5) * 1e3:7.2f} ms   p95 {hybrid_p95 * 1e3:7.2f} ms")
+    print(f"BM25 alone  p50 {percentile(lexical_times, 0.5) * 1e3:7.2f} ms   p95 {percentile(lexical_times, 0.95) * 1e3:7.2f} ms")
+    print(f"Top-{args.k} changed by fusion: {changed / len(dense_times):.0%} of queries")
+    print(f"Bound: hybrid p95 <= {bound * 1e3:.2f} ms (dense p95 + {args.max_overhead:.0%}): "
+          f"{'OK' if hybrid_p95 <= bound else 'EXCEEDED'}")
+
+    if args.rerank_pools:
+        bench_rerank(collection, embeddings, args)
+    sys.exit(0 if hybrid_p95 <= bound else 1)
+
+
+def bench_rerank(collection, embeddings, args):
+    reranker = CrossEncoderReranker(model_name=args.rerank_model)
+    reranker.warm_up()
+    print(f"Rerank model {args.rerank_model} loaded in {reranker.load_time:.2f}s; budget {args.rerank_budget_ms:.0f} ms")
+
+    query_embeddings = embeddings.embed_documents(QUERIES)
+    for pool_size in (int(size) for size in args.rerank_pools.split(",")):
+        pools = [
+            collection.query(query_embeddings=[vector], n_results=pool_size, include=["documents"])["documents"][0]
+            for vector in query_embeddings
+        ]
+        timings = []
+        for _ in range(max(1, args.runs // 4)):
+            for query, texts in zip(QUERIES, pools):
+                start = time.perf_counter()
+                reranker.score(query, texts)
+                timings.append(time.perf_counter() - start)
+        over_budget = sum(timing * 1000 > args.rerank_budget_ms for timing in timings)
+        print(f"Rerank pool {pool_size:>3}: p50 {percentile(timings, 0.5) * 1e3:7.2f} ms   "
+              f"p95 {percentile(timings, 0.95) * 1e3:7.2f} ms   over budget {over_budget / len(timings):.0%}")
+
+
+if __name__ == "__main__":
+    main()
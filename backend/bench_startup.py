@@ -0,0 +1,151 @@
+"""Measure cold-start cost: import time of main.py and time to first response.
+
+Run from the backend directory with the usual .env in place:
+
+    python bench_startup.py [--runs 5] [--server asgi|dev] [--port 5099] [--chat]
+
+Each run starts a fresh interpreter, so nothing is shared between runs:
+
+- import: seconds to `import main`, plus the slowest modules it pulls in
+  (from `python -X importtime`)
+- first response: process start until GET /ready answers at all
+- ready: process start until /ready returns 200 (models warm); needs WARM_UP=1.
+  A run whose warm-up fails is reported as failed instead of waiting out --timeout
+- first chat (--chat): process start until the first /chat reply
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+IMPORT_SNIPPET = "import time; start = time.perf_counter(); import main; print(time.perf_counter() - start)"
+
+
+def measure_import() -> float:
+    completed = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"import main failed:\n{completed.stderr[-2000:]}")
+    return float(completed.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(count: int) -> List[tuple]:
+    """Modules imported directly by main, by cumulative import time in seconds."""
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                               capture_output=True, text=True)
+    totals: Dict[str, float] = {}
+    for line in completed.stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \|( *)(\S+)", line)
+        # importtime indents by two spaces per level; main itself sits at one space
+        if match and len(match.group(2)) == 3:
+            package = match.group(3).split(".")[0]
+            totals[package] = totals.get(package, 0.0) + int(match.group(1)) / 1e6
+    return sorted(totals.items(), key=lambda item: -item[1])[:count]
+
+
+def wait_for(client: httpx.Client, deadline: float, request) -> Optional[float]:
+    """Poll until request() returns a response; seconds at success or None on timeout."""
+    while time.perf_counter() < deadline:
+        try:
+            response = request(client)
+            if response is not None:
+                return time.perf_counter()
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.05)
+    return None
+
+
+class WarmUpFailed(Exception):
+    pass
+
+
+def ready_response(client: httpx.Client) -> Optional[httpx.Response]:
+    """The /ready response once it is 200, None while warming; raises if warm-up failed."""
+    response = client.get("/ready")
+    if response.status_code == 200:
+        return response
+    warm_up = response.json().get("warm_up") or {}
+    if warm_up.get("state") == "failed":
+        raise WarmUpFailed(warm_up.get("error"))
+    return None
+
+
+def measure_server(args) -> Dict:
+    if args.server == "asgi":
+        command = [sys.executable, "-m", "uvicorn", "asgi:app", "--port", str(args.port), "--log-level", "warning"]
+    else:
+        command = [sys.executable, "main.py"]
+    env = dict(os.environ, PORT=str(args.port))
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    start = time.perf_counter()
+    process = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    result = {"first_response": None, "ready": None, "first_chat": None, "warm_up_error": None}
+    try:
+        with httpx.Client(base_url=base_url, timeout=args.timeout) as client:
+            deadline = start + args.timeout
+            reached = wait_for(client, deadline, lambda c: c.get("/ready"))
+            if reached is None:
+                return result
+            result["first_response"] = reached - start
+
+            if args.chat:
+                reached = wait_for(client, deadline, lambda c: c.post(
+                    "/chat", json={"message": "What is the grace period for paying a premium?",
+                                   "session_id": "bench-startup"}))
+                result["first_chat"] = reached - start if reached else None
+
+            if os.getenv("WARM_UP", "1") == "1":
+                try:
+                    reached = wait_for(client, deadline, ready_response)
+                    result["ready"] = reached - start if reached else None
+                except WarmUpFailed as e:
+                    result["warm_up_error"] = str(e)
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+    return result
+
+
+def summary(values: List[Optional[float]]) -> str:
+    values = [value for value in values if value is not None]
+    if not values:
+        return "n/a"
+    return f"mean {sum(values) / len(values):.2f}s, min {min(values):.2f}s, max {max(values):.2f}s"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--server", choices=("asgi", "dev"), default="asgi")
+    parser.add_argument("--port", type=int, default=5099)
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--chat", action="store_true", help="Also time the first /chat reply (calls the LLM)")
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest imports to list")
+    args = parser.parse_args()
+
+    imports = [measure_import() for _ in range(args.runs)]
+    print(f"import main:     {summary(imports)}")
+    for package, seconds in slowest_imports(args.top):
+        print(f"  {package:<28} {seconds:>6.3f}s")
+
+    runs = [measure_server(args) for _ in range(args.runs)]
+    print(f"first response:  {summary([run['first_response'] for run in runs])}")
+    if args.chat:
+        print(f"first chat:      {summary([run['first_chat'] for run in runs])}")
+    print(f"ready (warm):    {summary([run['ready'] for run in runs])}")
+    failures = [run["warm_up_error"] for run in runs if run["warm_up_error"] is not None]
+    if failures:
+        print(f"warm-up failed:  {len(failures)}/{len(runs)} runs, e.g. {failures[0]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,41 +1,154 @@
+import multiprocessing
 import os
-from typing import List
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Tuple
 from langchain.schema import Document
 from langchain_community.vectorstores import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
 import PyPDF2
-from langchain.text_splitter import CharacterTextSplitter
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from embedding_registry import DEFAULT_EMBEDDING_MODEL, get_embeddings
+from ingest_manifest import IngestReport, file_sha256, get_manifest
+from lexical_index import get_lexical_index
+from retrieval_cache import IndexVersion
+
+
+class PdfChunkStream:
+    """Iterate over a PDF's chunks page by page in bounded memory.
+
+    Only the pages that have not yet been flushed into a finished chunk are kept
+    in the buffer, so memory stays around a couple of chunk sizes plus the
+    largest page, regardless of document length. Every chunk carries the pages
+    it spans as ``page_start``/``page_end`` (1-based) metadata.
+    """
+
+    def __init__(self, file_path: str, chunk_size: int = 1000, chunk_overlap: int = 200):
+        self.file_path = file_path
+        self.chunk_size = chunk_size
+        self.text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap
+        )
+        self.pages_read = 0
+
+    def __iter__(self) -> Iterator[Tuple[str, Dict]]:
+        buffer = ""
+        # (offset in buffer, page number) for every page that starts inside the buffer
+        page_marks: List[Tuple[int, int]] = []
+
+        with open(self.file_path, 'rb') as file:
+            pdf_reader = PyPDF2.PdfReader(file)
+            for page_number, page in enumerate(pdf_reader.pages, 1):
+                self.pages_read = page_number
+                text = page.extract_text() or ""
+                if not text:
+                    continue
+
+                if buffer:
+                    buffer += "\n"
+                page_marks.append((len(buffer), page_number))
+                buffer += text
+
+                if len(buffer) < 2 * self.chunk_size:
+                    continue
+
+                # Emit every chunk except the last, which may still grow with the next page
+                chunks = self._locate_chunks(buffer, page_marks)
+                if len(chunks) < 2:
+                    continue
+                for text, metadata, _ in chunks[:-1]:
+                    yield text, metadata
+
+                tail_offset = chunks[-1][2]
+                buffer = buffer[tail_offset:]
+                page_marks = self._shift_marks(page_marks, tail_offset)
+
+        for text, metadata, _ in self._locate_chunks(buffer, page_marks):
+            yield text, metadata
+
+    def _locate_chunks(self, buffer: str, page_marks: List[Tuple[int, int]]) -> List[Tuple]:
+        """Split the buffer and attach the page range and buffer offset of each chunk."""
+        located = []
+        search_from = 0
+        for chunk in self.text_splitter.split_text(buffer):
+            offset = buffer.find(chunk, search_from)
+            if offset < 0:
+                offset = search_from
+            search_from = offset + 1
+
+            metadata = {
+                "source": self.file_path,
+                "file_name": os.path.basename(self.file_path),
+                "page_start": self._page_at(page_marks, offset),
+                "page_end": self._page_at(page_marks, offset + len(chunk) - 1)
+            }
+            located.append((chunk, metadata, offset))
+        return located
+
+    @staticmethod
+    def _page_at(page_marks: List[Tuple[int, int]], offset: int) -> int:
+        page = page_marks[0][1] if page_marks else 0
+        for mark_offset, page_number in page_marks:
+            if mark_offset > offset:
+                break
+            page = page_number
+        return page
+
+    @staticmethod
+    def _shift_marks(page_marks: List[Tuple[int, int]], offset: int) -> List[Tuple[int, int]]:
+        """Rebase page marks after dropping ``offset`` characters from the buffer."""
+        shifted = []
+        for mark_offset, page_number in page_marks:
+            if mark_offset <= offset:
+                # The page already in progress at the cut point now starts at 0
+                shifted = [(0, page_number)]
+            else:
+                shifted.append((mark_offset - offset, page_number))
+        return shifted
+
+
+def _extract_worker(file_path: str) -> Tuple[str, List[Tuple[str, Dict]], int, str]:
+    """Process-pool entry point: never raises, so one bad PDF cannot stop a bulk run."""
+    try:
+        stream = PdfChunkStream(file_path)
+        chunks = list(stream)
+        return file_path, chunks, stream.pages_read, ""
+    except Exception as e:
+        return file_path, [], 0, str(e)
+
+
+@dataclass
+class IngestionStats:
+    """Counters and throughput for a bulk ingestion run."""
+    files: int = 0
+    pages: int = 0
+    chunks: int = 0
+    failed_files: List[str] = field(default_factory=list)
+    elapsed: float = 0.0
+    report: IngestReport = field(default_factory=IngestReport)
+
+    @property
+    def pages_per_second(self) -> float:
+        return self.pages / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def chunks_per_second(self) -> float:
+        return self.chunks / self.elapsed if self.elapsed else 0.0
+
 
 class DocumentProcessor:
-    def __init__(self, persist_directory: str = "./vector_db"):
+    def __init__(self, persist_directory: str = "./vector_db", model_name: str = DEFAULT_EMBEDDING_MODEL):
         self.persist_directory = persist_directory
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name="sentence-transformers/all-mpnet-base-v2"
-        )
+        # Shared with RAGChat through the registry, so constructing a processor is cheap
+        self.embeddings = get_embeddings(model_name)
         
     def process_pdf(self, file_path: str) -> List[Document]:
         """Process a single PDF file and return chunks."""
         try:
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                text = ""
-                for page in pdf_reader.pages:
-                    text += page.extract_text()
-                
-                # Include metadata about the source file
-                metadata = {
-                    "source": file_path,
-                    "file_name": os.path.basename(file_path)
-                }
-                
-                # Split text into chunks
-                text_splitter = CharacterTextSplitter(
-                    chunk_size=1000,
-                    chunk_overlap=200
-                )
-                chunks = text_splitter.split_text(text)
-                
-                return [Document(page_content=chunk, metadata=metadata) for chunk in chunks]
+            return [Document(page_content=text, metadata=metadata) for text, metadata in PdfChunkStream(file_path)]
         except Exception as e:
             print(f"Error processing {file_path}: {str(e)}")
             return []
@@ -53,6 +166,248 @@ class DocumentProcessor:
         
         return all_documents
 
+    def ingest_pdf(self, file_path: str, source_key: str = None, vector_store=None,
+                   batch_size: int = 64, progress_callback: Callable[[int, int], None] = None,
+                   replace: bool = True) -> IngestReport:
+        """Incrementally ingest one PDF, streaming only new chunks into the vector store.
+
+        Unchanged files are skipped by content hash, chunks are stored under
+        content-hash ids so identical text is stored once, and chunks dropped
+        from a changed file are deleted once no other file references them.
+        With replace=False, a source_key that already holds different content
+        raises FileExistsError instead of being updated.
+        """
+        source_key = source_key or file_path
+        report = IngestReport()
+        manifest = get_manifest(self.persist_directory)
+        lexical_index = get_lexical_index(self.persist_directory)
+
+        with manifest.lock:
+            digest = file_sha256(file_path)
+            if not replace and source_key in manifest.files and not manifest.is_unchanged(source_key, digest):
+                raise FileExistsError(f"{source_key} already holds a different document")
+            update = manifest.begin_file(source_key, digest, report, file_name=os.path.basename(file_path))
+            if update is None:
+                print(f"Skipping unchanged file {source_key}")
+                return report
+
+            if vector_store is None:
+                vector_store = Chroma(
+                    persist_directory=self.persist_directory,
+                    embedding_function=self.embeddings
+                )
+
+            try:
+                stream = PdfChunkStream(file_path)
+                batch: List[Document] = []
+                batch_ids: List[str] = []
+                chunks_written = 0
+
+                def write_batch():
+                    nonlocal batch, batch_ids, chunks_written
+                    if batch:
+                        vector_store.add_documents(batch, ids=batch_ids)
+                        lexical_index.add(batch_ids, [doc.page_content for doc in batch], [doc.metadata for doc in batch])
+                        chunks_written += len(batch)
+                        batch, batch_ids = [], []
+                    if progress_callback:
+                        progress_callback(stream.pages_read, chunks_written)
+
+                for text, metadata in stream:
+                    cid = update.add_chunk(text, metadata)
+                    if cid is None:
+                        continue
+                    metadata["source"] = source_key
+                    batch.append(Document(page_content=text, metadata=metadata))
+                    batch_ids.append(cid)
+                    if len(batch) >= batch_size:
+                        write_batch()
+                write_batch()
+
+                stale_ids, citations = manifest.finish_file(update)
+                if stale_ids:
+                    vector_store.delete(ids=stale_ids)
+                    lexical_index.delete(stale_ids)
+                if citations:
+                    # Shared chunks this file no longer contains now cite another file that does
+                    vector_store._collection.update(ids=list(citations), metadatas=list(citations.values()))
+                    lexical_index.update_metadata(citations)
+                manifest.save()
+            except Exception:
+                # Drop the half-applied in-memory state; writes so far are idempotent by id
+                manifest.load()
+                raise
+
+        print(f"Ingested {source_key}: {report.summary()}")
+        return report
+
+    def iter_pdf_paths(self, root_dir: str) -> Iterator[str]:
+        """Yield every PDF path under a directory."""
+        for dirpath, _, filenames in os.walk(root_dir):
+            for filename in filenames:
+                if filename.endswith('.pdf'):
+                    yield os.path.join(dirpath, filename)
+
+    def ingest_directory(self, root_dir: str, workers: int = None, embed_batch_size: int = 64,
+                         write_batch_size: int = 256, max_pending_files: int = None,
+                         prune: bool = True) -> IngestionStats:
+        """Pipelined, incremental bulk ingestion of every PDF under a directory.
+
+        Stage 1 parses and chunks PDFs in a process pool. Stage 2 embeds chunks in
+        fixed-size batches in this process. Stage 3 writes to Chroma from a writer
+        thread. At most ``max_pending_files`` files are in flight and the writer
+        queue is bounded, so a slow stage throttles the ones before it and memory
+        stays proportional to the batch sizes rather than the corpus.
+
+        Files whose hash matches the manifest are never parsed, only new chunks are
+        embedded, and with ``prune`` the chunks of PDFs deleted from the directory
+        are removed as well.
+        """
+        workers = workers or os.cpu_count() or 1
+        max_pending_files = max_pending_files or workers * 2
+        pdf_paths = [os.path.abspath(path) for path in self.iter_pdf_paths(root_dir)]
+        stats = IngestionStats()
+        manifest = get_manifest(self.persist_directory)
+        lexical_index = get_lexical_index(self.persist_directory)
+        start_time = time.time()
+
+        collection = Chroma(
+            persist_directory=self.persist_directory,
+            embedding_function=self.embeddings
+        )._collection
+
+        # Stage 3: single writer thread fed through a bounded queue
+        write_queue: "queue.Queue" = queue.Queue(maxsize=2)
+        write_errors: List[Exception] = []
+
+        def writer():
+            while True:
+                item = write_queue.get()
+                if item is None:
+                    return
+                try:
+                    if item[0] == "delete":
+                        collection.delete(ids=item[1])
+                        lexical_index.delete(item[1])
+                    elif item[0] == "cite":
+                        collection.update(ids=list(item[1]), metadatas=list(item[1].values()))
+                        lexical_index.update_metadata(item[1])
+                    else:
+                        _, ids, texts, metadatas, embeddings = item
+                        collection.upsert(
+                            ids=ids,
+                            embeddings=embeddings,
+                            documents=texts,
+                            metadatas=metadatas
+                        )
+                        lexical_index.add(ids, texts, metadatas)
+                except Exception as e:
+                    write_errors.append(e)
+
+        writer_thread = threading.Thread(target=writer, name="chroma-writer", daemon=True)
+        writer_thread.start()
+
+        pending: List[Tuple[str, str, Dict]] = []
+        write_buffer: Tuple[List, List, List, List] = ([], [], [], [])
+
+        def flush_writes():
+            if write_buffer[0]:
+                write_queue.put(("add",) + tuple(list(part) for part in write_buffer))
+                for part in write_buffer:
+                    part.clear()
+
+        def queue_release(stale_ids: List[str], citations: Dict[str, Dict]):
+            if stale_ids:
+                write_queue.put(("delete", stale_ids))
+            if citations:
+                write_queue.put(("cite", citations))
+
+        def embed_pending(final: bool = False):
+            # Stage 2: embed in fixed-size batches; the tail is only embedded at the end
+            while len(pending) >= embed_batch_size or (final and pending):
+                batch = pending[:embed_batch_size]
+                del pending[:embed_batch_size]
+
+                texts = [text for _, text, _ in batch]
+                write_buffer[0].extend(cid for cid, _, _ in batch)
+                write_buffer[1].extend(texts)
+                write_buffer[2].extend(metadata for _, _, metadata in batch)
+                write_buffer[3].extend(self.embeddings.embed_documents(texts))
+                if len(write_buffer[0]) >= write_batch_size:
+                    flush_writes()
+
+        with manifest.lock:
+            try:
+                # spawn keeps torch state and the loaded model out of the extraction workers
+                context = multiprocessing.get_context("spawn")
+                with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                    paths = iter(pdf_paths)
+                    in_flight = {}
+
+                    def refill():
+                        for file_path in paths:
+                            update = manifest.begin_file(file_path, file_sha256(file_path), stats.report)
+                            if update is None:
+                                continue
+                            in_flight[pool.submit(_extract_worker, file_path)] = update
+                            if len(in_flight) >= max_pending_files:
+                                return
+
+                    refill()
+                    while in_flight:
+                        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            update = in_flight.pop(future)
+                            file_path, chunks, page_count, error = future.result()
+                            stats.files += 1
+                            if error:
+                                print(f"Error processing {file_path}: {error}")
+                                stats.failed_files.append(file_path)
+                                continue
+
+                            stats.pages += page_count
+                            stats.chunks += len(chunks)
+                            for text, metadata in chunks:
+                                cid = update.add_chunk(text, metadata)
+                                if cid is not None:
+                                    pending.append((cid, text, metadata))
+                            queue_release(*manifest.finish_file(update))
+
+                        embed_pending()
+                        print(f"[{stats.files + len(stats.report.files_skipped)}/{len(pdf_paths)}] files ingested, "
+                              f"{stats.chunks} chunks")
+                        refill()
+
+                embed_pending(final=True)
+                flush_writes()
+
+                if prune:
+                    root_prefix = os.path.abspath(root_dir) + os.sep
+                    seen = set(pdf_paths)
+                    for source_key in list(manifest.files):
+                        if source_key.startswith(root_prefix) and source_key not in seen:
+                            queue_release(*manifest.remove_file(source_key, stats.report))
+            finally:
+                write_queue.put(None)
+                writer_thread.join()
+
+            if write_errors:
+                manifest.load()
+                raise write_errors[0]
+            manifest.save()
+            report = stats.report
+            if report.files_added or report.files_updated or report.files_removed:
+                # Running servers drop their caches and reopen the vector store
+                IndexVersion.for_directory(self.persist_directory).bump()
+
+        stats.elapsed = time.time() - start_time
+        print(
+            f"Ingested {stats.files} files ({stats.pages} pages, {stats.chunks} chunks) in {stats.elapsed:.1f}s: "
+            f"{stats.pages_per_second:.1f} pages/s, {stats.chunks_per_second:.1f} chunks/s"
+        )
+        print(stats.report.summary())
+        return stats
+
     def create_vector_store(self, documents: List[Document]) -> Chroma:
         """Create and persist the vector store."""
         return Chroma.from_documents(
@@ -65,14 +420,11 @@ def main():
     # Initialize processor
     processor = DocumentProcessor()
     
-    # Process all documents
-    documents = processor.process_directory("/Users/sparshkarna/Downloads/Hackathon")  # Change this to your root directory
+    # Parse, embed and write all documents in a pipelined run
+    stats = processor.ingest_directory("/Users/sparshkarna/Downloads/Hackathon")  # Change this to your root directory
     
-    if documents:
-        # Create and persist vector store
-        vector_store = processor.create_vector_store(documents)
-        vector_store.persist()
-        print(f"Successfully processed {len(documents)} document chunks")
+    if stats.chunks or stats.report.files_skipped:
+        print(f"Successfully processed {stats.chunks} document chunks ({stats.report.chunks_added} new)")
     else:
         print("No documents were processed")
 
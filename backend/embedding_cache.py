@@ -0,0 +1,209 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+DEFAULT_CACHE_DIR = "./embedding_cache"
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class DiskEmbeddingStore:
+    """Vectors of one model in a memory-mapped float32 file, indexed by text hash in SQLite.
+
+    Rows are only ever appended. Row allocation happens inside an IMMEDIATE
+    transaction, so an ingestion run and the server can share a store; a
+    process whose mapping is shorter than the file simply remaps it.
+    """
+
+    GROWTH_ROWS = 4096
+
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self.vectors_path = os.path.join(directory, "vectors.f32")
+        self._connection = sqlite3.connect(
+            os.path.join(directory, "index.sqlite"), timeout=30, check_same_thread=False, isolation_level=None
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS vectors (hash TEXT PRIMARY KEY, row INTEGER NOT NULL)")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        row = self._connection.execute("SELECT value FROM meta WHERE key = 'dim'").fetchone()
+        self.dim = int(row[0]) if row else None
+        self._map: Optional[np.memmap] = None
+        self._lock = threading.Lock()
+
+    def _mapped(self, rows_needed: int) -> np.memmap:
+        row_bytes = self.dim * 4
+        size = os.path.getsize(self.vectors_path) if os.path.exists(self.vectors_path) else 0
+        capacity = size // row_bytes
+        if rows_needed > capacity:
+            capacity = max(rows_needed, capacity * 2, self.GROWTH_ROWS)
+            with open(self.vectors_path, "ab") as f:
+                f.truncate(capacity * row_bytes)
+        if self._map is None or len(self._map) < rows_needed:
+            self._map = np.memmap(self.vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+        return self._map
+
+    def get(self, hashes: List[str]) -> Dict[str, np.ndarray]:
+        if self.dim is None or not hashes:
+            return {}
+        with self._lock:
+            rows = {}
+            for start in range(0, len(hashes), 500):
+                batch = hashes[start:start + 500]
+                rows.update(self._connection.execute(
+                    f"SELECT hash, row FROM vectors WHERE hash IN ({','.join('?' * len(batch))})", batch
+                ).fetchall())
+            if not rows:
+                return {}
+            vectors = self._mapped(max(rows.values()) + 1)
+            return {key: np.array(vectors[row]) for key, row in rows.items()}
+
+    def put(self, hashes: List[str], vectors: List[List[float]]):
+        if not hashes:
+            return
+        matrix = np.asarray(vectors, dtype=np.float32)
+        with self._lock:
+            if self.dim is None:
+                self.dim = matrix.shape[1]
+                self._connection.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('dim', ?)", (str(self.dim),))
+
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                start = self._connection.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM vectors").fetchone()[0]
+                mapped = self._mapped(start + len(hashes))
+                mapped[start:start + len(hashes)] = matrix
+                mapped.flush()
+                self._connection.executemany(
+                    "INSERT OR IGNORE INTO vectors (hash, row) VALUES (?, ?)",
+                    [(key, start + offset) for offset, key in enumerate(hashes)]
+                )
+                self._connection.execute("COMMIT")
+            except Exception:
+                self._connection.execute("ROLLBACK")
+                raise
+
+    def stats(self) -> Dict:
+        with self._lock:
+            rows = self._connection.execute("SELECT COUNT(*) FROM vectors").fetchone()[0]
+        return {
+            "rows": rows,
+            "file_bytes": os.path.getsize(self.vectors_path) if os.path.exists(self.vectors_path) else 0
+        }
+
+
+class CachedEmbeddings(Embeddings):
+    """Embedding cache keyed by (model id, text hash), in two tiers.
+
+    Queries go through a bounded in-memory LRU and are never written to
+    disk. Documents (chunks) go through a persistent DiskEmbeddingStore per
+    model id, so re-uploaded PDFs and re-built vector stores reuse earlier
+    vectors. Hit ratios and the model time saved are reported by stats().
+    """
+
+    def __init__(self, embeddings: Embeddings, model_id: str, cache_dir: str = DEFAULT_CACHE_DIR,
+                 max_query_entries: int = 10000):
+        self.embeddings = embeddings
+        self.model_id = model_id
+        self.model_name = getattr(embeddings, "model_name", model_id)
+        self.max_query_entries = max_query_entries
+        self.store = DiskEmbeddingStore(os.path.join(cache_dir, re.sub(r"[^\w.-]+", "_", model_id)))
+
+        self._queries: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {"query_hits": 0, "query_misses": 0, "document_hits": 0, "document_misses": 0}
+        # Measured model time per text, used to estimate the time hits save
+        self._seconds_per_query = 0.0
+        self._seconds_per_document = 0.0
+        self.time_saved = 0.0
+
+    def cached_query(self, text: str) -> Optional[List[float]]:
+        """Return the query's vector if it is in the memory tier."""
+        key = text_hash(text)
+        with self._lock:
+            vector = self._queries.get(key)
+            if vector is None:
+                return None
+            self._queries.move_to_end(key)
+            self.counters["query_hits"] += 1
+            self.time_saved += self._seconds_per_query
+            return vector
+
+    def _remember_queries(self, texts: List[str], vectors: List[List[float]], elapsed: float):
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                self._queries[text_hash(text)] = vector
+            while len(self._queries) > self.max_query_entries:
+                self._queries.popitem(last=False)
+            self.counters["query_misses"] += len(texts)
+            self._seconds_per_query = elapsed / len(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        vector = self.cached_query(text)
+        if vector is not None:
+            return vector
+        start = time.perf_counter()
+        vector = self.embeddings.embed_query(text)
+        self._remember_queries([text], [vector], time.perf_counter() - start)
+        return vector
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed several queries in one pass, through the memory tier."""
+        vectors = [self.cached_query(text) for text in texts]
+        missing = [idx for idx, vector in enumerate(vectors) if vector is None]
+        if missing:
+            start = time.perf_counter()
+            computed = self.embeddings.embed_documents([texts[idx] for idx in missing])
+            self._remember_queries([texts[idx] for idx in missing], computed, time.perf_counter() - start)
+            for idx, vector in zip(missing, computed):
+                vectors[idx] = vector
+        return vectors
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        hashes = [text_hash(text) for text in texts]
+        found = self.store.get(list(set(hashes)))
+
+        # Embed each missing text once, even if it repeats within the batch
+        missing: Dict[str, str] = {}
+        for key, text in zip(hashes, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+        if missing:
+            start = time.perf_counter()
+            computed = self.embeddings.embed_documents(list(missing.values()))
+            elapsed = time.perf_counter() - start
+            self.store.put(list(missing.keys()), computed)
+            found.update(zip(missing.keys(), (np.asarray(vector, dtype=np.float32) for vector in computed)))
+            self._seconds_per_document = elapsed / len(missing)
+
+        hits = len(texts) - len(missing)
+        with self._lock:
+            self.counters["document_hits"] += hits
+            self.counters["document_misses"] += len(missing)
+            self.time_saved += hits * self._seconds_per_document
+        return [found[key].tolist() for key in hashes]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            counters = dict(self.counters)
+            entries = len(self._queries)
+        queries = counters["query_hits"] + counters["query_misses"]
+        documents = counters["document_hits"] + counters["document_misses"]
+        return {
+            "model_id": self.model_id,
+            "query_hit_ratio": counters["query_hits"] / queries if queries else 0.0,
+            "document_hit_ratio": counters["document_hits"] / documents if documents else 0.0,
+            "time_saved_seconds": self.time_saved,
+            "query_entries": entries,
+            "disk": self.store.stats(),
+            **counters
+        }
@@ -0,0 +1,189 @@
+import gc
+import os
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+DEFAULT_EMBEDDING_MODEL = "sentence-transformers/all-mpnet-base-v2"
+
+# "torch" runs the model through HuggingFaceEmbeddings, "onnx" runs the int8 export from export_onnx.py
+EMBEDDING_BACKENDS = ("torch", "onnx")
+
+
+def _rss_bytes() -> int:
+    """Return the resident set size of this process in bytes (0 if unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        # ru_maxrss is a peak value, reported in KB on Linux and bytes on macOS
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return usage if sys.platform == "darwin" else usage * 1024
+    except ImportError:
+        return 0
+
+
+class SharedEmbeddings(Embeddings):
+    """Thread-safe handle to an embedding model owned by the registry.
+
+    Forward passes are serialised with a lock: torch already spreads a single
+    pass over all cores, so running callers concurrently only oversubscribes
+    the CPU and multiplies activation memory.
+    """
+
+    def __init__(self, model_name: str, embeddings: Embeddings):
+        self.model_name = model_name
+        self._embeddings = embeddings
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with self._lock:
+            return self._embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        with self._lock:
+            return self._embeddings.embed_query(text)
+
+
+class EmbeddingRegistry:
+    """Process-wide registry that loads each embedding model once and shares it.
+
+    Unless EMBEDDING_CACHE=0, each model is wrapped in a CachedEmbeddings keyed
+    by model and backend; cache hits never wait on the forward-pass lock.
+    """
+
+    def __init__(self):
+        self._models: Dict[str, Embeddings] = {}
+        self._stats: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+
+    def get(self, model_name: str = DEFAULT_EMBEDDING_MODEL) -> Embeddings:
+        """Return the shared instance for a model, loading it on first use."""
+        model = self._models.get(model_name)
+        if model is not None:
+            return model
+
+        # One lock per model so loading mpnet never blocks callers of another model
+        with self._lock:
+            load_lock = self._load_locks.setdefault(model_name, threading.Lock())
+        with load_lock:
+            model = self._models.get(model_name)
+            if model is None:
+                model = self._load(model_name)
+        return model
+
+    @staticmethod
+    def _build(model_name: str, backend: str) -> Embeddings:
+        if backend == "onnx":
+            from onnx_embeddings import OnnxEmbeddings, default_onnx_dir
+
+            return OnnxEmbeddings(default_onnx_dir(model_name))
+        from langchain_huggingface import HuggingFaceEmbeddings
+
+        return HuggingFaceEmbeddings(model_name=model_name)
+
+    def _load(self, model_name: str) -> Embeddings:
+        backend = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+        if backend not in EMBEDDING_BACKENDS:
+            raise ValueError(f"Unknown EMBEDDING_BACKEND: {backend}")
+
+        rss_before = _rss_bytes()
+        start_time = time.time()
+        model = SharedEmbeddings(model_name, self._build(model_name, backend))
+        load_time = time.time() - start_time
+        if os.getenv("EMBEDDING_CACHE", "1") == "1":
+            from embedding_cache import DEFAULT_CACHE_DIR, CachedEmbeddings
+
+            model = CachedEmbeddings(
+                model,
+                model_id=f"{model_name}:{backend}",
+                cache_dir=os.getenv("EMBEDDING_CACHE_DIR", DEFAULT_CACHE_DIR),
+                max_query_entries=int(os.getenv("EMBEDDING_QUERY_CACHE_SIZE", 10000))
+            )
+        rss_delta = max(_rss_bytes() - rss_before, 0)
+
+        self._stats[model_name] = {
+            "backend": backend,
+            "load_time": load_time,
+            "rss_delta_bytes": rss_delta,
+            "loaded_at": time.time(),
+            "warmed_up": False
+        }
+        self._models[model_name] = model
+        print(f"Loaded embedding model {model_name} ({backend}) in {load_time:.2f}s (+{rss_delta / 2**20:.0f} MB RSS)")
+        return model
+
+    def register(self, model_name: str, embeddings: Embeddings) -> Embeddings:
+        """Install a ready-made embeddings object under a model name (e.g. a stand-in for benchmarks).
+
+        It is shared like a loaded model but not cached.
+        """
+        model = SharedEmbeddings(model_name, embeddings)
+        with self._lock:
+            self._stats[model_name] = {
+                "backend": type(embeddings).__name__,
+                "load_time": 0.0,
+                "rss_delta_bytes": 0,
+                "loaded_at": time.time(),
+                "warmed_up": False
+            }
+            self._models[model_name] = model
+        return model
+
+    def warm_up(self, model_names: Optional[List[str]] = None) -> Dict:
+        """Load the given models (default model if none) and run one dummy pass through each."""
+        for model_name in model_names or [DEFAULT_EMBEDDING_MODEL]:
+            model = self.get(model_name)
+            start_time = time.time()
+            model.embed_query("warm up")
+            self._stats[model_name]["warmed_up"] = True
+            self._stats[model_name]["warm_up_time"] = time.time() - start_time
+        return self.stats()
+
+    def unload(self, model_name: str = DEFAULT_EMBEDDING_MODEL) -> bool:
+        """Drop the registry's reference to a model.
+
+        Memory is only returned once every caller holding the instance lets go of it.
+        """
+        with self._lock:
+            model = self._models.pop(model_name, None)
+            self._stats.pop(model_name, None)
+        if model is None:
+            return False
+
+        del model
+        gc.collect()
+        print(f"Unloaded embedding model {model_name}")
+        return True
+
+    def is_loaded(self, model_name: str = DEFAULT_EMBEDDING_MODEL) -> bool:
+        return model_name in self._models
+
+    def stats(self) -> Dict:
+        """Report load time, memory and cache usage for every loaded model."""
+        models = {}
+        for name, stats in self._stats.items():
+            models[name] = dict(stats)
+            model = self._models.get(name)
+            if hasattr(model, "stats"):
+                models[name]["cache"] = model.stats()
+        return {
+            "models": models,
+            "rss_bytes": _rss_bytes()
+        }
+
+
+# Process-wide registry shared by RAGChat, DocumentProcessor and any other caller
+embedding_registry = EmbeddingRegistry()
+
+
+def get_embeddings(model_name: str = DEFAULT_EMBEDDING_MODEL) -> Embeddings:
+    """Return the process-wide shared instance of an embedding model."""
+    return embedding_registry.get(model_name)
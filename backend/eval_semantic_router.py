@@ -0,0 +1,112 @@
+"""Evaluate the semantic router on a labelled query set.
+
+Run from the backend directory (loads the shared embedding model):
+
+    python eval_semantic_router.py [--min-score 0.25] [--margin 0.0]
+
+Reports routing accuracy, retrieval-decision accuracy and how many retrieval
+calls the router saves compared with the keyword-only trigger it replaces.
+"""
+import argparse
+import time
+
+from embedding_registry import get_embeddings
+from keyword_matcher import contains_insurance_keywords, insurance_keyword_matcher
+from semantic_router import DEFAULT_RETRIEVAL_ROUTES, SemanticRouter
+
+# (query, expected route); none of these appear among the router's exemplars
+LABELLED_QUERIES = [
+    ("LIC surrender value", "insurance"),
+    ("how to claim maxlife policy", "insurance"),
+    ("What happens to my money if I stop paying for my cover?", "insurance"),
+    ("My father passed away, how does the family get the payout?", "insurance"),
+    ("Is it worth buying protection for my family's future income?", "insurance"),
+    ("How much will I receive when my plan completes 20 years?", "insurance"),
+    ("can I cancel the plan within 15 days of buying", "insurance"),
+    ("What is ULIP and how does the fund value grow?", "insurance"),
+    ("Which medical expenses are reimbursed under my mediclaim?", "insurance"),
+    ("How do I revive a lapsed LIC Jeevan Anand policy", "insurance"),
+    ("best term plan for a 30 year old smoker", "insurance"),
+    ("who should I name as beneficiary", "insurance"),
+    ("what is the premium for 1 crore cover", "insurance"),
+    ("does the accidental rider pay for disability", "insurance"),
+    ("how do I update the address on my aadhaar card", "government"),
+    ("steps to get a passport in india", "government"),
+    ("I lost my voter card, how do I get a duplicate?", "government"),
+    ("Am I eligible for the PM Awas Yojana housing scheme?", "government"),
+    ("how to apply for birth certificate online", "government"),
+    ("What is the fee for renewing a driving license?", "government"),
+    ("Where do I check the status of my ration card application?", "government"),
+    ("How do I register my small business for GST?", "government"),
+    ("pension scheme for senior citizens from the state", "government"),
+    ("documents needed for domicile certificate", "government"),
+    ("book appointment for aadhaar biometric update", "government"),
+    ("hello there", "general"),
+    ("thanks a lot!", "general"),
+    ("can you help me", "general"),
+    ("tell me something funny", "general"),
+    ("what is 25 times 4", "general"),
+    ("Who won the cricket world cup in 2011?", "general"),
+    ("write an email to my manager asking for leave", "general"),
+    ("how do I make masala chai", "general"),
+    ("buy a pair of running shoes on amazon", "general"),
+    ("what's the time in new york", "general"),
+    ("explain photosynthesis simply", "general"),
+    ("recommend a movie for tonight", "general"),
+    ("ok", "general"),
+    ("good night", "general"),
+    ("translate good morning to tamil", "general"),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--min-score", type=float, default=0.25)
+    parser.add_argument("--margin", type=float, default=0.0)
+    args = parser.parse_args()
+
+    embeddings = get_embeddings()
+    router = SemanticRouter(embeddings, min_score=args.min_score, margin=args.margin)
+
+    queries = [query for query, _ in LABELLED_QUERIES]
+    vectors = embeddings.embed_documents(queries)
+
+    route_correct = 0
+    retrieval_correct = 0
+    keyword_correct = 0
+    router_retrievals = 0
+    keyword_retrievals = 0
+    routing_time = 0.0
+    errors = []
+
+    for (query, label), vector in zip(LABELLED_QUERIES, vectors):
+        start = time.perf_counter()
+        decision = router.route(vector, keyword_phrase=insurance_keyword_matcher.get().find_phrase(query))
+        routing_time += time.perf_counter() - start
+
+        should_retrieve = label in DEFAULT_RETRIEVAL_ROUTES
+        keyword_retrieve = contains_insurance_keywords(query)
+
+        route_correct += decision.route == label
+        retrieval_correct += decision.retrieve == should_retrieve
+        keyword_correct += keyword_retrieve == should_retrieve
+        router_retrievals += decision.retrieve
+        keyword_retrievals += keyword_retrieve
+        if decision.route != label or decision.retrieve != should_retrieve:
+            errors.append((query, label, decision))
+
+    total = len(LABELLED_QUERIES)
+    expected_retrievals = sum(label in DEFAULT_RETRIEVAL_ROUTES for _, label in LABELLED_QUERIES)
+    print(f"Queries: {total} ({expected_retrievals} need retrieval)")
+    print(f"Routing accuracy:            {route_correct / total:.1%}")
+    print(f"Retrieval decision accuracy: {retrieval_correct / total:.1%} (keyword trigger: {keyword_correct / total:.1%})")
+    print(f"Retrieval calls:             router {router_retrievals}, keyword trigger {keyword_retrievals}, "
+          f"saved {keyword_retrievals - router_retrievals}")
+    print(f"Mean routing time:           {routing_time / total * 1e6:.0f} us (excluding the shared query embedding)")
+    for query, label, decision in errors:
+        scores = ", ".join(f"{name} {score:.2f}" for name, score in decision.scores.items())
+        print(f"  MISROUTED {query!r}: expected {label}, got {decision.route} retrieve={decision.retrieve} ({scores})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import json
+import os
+import time
+from typing import Dict, Optional
+
+
+class ExplanationStore:
+    """Background explanations kept as one JSON file per turn in a shared directory.
+
+    Every worker process writes to and reads from the same directory, so
+    /explanations/<turn_id> can be answered by any worker, not only the one
+    that generated the explanation. Records older than ``ttl`` seconds are
+    treated as missing and removed; ``max_entries`` bounds the directory.
+    """
+
+    def __init__(self, directory: str, ttl: float = 3600.0, max_entries: int = 1024):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_entries = max_entries
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, turn_id: str) -> str:
+        return os.path.join(self.directory, f"{turn_id}.json")
+
+    def put(self, turn_id: str, record: Dict):
+        # Atomic replace: other workers may be reading the record while it is written
+        path = self._path(turn_id)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(record, f)
+        os.replace(temp_path, path)
+
+    def get(self, turn_id: str) -> Optional[Dict]:
+        """Return the record for a turn, or None if unknown or expired."""
+        if not turn_id.isalnum():
+            return None
+        path = self._path(turn_id)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl:
+                os.remove(path)
+                return None
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def evict(self):
+        """Drop expired records, then the oldest ones beyond max_entries."""
+        now = time.time()
+        records = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                records.append((os.path.getmtime(path), path))
+            except OSError:
+                continue
+        records.sort()
+        excess = max(len(records) - self.max_entries, 0)
+        for index, (modified, path) in enumerate(records):
+            if index < excess or now - modified > self.ttl:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
@@ -0,0 +1,108 @@
+"""Export the embedding model to ONNX and quantize it to int8 for onnxruntime.
+
+Run from the backend directory (needs torch and transformers, which the
+torch backend already uses):
+
+    python export_onnx.py [--model sentence-transformers/all-mpnet-base-v2] [--output ./models/...]
+
+Writes model.onnx, model_quantized.onnx and tokenizer.json, then checks that
+the quantized embeddings are within COSINE_TOLERANCE of the PyTorch ones on
+a sample of sentences. Serve the result with EMBEDDING_BACKEND=onnx.
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+
+from embedding_registry import DEFAULT_EMBEDDING_MODEL
+from onnx_embeddings import COSINE_TOLERANCE, OnnxEmbeddings, default_onnx_dir
+
+SAMPLE_TEXTS = [
+    "LIC surrender value",
+    "How do I claim the death benefit of my father's term insurance policy?",
+    "Premiums paid for life insurance qualify for deduction under section 80C.",
+    "The policy lapses if the premium is not paid within the grace period of 30 days.",
+    "how to update address on aadhaar card",
+    "hello",
+    "A unit linked insurance plan invests part of the premium in market-linked funds. " * 20,
+]
+
+
+def export(model_name: str, output_dir: str, opset: int):
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    os.makedirs(output_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name).eval()
+    # Writes tokenizer.json, which OnnxEmbeddings loads with the tokenizers library
+    tokenizer.save_pretrained(output_dir)
+
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    model_path = os.path.join(output_dir, "model.onnx")
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            model_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+            do_constant_folding=True
+        )
+    print(f"Exported {model_name} to {model_path}")
+    return model_path
+
+
+def quantize(model_path: str) -> str:
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantized_path = os.path.join(os.path.dirname(model_path), "model_quantized.onnx")
+    # Dynamic quantization: int8 weights, activations quantized on the fly per batch
+    quantize_dynamic(model_path, quantized_path, weight_type=QuantType.QInt8)
+    print(f"Quantized model written to {quantized_path} "
+          f"({os.path.getsize(model_path) / 2**20:.0f} MB -> {os.path.getsize(quantized_path) / 2**20:.0f} MB)")
+    return quantized_path
+
+
+def verify(model_name: str, output_dir: str) -> float:
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    reference = np.asarray(HuggingFaceEmbeddings(model_name=model_name).embed_documents(SAMPLE_TEXTS))
+    reference /= np.linalg.norm(reference, axis=1, keepdims=True)
+
+    worst = 1.0
+    for quantized in (False, True):
+        vectors = np.asarray(OnnxEmbeddings(output_dir, quantized=quantized).embed_documents(SAMPLE_TEXTS))
+        cosines = (vectors * reference).sum(axis=1)
+        label = "int8" if quantized else "fp32"
+        print(f"{label}: cosine to torch min {cosines.min():.5f}, mean {cosines.mean():.5f}")
+        worst = min(worst, float(cosines.min()))
+    return worst
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=DEFAULT_EMBEDDING_MODEL)
+    parser.add_argument("--output", default=None, help="Defaults to ONNX_MODEL_ROOT/<model>-onnx")
+    parser.add_argument("--opset", type=int, default=17)
+    args = parser.parse_args()
+
+    output_dir = args.output or default_onnx_dir(args.model)
+    quantize(export(args.model, output_dir, args.opset))
+
+    worst = verify(args.model, output_dir)
+    if worst < COSINE_TOLERANCE:
+        print(f"FAILED: minimum cosine {worst:.5f} is below the tolerance of {COSINE_TOLERANCE}")
+        sys.exit(1)
+    print(f"OK: all embeddings within cosine {COSINE_TOLERANCE} of the torch backend")
+
+
+if __name__ == "__main__":
+    main()
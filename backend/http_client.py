@@ -0,0 +1,125 @@
+import asyncio
+import random
+import weakref
+from typing import Dict, Optional
+
+import httpx
+
+# Statuses worth retrying: rate limiting and transient upstream failures
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class AsyncHTTPClient:
+    """Shared async HTTP layer for the external APIs.
+
+    - one keep-alive connection pool per host (``httpx.AsyncClient``), created
+      lazily for each event loop, since asyncio connections cannot cross loops;
+    - a per-call timeout with a client-wide default;
+    - bounded retries on transport errors and retryable statuses, with
+      exponential backoff and full jitter (``Retry-After`` is honoured, capped);
+    - a semaphore capping concurrent in-flight requests per event loop; it is
+      released during retry backoff so sleeping retries do not hold slots.
+
+    Under a long-lived event loop (the ASGI serving mode) the pools are reused
+    across requests. When every request gets a fresh loop, pools only live as
+    long as that request.
+    """
+
+    def __init__(self, timeout: float = 10.0, max_retries: int = 2, backoff_base: float = 0.25,
+                 backoff_max: float = 4.0, max_connections_per_host: int = 20,
+                 max_keepalive_per_host: int = 10, keepalive_expiry: float = 30.0, max_concurrency: int = 64):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.limits = httpx.Limits(
+            max_connections=max_connections_per_host,
+            max_keepalive_connections=max_keepalive_per_host,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.max_concurrency = max_concurrency
+
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, httpx.AsyncClient]]" = \
+            weakref.WeakKeyDictionary()
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = \
+            weakref.WeakKeyDictionary()
+        self.counters = {"requests": 0, "retries": 0, "failures": 0, "pools_created": 0}
+
+    def _client_for(self, url: str) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        origin = httpx.URL(url)
+        host_key = f"{origin.scheme}://{origin.host}:{origin.port or ''}"
+
+        clients = self._clients.setdefault(loop, {})
+        client = clients.get(host_key)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(limits=self.limits, timeout=self.timeout)
+            clients[host_key] = client
+            self.counters["pools_created"] += 1
+        return client
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphores[loop] = semaphore
+        return semaphore
+
+    def _backoff(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        if response is not None and "retry-after" in response.headers:
+            try:
+                return min(float(response.headers["retry-after"]), self.backoff_max)
+            except ValueError:
+                pass
+        # Full jitter keeps retrying clients from synchronising
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def request(self, method: str, url: str, timeout: float = None, retries: int = None,
+                      **kwargs) -> httpx.Response:
+        """Send a request with pooling, timeout, retries and the concurrency cap applied."""
+        retries = self.max_retries if retries is None else retries
+        client = self._client_for(url)
+
+        semaphore = self._semaphore()
+        for attempt in range(retries + 1):
+            self.counters["requests"] += 1
+            backoff = None
+            # The slot is only held for the call itself, never while backing off
+            async with semaphore:
+                try:
+                    response = await client.request(
+                        method, url, timeout=timeout if timeout is not None else self.timeout, **kwargs
+                    )
+                except httpx.TransportError:
+                    if attempt >= retries:
+                        self.counters["failures"] += 1
+                        raise
+                    backoff = self._backoff(attempt)
+                else:
+                    if response.status_code not in RETRY_STATUSES or attempt >= retries:
+                        return response
+                    backoff = self._backoff(attempt, response)
+
+            self.counters["retries"] += 1
+            await asyncio.sleep(backoff)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def aclose(self):
+        """Close the pools belonging to the running event loop."""
+        clients = self._clients.pop(asyncio.get_running_loop(), {})
+        for client in clients.values():
+            await client.aclose()
+
+    def stats(self) -> Dict:
+        return {
+            **self.counters,
+            "event_loops": len(self._clients),
+            "pools": sum(len(clients) for clients in self._clients.values())
+        }
+
@@ -0,0 +1,271 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: only the in-process lock applies
+    fcntl = None
+
+MANIFEST_FILE_NAME = "ingest_manifest.json"
+
+
+def file_sha256(file_path: str, block_size: int = 1 << 20) -> str:
+    """Hash a file in fixed-size blocks so large PDFs are never read into memory at once."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for block in iter(lambda: file.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_id(text: str) -> str:
+    """Content-derived chunk id: chunks whose text only differs in whitespace share an id."""
+    normalized = re.sub(r"\s+", " ", text).strip()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class IngestReport:
+    """What an ingestion run added, skipped and removed."""
+    files_added: List[str] = field(default_factory=list)
+    files_updated: List[str] = field(default_factory=list)
+    files_skipped: List[str] = field(default_factory=list)
+    files_removed: List[str] = field(default_factory=list)
+    chunks_added: int = 0
+    chunks_unchanged: int = 0
+    chunks_deduplicated: int = 0
+    chunks_removed: int = 0
+
+    def merge(self, other: "IngestReport") -> "IngestReport":
+        self.files_added.extend(other.files_added)
+        self.files_updated.extend(other.files_updated)
+        self.files_skipped.extend(other.files_skipped)
+        self.files_removed.extend(other.files_removed)
+        self.chunks_added += other.chunks_added
+        self.chunks_unchanged += other.chunks_unchanged
+        self.chunks_deduplicated += other.chunks_deduplicated
+        self.chunks_removed += other.chunks_removed
+        return self
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+    def summary(self) -> str:
+        return (
+            f"{len(self.files_added)} files added, {len(self.files_updated)} updated, "
+            f"{len(self.files_skipped)} skipped, {len(self.files_removed)} removed; "
+            f"{self.chunks_added} chunks added, {self.chunks_unchanged} unchanged, "
+            f"{self.chunks_deduplicated} deduplicated, {self.chunks_removed} removed"
+        )
+
+
+class FileUpdate:
+    """Tracks the chunks of one file while it is being (re-)ingested."""
+
+    def __init__(self, manifest: "IngestManifest", source_key: str, digest: str, report: IngestReport,
+                 file_name: str = None):
+        self.manifest = manifest
+        self.source_key = source_key
+        self.file_name = file_name or os.path.basename(source_key)
+        self.digest = digest
+        self.report = report
+        self.is_update = source_key in manifest.files
+        previous = manifest.files.get(source_key, {})
+        self.previous_ids: Set[str] = set(previous.get("chunks", []))
+        self.chunk_ids: List[str] = []
+        # Pages of every chunk in this file, so a shared chunk can be re-attributed to it later
+        self.pages: Dict[str, List[int]] = {}
+        self._seen: Set[str] = set()
+
+    def add_chunk(self, text: str, metadata: Dict = None) -> Optional[str]:
+        """Register a chunk; return its id if it has to be written to the store, else None."""
+        cid = chunk_id(text)
+        if cid in self._seen:
+            self.report.chunks_deduplicated += 1
+            return None
+        self._seen.add(cid)
+        self.chunk_ids.append(cid)
+        if metadata and "page_start" in metadata:
+            self.pages[cid] = [metadata["page_start"], metadata.get("page_end", metadata["page_start"])]
+
+        if cid in self.previous_ids:
+            # Already stored for this file by the previous version
+            self.report.chunks_unchanged += 1
+            return None
+
+        refs = self.manifest.chunks.get(cid, 0)
+        self.manifest.chunks[cid] = refs + 1
+        if refs:
+            # Same text already stored for another file
+            self.report.chunks_deduplicated += 1
+            return None
+
+        self.report.chunks_added += 1
+        return cid
+
+
+class ManifestLock:
+    """Re-entrant lock held by whoever writes to a vector store directory.
+
+    A thread lock serialises writers within a process and an flock on a file
+    next to the manifest serialises them across processes (uvicorn workers and
+    offline database_create.py runs). The manifest is reloaded from disk each
+    time the lock is first taken, so another process's changes are never
+    overwritten.
+    """
+
+    def __init__(self, manifest: "IngestManifest"):
+        self.manifest = manifest
+        self.path = manifest.path + ".lock"
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._file = None
+
+    def __enter__(self):
+        self._lock.acquire()
+        if self._depth == 0:
+            try:
+                if fcntl is not None:
+                    os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                    self._file = open(self.path, "a")
+                    fcntl.flock(self._file, fcntl.LOCK_EX)
+                self.manifest.load()
+            except Exception:
+                self._unlock_file()
+                self._lock.release()
+                raise
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc):
+        self._depth -= 1
+        if self._depth == 0:
+            self._unlock_file()
+        self._lock.release()
+
+    def _unlock_file(self):
+        if self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+
+
+class IngestManifest:
+    """JSON manifest of file hashes and chunk hashes stored next to the vector store.
+
+    Chunk ids are content hashes and double as Chroma ids, so a chunk shared by
+    several files is stored once and reference-counted here. A shared chunk's
+    stored metadata cites the file that wrote it; when that file drops the chunk
+    while others still reference it, finish_file and remove_file return new
+    metadata citing one of them. Chunks written before the manifest existed
+    carry random ids and are not deduplicated.
+    """
+
+    def __init__(self, persist_directory: str):
+        self.path = os.path.join(persist_directory, MANIFEST_FILE_NAME)
+        self.files: Dict[str, Dict] = {}
+        self.chunks: Dict[str, int] = {}
+        # Held for the whole ingestion of a file; manifest state is not safe to interleave
+        self.lock = ManifestLock(self)
+        self.load()
+
+    def load(self):
+        """(Re)load the manifest from disk, discarding any unsaved in-memory changes."""
+        data = {}
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                data = json.load(f)
+        self.files = data.get("files", {})
+        self.chunks = data.get("chunks", {})
+
+    def save(self):
+        """Write the manifest atomically so a crash never leaves a truncated file."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, 'w') as f:
+            json.dump({"files": self.files, "chunks": self.chunks}, f)
+        os.replace(temp_path, self.path)
+
+    def is_unchanged(self, source_key: str, digest: str) -> bool:
+        return self.files.get(source_key, {}).get("sha256") == digest
+
+    def begin_file(self, source_key: str, digest: str, report: IngestReport,
+                   file_name: str = None) -> Optional[FileUpdate]:
+        """Start (re-)ingesting a file, or record a skip and return None if it is unchanged.
+
+        The file is only reported as added or updated once finish_file succeeds.
+        """
+        if self.is_unchanged(source_key, digest):
+            report.files_skipped.append(source_key)
+            return None
+        return FileUpdate(self, source_key, digest, report, file_name)
+
+    def finish_file(self, update: FileUpdate) -> Tuple[List[str], Dict[str, Dict]]:
+        """Record the file's new chunk set.
+
+        Returns the chunk ids that are no longer referenced, and new metadata for
+        shared chunks that must stop citing this file.
+        """
+        stale = [cid for cid in update.previous_ids if cid not in update._seen]
+        self.files[update.source_key] = {
+            "sha256": update.digest,
+            "file_name": update.file_name,
+            "chunks": update.chunk_ids,
+            "pages": update.pages
+        }
+        (update.report.files_updated if update.is_update else update.report.files_added).append(update.source_key)
+        return self._release(stale, update.report)
+
+    def remove_file(self, source_key: str, report: IngestReport) -> Tuple[List[str], Dict[str, Dict]]:
+        """Forget a file; same return value as finish_file."""
+        entry = self.files.pop(source_key, None)
+        if entry is None:
+            return [], {}
+        report.files_removed.append(source_key)
+        return self._release(entry.get("chunks", []), report)
+
+    def _release(self, chunk_ids: List[str], report: IngestReport) -> Tuple[List[str], Dict[str, Dict]]:
+        removed, still_shared = [], set()
+        for cid in chunk_ids:
+            refs = self.chunks.get(cid, 0) - 1
+            if refs > 0:
+                self.chunks[cid] = refs
+                still_shared.add(cid)
+            else:
+                self.chunks.pop(cid, None)
+                removed.append(cid)
+        report.chunks_removed += len(removed)
+        return removed, self._citations(still_shared)
+
+    def _citations(self, chunk_ids: Set[str]) -> Dict[str, Dict]:
+        """Metadata citing a file that still contains each chunk."""
+        citations = {}
+        for source_key, entry in self.files.items():
+            if not chunk_ids:
+                break
+            for cid in chunk_ids.intersection(entry.get("chunks", [])):
+                metadata = {"source": source_key, "file_name": entry.get("file_name") or os.path.basename(source_key)}
+                pages = entry.get("pages", {}).get(cid)
+                if pages:
+                    metadata["page_start"], metadata["page_end"] = pages
+                citations[cid] = metadata
+            chunk_ids = chunk_ids - citations.keys()
+        return citations
+
+
+_manifests: Dict[str, IngestManifest] = {}
+_manifests_lock = threading.Lock()
+
+
+def get_manifest(persist_directory: str) -> IngestManifest:
+    """Return the process-wide manifest for a vector store directory."""
+    key = os.path.abspath(persist_directory)
+    with _manifests_lock:
+        if key not in _manifests:
+            _manifests[key] = IngestManifest(persist_directory)
+        return _manifests[key]
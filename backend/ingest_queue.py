@@ -0,0 +1,243 @@
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
+
+from ingest_manifest import get_manifest
+
+if TYPE_CHECKING:
+    # database_create pulls in the PDF and langchain stack; only needed once a queue is built
+    from database_create import DocumentProcessor
+
+JOB_FILE_NAME = "job.json"
+
+
+@dataclass
+class IngestJob:
+    """State of one queued PDF upload, as reported by /jobs/<id>."""
+    job_id: str
+    file_name: str
+    file_path: str
+    source_key: str = None
+    replace: bool = False
+    status: str = "queued"
+    pages_processed: int = 0
+    chunks_processed: int = 0
+    response: str = ""
+    error: str = None
+    # Set when a different document already holds source_key; resubmit with replace to update it
+    conflict: bool = False
+    report: Dict = None
+    created_at: float = field(default_factory=time.time)
+    started_at: float = None
+    finished_at: float = None
+
+    def to_dict(self) -> Dict:
+        return {
+            "job_id": self.job_id,
+            "file_name": self.file_name,
+            "status": self.status,
+            "pages_processed": self.pages_processed,
+            "chunks_processed": self.chunks_processed,
+            "response": self.response,
+            "error": self.error,
+            "conflict": self.conflict,
+            "report": self.report,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+
+
+class IngestionQueue:
+    """Background ingestion with a single writer across all worker processes.
+
+    Uploads are spooled to a directory shared by every worker, one
+    sub-directory and job.json per job, so /jobs/<id> can be answered by any
+    worker. Each worker runs a thread that picks up queued jobs, but a job is
+    only claimed and applied while holding the vector store's manifest lock,
+    which is a file lock; so exactly one process writes at a time, including
+    offline database_create.py runs. Before writing, `prepare` is called so
+    the writer can reopen a vector store another process has changed.
+    """
+
+    def __init__(self, processor: "DocumentProcessor", get_vector_store: Callable[[], object], spool_dir: str,
+                 batch_size: int = 64, max_jobs_kept: int = 500, poll_interval: float = 1.0,
+                 prepare: Callable[[], None] = None):
+        self.processor = processor
+        self.get_vector_store = get_vector_store
+        self.spool_dir = spool_dir
+        self.batch_size = batch_size
+        self.max_jobs_kept = max_jobs_kept
+        self.poll_interval = poll_interval
+        self.prepare = prepare
+        self.manifest = get_manifest(processor.persist_directory)
+        os.makedirs(spool_dir, exist_ok=True)
+
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._listeners: List[Callable[[IngestJob], None]] = []
+
+    def add_listener(self, callback: Callable[[IngestJob], None]):
+        """Call `callback(job)` on the writer thread after a job may have changed the vector store."""
+        self._listeners.append(callback)
+
+    def start(self):
+        """Start this worker's ingestion thread; it also picks up jobs spooled by other workers."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="ingest-writer", daemon=True)
+                self._thread.start()
+
+    def submit(self, file_path: str, file_name: str, temp_dir: str = None, source_key: str = None,
+               replace: bool = False) -> IngestJob:
+        """Spool a saved PDF for ingestion and return its job immediately.
+
+        The file is moved into the spool. source_key identifies the document in
+        the manifest (defaults to file_name). A different document already
+        stored under the same key is only replaced when `replace` is set;
+        otherwise the job fails.
+        """
+        job_id = uuid.uuid4().hex
+        job_dir = os.path.join(self.spool_dir, job_id)
+        os.makedirs(job_dir)
+        spooled_path = os.path.join(job_dir, os.path.basename(file_path))
+        shutil.move(file_path, spooled_path)
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+        job = IngestJob(job_id=job_id, file_name=file_name, file_path=spooled_path,
+                        source_key=source_key or file_name, replace=replace)
+        self._save(job)
+        self.start()
+        self._wake.set()
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestJob]:
+        if not job_id.isalnum():
+            return None
+        return self._load(os.path.join(self.spool_dir, job_id))
+
+    def stats(self) -> Dict:
+        statuses = [job.status for job in self._jobs()]
+        return {
+            "queued": statuses.count("queued"),
+            "running": statuses.count("running"),
+            "done": statuses.count("done"),
+            "failed": statuses.count("failed")
+        }
+
+    def _job_path(self, job: IngestJob) -> str:
+        return os.path.join(self.spool_dir, job.job_id, JOB_FILE_NAME)
+
+    def _save(self, job: IngestJob):
+        # Atomic replace: other workers may be reading the file for /jobs/<id>
+        path = self._job_path(job)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(asdict(job), f)
+        os.replace(temp_path, path)
+
+    def _load(self, job_dir: str) -> Optional[IngestJob]:
+        try:
+            with open(os.path.join(job_dir, JOB_FILE_NAME)) as f:
+                return IngestJob(**json.load(f))
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def _jobs(self) -> List[IngestJob]:
+        jobs = []
+        for name in os.listdir(self.spool_dir):
+            job = self._load(os.path.join(self.spool_dir, name))
+            if job is not None:
+                jobs.append(job)
+        return sorted(jobs, key=lambda job: job.created_at)
+
+    def _evict_finished(self, jobs: List[IngestJob]):
+        # Keep the spool bounded; only finished jobs are ever dropped, oldest first
+        finished = [job for job in jobs if job.status in ("done", "failed")]
+        for job in finished[:max(len(jobs) - self.max_jobs_kept, 0)]:
+            shutil.rmtree(os.path.join(self.spool_dir, job.job_id), ignore_errors=True)
+
+    def _run(self):
+        while True:
+            try:
+                pending = [job for job in self._jobs() if job.status in ("queued", "running")]
+                for job in pending:
+                    self._claim_and_process(job.job_id)
+            except Exception as e:
+                print(f"Ingestion queue error: {e}")
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+    def _claim_and_process(self, job_id: str):
+        with self.manifest.lock:
+            job = self.get(job_id)
+            # Another worker may have finished it while we waited for the lock. A job still
+            # marked running while we hold the lock was left behind by a writer that died.
+            if job is None or job.status not in ("queued", "running"):
+                return
+            if self.prepare:
+                self.prepare()
+            self._process(job)
+            self._evict_finished(self._jobs())
+
+    def _process(self, job: IngestJob):
+        job.status = "running"
+        job.started_at = time.time()
+        self._save(job)
+
+        def on_progress(pages_read: int, chunks_written: int):
+            job.pages_processed = pages_read
+            job.chunks_processed = chunks_written
+            self._save(job)
+
+        try:
+            report = self.processor.ingest_pdf(
+                job.file_path,
+                source_key=job.source_key,
+                vector_store=self.get_vector_store(),
+                batch_size=self.batch_size,
+                progress_callback=on_progress,
+                replace=job.replace
+            )
+            job.report = report.to_dict()
+            job.chunks_processed = report.chunks_added
+            if report.files_skipped:
+                job.response = f"'{job.file_name}' is already in the database; nothing to update."
+            elif report.chunks_added or report.chunks_unchanged or report.chunks_deduplicated:
+                job.response = f"Successfully processed '{job.file_name}' and added {report.chunks_added} chunks to the existing database."
+            else:
+                job.response = f"Could not extract any text from '{job.file_name}'. Please make sure it's a valid PDF with text content."
+            job.status = "done"
+        except FileExistsError as e:
+            job.conflict = True
+            job.error = str(e)
+            job.response = (f"A different '{job.file_name}' was already uploaded in this session. "
+                            f"Upload it again with replace=true to update it.")
+            job.status = "failed"
+        except Exception as e:
+            print(f"Ingestion error for {job.file_name}: {e}")
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+            # A failed job may have written some batches before stopping; a conflict writes nothing
+            if job.status == "failed" and not job.conflict or job.report and (job.report["chunks_added"] or job.report["chunks_removed"]):
+                self._notify(job)
+            # The upload is not needed once the job has finished
+            if os.path.exists(job.file_path):
+                os.remove(job.file_path)
+            self._save(job)
+
+    def _notify(self, job: IngestJob):
+        for callback in self._listeners:
+            try:
+                callback(job)
+            except Exception as e:
+                print(f"Ingestion listener error: {e}")
@@ -0,0 +1,174 @@
+import math
+import re
+from functools import lru_cache
+from itertools import combinations
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from lazy_component import LazyComponent
+
+# Keyword list
+INSURANCE_KEYWORDS = {
+    "insurance", "policy", "premium", "claim", "coverage", "benefits", "payout", "sum assured",
+    "tenure", "riders", "maturity", "max life", "maxlife", "max life insurance", "maxlife insurance",
+    "maxlife claim", "maxlife premium", "maxlife policy", "maxlife customer care", "maxlife payout",
+    "maxlife fund value", "maxlife surrender value", "maxlife maturity", "LIC", "Life Insurance Corporation",
+    "LIC India", "LIC policy", "LIC premium", "LIC claim", "LIC surrender value", "LIC maturity",
+    "LIC pension", "LIC annuity", "LIC loan", "LIC Jeevan", "LIC term plan", "LIC endowment",
+    "LIC agent", "LIC customer care", "term plan", "endowment plan", "ULIP", "whole life insurance",
+    "pension plan", "child plan", "health insurance", "savings plan", "retirement plan", "investment plan",
+    "death claim", "maturity claim", "surrender policy", "lapse policy", "renew policy", "refund premium",
+    "settlement", "bonus calculation", "loan against policy", "free-look period", "tax benefits",
+    "section 80C", "income tax rebate", "nominee", "sum insured", "accidental cover", "health rider",
+    "wealth creation", "financial planning", "policy bond", "fingerprint"
+}
+
+# Same cut-off as the original fuzz.partial_ratio(word, keyword) > 80 check
+FUZZY_THRESHOLD = 80
+
+_TOKEN_PATTERN = re.compile(r"\S+")
+
+
+def allowed_deletions(length: int, threshold: int = FUZZY_THRESHOLD) -> int:
+    """Characters that may differ between two equal-length strings for their ratio to pass.
+
+    difflib's ratio is 2 * matches / (len(a) + len(b)); for equal lengths it exceeds
+    ``threshold`` (after fuzzywuzzy's rounding) while at most this many characters
+    per side are unmatched.
+    """
+    min_matches = math.ceil(length * (threshold + 0.5) / 100)
+    return max(length - min_matches, 0)
+
+
+def _deletions(text: str, max_deletions: int) -> Set[str]:
+    """All strings obtained from ``text`` by deleting up to ``max_deletions`` characters."""
+    variants = {text}
+    for count in range(1, min(max_deletions, len(text) - 1) + 1):
+        for positions in combinations(range(len(text)), count):
+            skip = set(positions)
+            variants.add("".join(c for i, c in enumerate(text) if i not in skip))
+    return variants
+
+
+class KeywordMatcher:
+    """Keyword matcher compiled once, answering queries in time linear in the query.
+
+    Three indexes are built up front:
+
+    - a phrase table over keyword token sequences, so multi-word entries such as
+      "sum assured" match directly;
+    - a deletion-neighbourhood index over every window of every keyword, which
+      finds query words that are within a bounded number of edits of part of a
+      keyword (the ``partial_ratio`` case where the word is the shorter string);
+    - a deletion-neighbourhood index over whole keywords, for words that contain
+      a keyword (the case where the keyword is the shorter string).
+
+    A lookup generates the bounded deletion set of each query word and probes
+    the indexes, so its cost depends on the query length, not on the number of
+    keywords. Words longer than ``max_fuzzy_length`` only take the exact paths;
+    ``max_fuzzy_length=0`` builds the phrase table alone.
+    """
+
+    def __init__(self, keywords: Iterable[str], threshold: int = FUZZY_THRESHOLD, max_fuzzy_length: int = 16):
+        self.threshold = threshold
+        self.max_fuzzy_length = max_fuzzy_length
+        self.keywords = sorted({keyword.lower() for keyword in keywords})
+
+        self.phrases: Set[Tuple[str, ...]] = {tuple(keyword.split()) for keyword in self.keywords}
+        self.max_phrase_length = max(len(phrase) for phrase in self.phrases)
+
+        # (length, deletion variant) pairs for keyword windows and whole keywords
+        self.window_index: Set[Tuple[int, str]] = set()
+        self.keyword_index: Set[Tuple[int, str]] = set()
+        self.keyword_lengths = sorted({len(keyword) for keyword in self.keywords})
+
+        for keyword in self.keywords:
+            for length in range(1, min(len(keyword), max_fuzzy_length) + 1):
+                budget = allowed_deletions(length, threshold)
+                for start in range(len(keyword) - length + 1):
+                    window = keyword[start:start + length]
+                    self.window_index.update((length, variant) for variant in _deletions(window, budget))
+            if len(keyword) <= max_fuzzy_length:
+                budget = allowed_deletions(len(keyword), threshold)
+                self.keyword_index.update((len(keyword), variant) for variant in _deletions(keyword, budget))
+
+        self._word_matches = lru_cache(maxsize=8192)(self._match_word)
+
+    def _match_word(self, word: str) -> bool:
+        """Whether one word passes the fuzzy check against any keyword."""
+        length = len(word)
+        if length == 0 or length > self.max_fuzzy_length:
+            return False
+
+        # Word is the shorter string: compare against keyword windows of the same length
+        budget = allowed_deletions(length, self.threshold)
+        if any((length, variant) in self.window_index for variant in _deletions(word, budget)):
+            return True
+
+        # Keyword is the shorter string: compare every window of the word with whole keywords
+        for keyword_length in self.keyword_lengths:
+            if keyword_length >= length:
+                break
+            budget = allowed_deletions(keyword_length, self.threshold)
+            for start in range(length - keyword_length + 1):
+                window = word[start:start + keyword_length]
+                if any((keyword_length, variant) in self.keyword_index for variant in _deletions(window, budget)):
+                    return True
+        return False
+
+    def find_phrase(self, query: str) -> Optional[str]:
+        """Return the first keyword phrase (single or multi-word) occurring in the query."""
+        words = [word.strip(".,!?;:()[]\"'") for word in query.lower().split()]
+        for start in range(len(words)):
+            for size in range(1, min(self.max_phrase_length, len(words) - start) + 1):
+                candidate = tuple(words[start:start + size])
+                if candidate in self.phrases:
+                    return " ".join(candidate)
+        return None
+
+    def matches(self, query: str) -> bool:
+        """Check if the query contains a keyword exactly or within the fuzzy threshold."""
+        if self.find_phrase(query):
+            return True
+        return any(self._word_matches(word) for word in _TOKEN_PATTERN.findall(query.lower()))
+
+    def stats(self) -> Dict:
+        return {
+            "keywords": len(self.keywords),
+            "window_index_size": len(self.window_index),
+            "keyword_index_size": len(self.keyword_index),
+            "word_cache": self._word_matches.cache_info()._asdict()
+        }
+
+
+def contains_insurance_keywords_fuzzy(query: str, keywords: Iterable[str] = INSURANCE_KEYWORDS) -> bool:
+    """Original per-query fuzzy scan, kept as the reference for bench_keyword_matcher.py."""
+    from fuzzywuzzy import fuzz
+
+    words = query.lower().split()
+
+    # Direct match
+    for word in words:
+        if word in keywords:
+            return True
+
+    # Fuzzy match (checks similarity)
+    for keyword in keywords:
+        if any(fuzz.partial_ratio(word, keyword) > 80 for word in words):
+            return True
+
+    return False
+
+
+# Full fuzzy matcher, compiled on first use (building the index takes about half a second). Only the
+# router evaluation and bench_keyword_matcher.py use it; the request path routes on exact phrases.
+insurance_keyword_matcher = LazyComponent("keyword_matcher", lambda: KeywordMatcher(INSURANCE_KEYWORDS))
+
+# Phrase table only, for the router's keyword override on every chat turn
+insurance_keyword_phrases = LazyComponent(
+    "keyword_phrases", lambda: KeywordMatcher(INSURANCE_KEYWORDS, max_fuzzy_length=0)
+)
+
+
+def contains_insurance_keywords(query: str) -> bool:
+    """Check if the query contains insurance-related keywords with fuzzy matching."""
+    return insurance_keyword_matcher.get().matches(query)
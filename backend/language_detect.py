@@ -0,0 +1,221 @@
+import math
+import re
+from collections import Counter
+from typing import Dict, Optional
+
+from keyword_matcher import INSURANCE_KEYWORDS
+
+# Unicode blocks of the Indic scripts we see in traffic
+SCRIPT_RANGES = [
+    (0x0900, 0x097F, "devanagari"),
+    (0x0980, 0x09FF, "bengali"),
+    (0x0A00, 0x0A7F, "gurmukhi"),
+    (0x0A80, 0x0AFF, "gujarati"),
+    (0x0B00, 0x0B7F, "oriya"),
+    (0x0B80, 0x0BFF, "tamil"),
+    (0x0C00, 0x0C7F, "telugu"),
+    (0x0C80, 0x0CFF, "kannada"),
+    (0x0D00, 0x0D7F, "malayalam"),
+]
+
+# Scripts used by exactly one language we support
+SCRIPT_LANGUAGES = {
+    "gurmukhi": "pa",
+    "gujarati": "gu",
+    "oriya": "or",
+    "tamil": "ta",
+    "telugu": "te",
+    "kannada": "kn",
+    "malayalam": "ml",
+}
+
+# Short samples of typical traffic per language. Character n-gram profiles are
+# built from them at import; "hi-Latn" (romanised Hindi) and the European
+# samples only exist to out-score English, they are never returned.
+LATIN_SAMPLES = {
+    "en": (
+        "hello hi hey good morning good evening thank you thanks please help me. what is the status of my "
+        "policy? how can i check my premium and when is the next payment due? i want to apply for a new "
+        "card. can you tell me how to pay the premium online? where can i find the surrender value of my "
+        "plan? which documents do i need to file a claim? is there a grace period if i miss a payment? "
+        "could you explain the maturity benefits? my name is on the policy bond but the nominee has "
+        "changed. does this plan cover accidental death? how long does the settlement take? yes, that "
+        "would be good. no, i have not received it yet. ok, what should i do now? why was my claim "
+        "rejected? who should i contact about this? they said the amount would be paid within a week."
+    ),
+    "hi-Latn": (
+        "namaste mera naam rahul hai. meri policy ka status kya hai? mujhe premium kaise bharna hai? "
+        "aap mujhe bataiye ki claim kaise karna hai. mera paisa kab milega? kya aap meri madad kar sakte "
+        "hain? mujhe nayi policy chahiye. premium kitna hai aur kab tak bharna hoga? theek hai, haan, "
+        "accha, dhanyavad. maine claim kiya tha lekin abhi tak kuch nahi hua. kyun meri policy band ho "
+        "gayi? kahan jana hoga? kripya mujhe jaldi batao. humne sab documents jama kar diye hain. yeh "
+        "plan mere bachchon ke liye accha hai kya? mujhe samajh nahi aa raha, thoda aur samjhaiye."
+    ),
+    "es": (
+        "hola buenos dias. cual es el estado de mi poliza? quiero saber cuando tengo que pagar la prima. "
+        "por favor, necesito ayuda con mi reclamo. que documentos necesito? gracias por su respuesta. "
+        "es posible cambiar el beneficiario de la poliza? los pagos se hacen cada mes en la cuenta."
+    ),
+    "fr": (
+        "bonjour, je voudrais savoir le statut de ma police. quand est-ce que je dois payer la prime? "
+        "est-ce que vous pouvez m'aider avec ma demande? quels documents faut-il envoyer? merci beaucoup. "
+        "les paiements sont faits chaque mois et je ne comprends pas pourquoi la demande est refusee."
+    ),
+    "de": (
+        "guten tag, ich moechte den status meiner police wissen. wann muss ich die praemie bezahlen? "
+        "koennen sie mir bitte mit meinem antrag helfen? welche unterlagen brauche ich? vielen dank. "
+        "das ist nicht richtig, die zahlung ist schon auf dem konto und der antrag wurde abgelehnt."
+    ),
+}
+
+DEVANAGARI_SAMPLES = {
+    "hi": (
+        "नमस्ते, मेरा नाम राहुल है। मेरी पॉलिसी का स्टेटस क्या है? मुझे प्रीमियम कैसे भरना है? आप मुझे "
+        "बताइए कि क्लेम कैसे करना है। मेरा पैसा कब मिलेगा? क्या आप मेरी मदद कर सकते हैं? मुझे नई "
+        "पॉलिसी चाहिए। प्रीमियम कितना है और कब तक भरना होगा? ठीक है, धन्यवाद। मैंने क्लेम किया था "
+        "लेकिन अभी तक कुछ नहीं हुआ। मेरी पॉलिसी बंद क्यों हो गई? यह योजना मेरे बच्चों के लिए अच्छी "
+        "है क्या? मुझे समझ में नहीं आ रहा है, थोड़ा और समझाइए। इसमें कौन से दस्तावेज़ लगते हैं?"
+    ),
+    "mr": (
+        "नमस्कार, माझे नाव राहुल आहे. माझ्या पॉलिसीची स्थिती काय आहे? मला प्रीमियम कसा भरायचा आहे? "
+        "तुम्ही मला सांगा की क्लेम कसा करायचा. माझे पैसे कधी मिळतील? तुम्ही मला मदत करू शकाल का? मला "
+        "नवीन पॉलिसी हवी आहे. प्रीमियम किती आहे आणि कधीपर्यंत भरायचा आहे? ठीक आहे, धन्यवाद. मी क्लेम "
+        "केला होता पण अजून काही झाले नाही. माझी पॉलिसी बंद का झाली? ही योजना माझ्या मुलांसाठी चांगली "
+        "आहे का? मला समजत नाही, थोडे अधिक समजावून सांगा. यासाठी कोणती कागदपत्रे लागतात? आम्ही वेळेवर भरले."
+    ),
+    "ne": (
+        "नमस्ते, मेरो नाम राहुल हो। मेरो पोलिसीको स्थिति के छ? मैले प्रिमियम कसरी तिर्ने हो? तपाईं मलाई "
+        "भन्नुहोस् कि दाबी कसरी गर्ने। मेरो पैसा कहिले पाइन्छ? के तपाईं मलाई मद्दत गर्न सक्नुहुन्छ? मलाई "
+        "नयाँ पोलिसी चाहिन्छ। प्रिमियम कति छ र कहिलेसम्म तिर्नुपर्छ? ठिक छ, धन्यवाद। मैले दाबी गरेको थिएँ "
+        "तर अहिलेसम्म केही भएन। मेरो पोलिसी किन बन्द भयो? यो योजना मेरा छोराछोरीका लागि राम्रो हुन्छ? "
+        "मैले बुझिनँ, अलि बढी बुझाउनुहोस्। यसका लागि कुन कागजात चाहिन्छन्? हामीले पनि समयमै तिरेका छौं।"
+    ),
+}
+
+NGRAM_SIZES = (1, 2, 3)
+
+# Mean log-probability per n-gram by which the best profile must beat the runner-up
+MIN_MARGIN = 0.15
+
+# Below this many n-grams a text is too short to score; the API decides
+MIN_NGRAMS = 6
+
+# Domain vocabulary appears untranslated in every language ("LIC surrender value"),
+# so it is left out of the scores; a query made only of it is English
+DOMAIN_WORDS = {word for keyword in INSURANCE_KEYWORDS for word in re.findall(r"[a-z]+", keyword.lower())}
+
+_LATIN_WORD = re.compile(r"[a-z]+")
+_DEVANAGARI_WORD = re.compile(r"[ऀ-ॿ]+")
+
+
+def _ngrams(words):
+    """Character n-grams of each word, padded with spaces so word edges count."""
+    for word in words:
+        padded = f" {word} "
+        for size in NGRAM_SIZES:
+            for start in range(len(padded) - size + 1):
+                yield padded[start:start + size]
+
+
+class NgramProfile:
+    """Add-one smoothed character n-gram frequencies of one language sample."""
+
+    def __init__(self, words):
+        self.counts = Counter(_ngrams(words))
+        self.total = sum(self.counts.values())
+        # Distinct n-grams across the profiles compared against this one; set by _build_profiles
+        self.vocabulary = len(self.counts)
+
+    def log_probability(self, ngram: str) -> float:
+        return math.log((self.counts.get(ngram, 0) + 1) / (self.total + self.vocabulary))
+
+
+def _build_profiles(samples: Dict[str, str], pattern: re.Pattern) -> Dict[str, NgramProfile]:
+    profiles = {language: NgramProfile(pattern.findall(text.lower())) for language, text in samples.items()}
+    vocabulary = len(set().union(*(profile.counts for profile in profiles.values())))
+    for profile in profiles.values():
+        profile.vocabulary = vocabulary
+    return profiles
+
+
+LATIN_PROFILES = _build_profiles(LATIN_SAMPLES, _LATIN_WORD)
+DEVANAGARI_PROFILES = _build_profiles(DEVANAGARI_SAMPLES, _DEVANAGARI_WORD)
+
+
+def score_ngrams(words, profiles: Dict[str, NgramProfile]) -> Optional[Dict[str, float]]:
+    """Mean log-probability per n-gram of the words under each profile, or None if too short."""
+    ngrams = list(_ngrams(words))
+    if len(ngrams) < MIN_NGRAMS:
+        return None
+    return {
+        language: sum(profile.log_probability(ngram) for ngram in ngrams) / len(ngrams)
+        for language, profile in profiles.items()
+    }
+
+
+def _best_language(words, profiles: Dict[str, NgramProfile]) -> Optional[str]:
+    scores = score_ngrams(words, profiles)
+    if scores is None:
+        return None
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    (best, best_score), (_, runner_up) = ranked[0], ranked[1]
+    return best if best_score - runner_up >= MIN_MARGIN else None
+
+
+def _detect_devanagari(text: str) -> Optional[str]:
+    return _best_language(_DEVANAGARI_WORD.findall(text), DEVANAGARI_PROFILES)
+
+
+def _detect_ascii(text: str) -> Optional[str]:
+    words = _LATIN_WORD.findall(text.lower())
+    if not words:
+        return None
+    other_words = [word for word in words if word not in DOMAIN_WORDS]
+    if not other_words:
+        return "en"
+    return "en" if _best_language(other_words, LATIN_PROFILES) == "en" else None
+
+
+def _script_of(char: str) -> Optional[str]:
+    code = ord(char)
+    for start, end, script in SCRIPT_RANGES:
+        if start <= code <= end:
+            return script
+    return None
+
+
+def detect_language_offline(text: str) -> Optional[str]:
+    """Detect the common cases locally from the script and character n-gram profiles.
+
+    Returns an ISO 639-1 code, or None when the text is ambiguous and the
+    caller should fall back to the translation API.
+    """
+    letters = [char for char in text if char.isalpha()]
+    if not letters:
+        return None
+
+    if text.isascii():
+        return _detect_ascii(text)
+
+    scripts = {}
+    for char in letters:
+        script = _script_of(char)
+        if script:
+            scripts[script] = scripts.get(script, 0) + 1
+    if not scripts:
+        # Accented Latin, Arabic, CJK, ...: leave it to the API
+        return None
+
+    script, count = max(scripts.items(), key=lambda item: item[1])
+    if count * 2 < len(letters):
+        # Mostly Latin with some Indic words mixed in
+        return None
+
+    if script in SCRIPT_LANGUAGES:
+        return SCRIPT_LANGUAGES[script]
+    if script == "bengali":
+        # ৰ and ৱ only occur in Assamese
+        return "as" if ("ৰ" in text or "ৱ" in text) else "bn"
+    if script == "devanagari":
+        return _detect_devanagari(text)
+    return None
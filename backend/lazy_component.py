@@ -0,0 +1,49 @@
+import threading
+import time
+from typing import Callable, Dict, Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class LazyComponent(Generic[T]):
+    """A process-wide object built on first use.
+
+    The factory runs once, on whichever thread asks first; concurrent callers
+    wait for it and then share the instance. If the factory raises, the error
+    is recorded and the next caller tries again. status() feeds /ready.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], T]):
+        self.name = name
+        self._factory = factory
+        self._instance: Optional[T] = None
+        self._lock = threading.Lock()
+        self.load_time: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def get(self) -> T:
+        if self._instance is not None:
+            return self._instance
+        with self._lock:
+            if self._instance is None:
+                start_time = time.time()
+                try:
+                    self._instance = self._factory()
+                except Exception as e:
+                    self.error = str(e)
+                    raise
+                self.load_time = time.time() - start_time
+                self.error = None
+                print(f"Loaded {self.name} in {self.load_time:.2f}s")
+        return self._instance
+
+    def peek(self) -> Optional[T]:
+        """Return the instance if it has been built, without building it."""
+        return self._instance
+
+    @property
+    def loaded(self) -> bool:
+        return self._instance is not None
+
+    def status(self) -> Dict:
+        return {"loaded": self.loaded, "load_time": self.load_time, "error": self.error}
@@ -0,0 +1,176 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Tuple
+
+_TOKEN = re.compile(r"\w+")
+
+# Words that match most chunks and only slow BM25 down
+STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "were", "be", "do", "does", "did", "i", "you", "we", "it", "my", "your",
+    "what", "which", "who", "how", "when", "where", "why", "can", "could", "will", "would", "should", "of", "to",
+    "in", "on", "for", "with", "from", "by", "at", "and", "or", "if", "me", "this", "that", "about", "please", "tell",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    rowid INTEGER PRIMARY KEY,
+    chunk_id TEXT UNIQUE NOT NULL,
+    text TEXT NOT NULL,
+    metadata TEXT
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5(
+    text, content='chunks', content_rowid='rowid', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS chunks_ai AFTER INSERT ON chunks BEGIN
+    INSERT INTO chunks_fts(rowid, text) VALUES (new.rowid, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS chunks_ad AFTER DELETE ON chunks BEGIN
+    INSERT INTO chunks_fts(chunks_fts, rowid, text) VALUES ('delete', old.rowid, old.text);
+END;
+CREATE VIRTUAL TABLE IF NOT EXISTS chunks_vocab USING fts5vocab(chunks_fts, 'row');
+"""
+
+
+def reciprocal_rank_fusion(rankings: Iterable[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """Fuse ranked id lists: each id scores the sum of 1 / (k + rank) over the lists it appears in."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, item_id in enumerate(ranking, start=1):
+            scores[item_id] = scores.get(item_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+class LexicalIndex:
+    """BM25 index over the ingested chunks, stored in SQLite FTS5 next to Chroma.
+
+    Rows are keyed by the same content-hash chunk ids as the vector store, so
+    the two indexes stay in step through ingestion's adds and deletes. Each
+    thread gets its own connection; with WAL, searches never wait on the
+    ingestion writer.
+
+    Query terms found in more than `max_df_ratio` of the chunks (and at least
+    `min_df_cutoff` of them) are left out: their IDF is close to zero, yet
+    scoring their posting lists dominates search time on a large corpus.
+    """
+
+    def __init__(self, persist_directory: str, file_name: str = "lexical_index.sqlite",
+                 max_df_ratio: float = 0.1, min_df_cutoff: int = 200):
+        os.makedirs(persist_directory, exist_ok=True)
+        self.path = os.path.join(persist_directory, file_name)
+        self.max_df_ratio = max_df_ratio
+        self.min_df_cutoff = min_df_cutoff
+        self._local = threading.local()
+        # Document frequencies per term, valid for the chunk count they were read at; shared by
+        # request threads and the ingestion writer, so only touched under _df_lock
+        self._df_cache: Dict[str, int] = {}
+        self._df_cache_total = -1
+        self._df_lock = threading.Lock()
+        with self._connection() as connection:
+            connection.executescript(_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def add(self, ids: List[str], texts: List[str], metadatas: List[Dict]):
+        # Ids are content hashes, so an existing id already has this text; only refresh its metadata
+        with self._connection() as connection:
+            connection.executemany(
+                "INSERT INTO chunks (chunk_id, text, metadata) VALUES (?, ?, ?) "
+                "ON CONFLICT(chunk_id) DO UPDATE SET metadata = excluded.metadata",
+                [(cid, text, json.dumps(metadata or {})) for cid, text, metadata in zip(ids, texts, metadatas)]
+            )
+
+    def update_metadata(self, metadatas: Dict[str, Dict]):
+        """Merge new metadata into existing chunks, keyed by chunk id."""
+        with self._connection() as connection:
+            connection.executemany(
+                "UPDATE chunks SET metadata = json_patch(metadata, ?) WHERE chunk_id = ?",
+                [(json.dumps(metadata), cid) for cid, metadata in metadatas.items()]
+            )
+
+    def delete(self, ids: List[str]):
+        with self._connection() as connection:
+            connection.executemany("DELETE FROM chunks WHERE chunk_id = ?", [(cid,) for cid in ids])
+
+    def count(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    @staticmethod
+    def query_terms(query: str) -> List[str]:
+        terms = []
+        for token in _TOKEN.findall(query.lower()):
+            if token not in STOPWORDS and token not in terms:
+                terms.append(token)
+        return terms
+
+    def _document_frequency(self, term: str, total: int) -> int:
+        with self._df_lock:
+            if total != self._df_cache_total:
+                self._df_cache = {}
+                self._df_cache_total = total
+            df = self._df_cache.get(term)
+        if df is None:
+            # Query outside the lock; a concurrent miss on the same term just reads it twice
+            row = self._connection().execute("SELECT doc FROM chunks_vocab WHERE term = ?", (term,)).fetchone()
+            df = row[0] if row else 0
+            with self._df_lock:
+                if total == self._df_cache_total:
+                    self._df_cache[term] = df
+        return df
+
+    def match_expression(self, query: str) -> str:
+        """Turn free text into an FTS5 OR-query of its selective terms."""
+        total = self.count()
+        cutoff = max(self.max_df_ratio * total, self.min_df_cutoff)
+        terms = [term for term in self.query_terms(query) if self._document_frequency(term, total) <= cutoff]
+        return " OR ".join(f'"{term}"' for term in terms)
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[str, str, Dict, float]]:
+        """Return up to k (chunk_id, text, metadata, bm25) rows, best match first."""
+        expression = self.match_expression(query)
+        if not expression:
+            # Only very common words: dense retrieval covers this query
+            return []
+        rows = self._connection().execute(
+            "SELECT chunks.chunk_id, chunks.text, chunks.metadata, bm25(chunks_fts) AS rank "
+            "FROM chunks_fts JOIN chunks ON chunks.rowid = chunks_fts.rowid "
+            "WHERE chunks_fts MATCH ? ORDER BY rank LIMIT ?",
+            (expression, k)
+        ).fetchall()
+        # SQLite's bm25() is negative, lower is better; report the usual positive score
+        return [(cid, text, json.loads(metadata or "{}"), -rank) for cid, text, metadata, rank in rows]
+
+    def backfill(self, collection, batch_size: int = 1000) -> int:
+        """Index chunks already in a Chroma collection; a no-op once both hold the same count."""
+        total = collection.count()
+        if self.count() >= total:
+            return 0
+        added = 0
+        for offset in range(0, total, batch_size):
+            batch = collection.get(include=["documents", "metadatas"], limit=batch_size, offset=offset)
+            self.add(batch["ids"], batch["documents"], batch["metadatas"])
+            added += len(batch["ids"])
+        print(f"Lexical index backfilled with {added} chunks")
+        return added
+
+
+_indexes: Dict[str, LexicalIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_lexical_index(persist_directory: str) -> LexicalIndex:
+    """Return the process-wide lexical index for a vector store directory."""
+    key = os.path.abspath(persist_directory)
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = LexicalIndex(persist_directory)
+        return _indexes[key]
@@ -2,38 +2,48 @@ import os
 import numpy as np
 import time
 import re
-from fuzzywuzzy import fuzz
-import torch
 import json
 from dotenv import load_dotenv
 from werkzeug.utils import secure_filename
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 from flask_bcrypt import Bcrypt
 from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity
 from pymongo import MongoClient
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_chroma import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
 from langchain_core.documents import Document
-from typing import List, Dict
-from transformers import AutoModel, AutoTokenizer
+from langchain_core.output_parsers import JsonOutputParser
 import requests
-from browser_use import Agent
-from browser_use.agent.service import Agent
-from browser_use.browser.browser import Browser, BrowserConfig, BrowserContextConfig
 import asyncio
+import threading
+import uuid
+from cachetools import TTLCache
 from datetime import datetime
-from langchain_groq import ChatGroq
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import JsonOutputParser
 import tempfile
-from database_create import DocumentProcessor
-from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
-from langchain_core.output_parsers import JsonOutputParser
-from langchain_core.prompts import ChatPromptTemplate
-from typing import List, Dict, Any, Tuple
+from explanation_store import ExplanationStore
+from embedding_registry import DEFAULT_EMBEDDING_MODEL, embedding_registry, get_embeddings
+from ingest_queue import IngestionQueue
+from keyword_matcher import insurance_keyword_phrases
+from semantic_router import SemanticRouter
+from language_detect import detect_language_offline
+from http_client import AsyncHTTPClient
+from translation import MarkdownDocument, SEGMENT_FORMAT
+from background_loop import background_loop
+from lazy_component import LazyComponent
+import stage_timing
+from stage_timing import stage
+from session_store import InMemorySessionStore, create_session_store
+from prompt_builder import PromptBuilder
+from answer_cache import SemanticAnswerCache, is_personalised
+from retrieval_cache import IndexVersion, RetrievalCache
+from lexical_index import get_lexical_index, reciprocal_rank_fusion
+from reranker import CrossEncoderReranker, DEFAULT_RERANK_MODEL
+from micro_batch import MicroBatchEmbedder
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+
+# Heavy subsystems (embedding model, vector store, LLM clients, browser
+# automation, MongoDB) are imported and built on first use, or by the optional
+# background warm-up, so a fresh worker serves /login without waiting on them.
 
 # Load environment variables
 load_dotenv()
@@ -47,10 +57,28 @@ bcrypt = Bcrypt(app)
 app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET')
 jwt = JWTManager(app)
 
+# Chroma store shared by retrieval, the lexical index and ingestion
+VECTOR_DB_DIR = os.getenv("VECTOR_DB_DIR", "./vector_db")
+
+@app.before_request
+def start_stage_timing():
+    stage_timing.start_request()
+    request.environ["bodhini.start_time"] = time.perf_counter()
+
+@app.after_request
+def add_server_timing(response):
+    # Per-stage durations for this request (embed, retrieve, llm, translate, ...), e.g. for bench_e2e.py
+    stages = stage_timing.current()
+    if stages is not None:
+        stages = dict(stages, total=time.perf_counter() - request.environ["bodhini.start_time"])
+        response.headers["Server-Timing"] = stage_timing.server_timing_header(stages)
+    return response
+
 # MongoDB Setup
-client = MongoClient(os.getenv('MONGO_URI'))
-db = client['Bodhini']
-users_collection = db['Users']
+mongo = LazyComponent("mongo", lambda: MongoClient(os.getenv('MONGO_URI'))['Bodhini'])
+
+def get_db():
+    return mongo.get()
 
 @app.route('/process-pdf', methods=['POST'])
 def process_pdf():
@@ -59,55 +87,46 @@ def process_pdf():
     
     file = request.files['pdf']
     session_id = request.form.get('session_id', 'default_session')
+    # Re-uploading a different PDF under the same name only replaces the old one when asked
+    replace = request.form.get('replace', 'false').lower() in ('1', 'true', 'yes')
     
     if file.filename == '':
         return jsonify({"error": "No selected file"}), 400
     
     if file and file.filename.endswith('.pdf'):
-        # Create a temporary file to save the uploaded PDF
+        # Save the upload; the ingestion worker removes it once the job finishes
         temp_dir = tempfile.mkdtemp()
         file_path = os.path.join(temp_dir, secure_filename(file.filename))
         file.save(file_path)
         
-        try:
-            # Initialize the document processor with the existing database path
-            processor = DocumentProcessor(persist_directory="./vector_db")
-            
-            # Process the PDF file
-            documents = processor.process_pdf(file_path)
-            
-            if documents:
-                # Load the existing vector store
-                vector_store = Chroma(
-                    persist_directory="./vector_db",
-                    embedding_function=processor.embeddings
-                )
-                
-                # Add the new documents to the existing vector store
-                vector_store.add_documents(documents)
-                
-                return jsonify({
-                    "response": f"Successfully processed '{file.filename}' and added {len(documents)} chunks to the existing database.",
-                    "chunks_processed": len(documents)
-                })
-            else:
-                return jsonify({
-                    "response": f"Could not extract any text from '{file.filename}'. Please make sure it's a valid PDF with text content.",
-                    "chunks_processed": 0
-                })
-                
-        except Exception as e:
-            return jsonify({"error": str(e)}), 500
-        finally:
-            # Clean up the temporary file
-            os.remove(file_path)
-            os.rmdir(temp_dir)
+        file_name = secure_filename(file.filename)
+        job = get_ingestion_queue().submit(
+            file_path, file_name, temp_dir=temp_dir,
+            source_key=f"uploads/{secure_filename(session_id)}/{file_name}", replace=replace
+        )
+        return jsonify({
+            "response": f"'{file.filename}' has been queued for processing.",
+            "job_id": job.job_id,
+            "status": job.status,
+            "status_url": f"/jobs/{job.job_id}"
+        }), 202
     
     return jsonify({"error": "Only PDF files are allowed"}), 400
 
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = get_ingestion_queue().get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job id"}), 404
+    return jsonify(job.to_dict()), 200
+
 @app.route('/automate-order', methods=['POST'])
 async def automate_order():
     try:
+        from browser_use import Agent
+        from browser_use.browser.browser import Browser, BrowserConfig, BrowserContextConfig
+        from langchain_google_genai import ChatGoogleGenerativeAI
+
         data = request.get_json()
         order_details = data.get('orderDetails', {})
         
@@ -223,6 +242,7 @@ def register():
     email = data.get('email')
     password = data.get('password')
 
+    users_collection = get_db()['Users']
     if users_collection.find_one({"email": email}):
         return jsonify({"message": "User already exists"}), 400
 
@@ -237,7 +257,7 @@ def login():
     email = data.get('email')
     password = data.get('password')
 
-    user = users_collection.find_one({"email": email})
+    user = get_db()['Users'].find_one({"email": email})
     if not user or not bcrypt.check_password_hash(user['password'], password):
         return jsonify({"message": "Invalid credentials"}), 400
 
@@ -250,39 +270,9 @@ def login():
 # print("GOOGLE_API_KEY:", os.getenv("GOOGLE_API_KEY"))
 # print("SARVAM_API_KEY:", os.getenv("SARVAM_API_KEY"))
 
-# Keyword list
-INSURANCE_KEYWORDS = {
-    "insurance", "policy", "premium", "claim", "coverage", "benefits", "payout", "sum assured",
-    "tenure", "riders", "maturity", "max life", "maxlife", "max life insurance", "maxlife insurance",
-    "maxlife claim", "maxlife premium", "maxlife policy", "maxlife customer care", "maxlife payout",
-    "maxlife fund value", "maxlife surrender value", "maxlife maturity", "LIC", "Life Insurance Corporation",
-    "LIC India", "LIC policy", "LIC premium", "LIC claim", "LIC surrender value", "LIC maturity",
-    "LIC pension", "LIC annuity", "LIC loan", "LIC Jeevan", "LIC term plan", "LIC endowment",
-    "LIC agent", "LIC customer care", "term plan", "endowment plan", "ULIP", "whole life insurance",
-    "pension plan", "child plan", "health insurance", "savings plan", "retirement plan", "investment plan",
-    "death claim", "maturity claim", "surrender policy", "lapse policy", "renew policy", "refund premium",
-    "settlement", "bonus calculation", "loan against policy", "free-look period", "tax benefits",
-    "section 80C", "income tax rebate", "nominee", "sum insured", "accidental cover", "health rider",
-    "wealth creation", "financial planning", "policy bond", "fingerprint"
-}
-
-def contains_insurance_keywords(query: str) -> bool:
-    """Check if the query contains insurance-related keywords with fuzzy matching."""
-    words = query.lower().split()
-    
-    # Direct match
-    for word in words:
-        if word in INSURANCE_KEYWORDS:
-            return True
-
-    # Fuzzy match (checks similarity)
-    for keyword in INSURANCE_KEYWORDS:
-        if any(fuzz.partial_ratio(word, keyword) > 80 for word in words):
-            return True
-            
-    return False
-
 class SpeechProcessor:
+    TRANSLATE_BATCH_LIMIT = 128
+
     def __init__(self):
         self.sarvam_api_key = os.getenv("SARVAM_API_KEY")
         self.google_api_key = os.getenv("GOOGLE_API_KEY")
@@ -290,58 +280,261 @@ class SpeechProcessor:
         if not self.sarvam_api_key or not self.google_api_key:
             raise ValueError("API keys are missing. Please set SARVAM_API_KEY and GOOGLE_API_KEY in .env file.")
 
-    def speech_to_text(self, audio_file,):
-        """Convert speech to text using Sarvam AI"""
-        url = "https://api.sarvam.ai/speech-to-text"
-        
-        payload = {
-            'model': 'saarika:v2',
-            'language_code': 'unknown',
-            'with_timesteps': 'false'
+        # Base URLs are overridable so the processor can run against local stub servers
+        self.sarvam_base_url = os.getenv("SARVAM_BASE_URL", "https://api.sarvam.ai").rstrip("/")
+        self.google_base_url = os.getenv("GOOGLE_TRANSLATE_BASE_URL", "https://translation.googleapis.com").rstrip("/")
+
+        # Pooled clients with timeouts; async handlers use the shared async client
+        self.timeout = float(os.getenv("EXTERNAL_API_TIMEOUT", 10))
+        self.stt_timeout = float(os.getenv("STT_API_TIMEOUT", 30))
+        self.session = requests.Session()
+        self.http = AsyncHTTPClient(
+            timeout=self.timeout,
+            max_retries=int(os.getenv("EXTERNAL_API_RETRIES", 2)),
+            max_concurrency=int(os.getenv("EXTERNAL_API_CONCURRENCY", 64))
+        )
+
+        # Bounded LRU caches with expiry for translations and API language detections
+        cache_size = int(os.getenv("TRANSLATION_CACHE_SIZE", 4096))
+        cache_ttl = int(os.getenv("TRANSLATION_CACHE_TTL", 24 * 3600))
+        self.translation_cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        self.detection_cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        self._cache_lock = threading.Lock()
+        # Bumped from request threads and the event loop at once
+        self._counters_lock = threading.Lock()
+        self.counters = {
+            "detect_offline": 0,
+            "detect_api": 0,
+            "detect_cache_hits": 0,
+            "translate_cache_hits": 0,
+            "translate_api": 0
         }
-        
-        files = [
-            ('file', (audio_file.filename, audio_file.read(), 'audio/wav'))
-        ]
-        
-        headers = {
-            'api-subscription-key': self.sarvam_api_key
+
+    def _count(self, name: str):
+        with self._counters_lock:
+            self.counters[name] += 1
+
+    def stats(self) -> Dict:
+        with self._counters_lock:
+            counters = dict(self.counters)
+        return {
+            **counters,
+            "translation_cache_size": len(self.translation_cache),
+            "detection_cache_size": len(self.detection_cache),
+            "http": self.http.stats()
         }
-        
+
+    def _cache_get(self, cache: TTLCache, key):
+        with self._cache_lock:
+            return cache.get(key)
+
+    def _cache_set(self, cache: TTLCache, key, value):
+        with self._cache_lock:
+            cache[key] = value
+
+    def _speech_to_text_request(self, audio_file) -> Dict:
+        return {
+            "url": f"{self.sarvam_base_url}/speech-to-text",
+            "headers": {'api-subscription-key': self.sarvam_api_key},
+            "data": {
+                'model': 'saarika:v2',
+                'language_code': 'unknown',
+                'with_timesteps': 'false'
+            },
+            "files": [('file', (audio_file.filename, audio_file.read(), 'audio/wav'))]
+        }
+
+    def _detect_request(self, text) -> Dict:
+        return {
+            "url": f"{self.google_base_url}/language/translate/v2/detect",
+            "params": {"key": self.google_api_key},
+            "json": {"q": text}
+        }
+
+    def _translate_request(self, text, target_language) -> Dict:
+        return {
+            "url": f"{self.google_base_url}/language/translate/v2",
+            "params": {"key": self.google_api_key},
+            "json": {"q": text, "target": target_language, "format": "text"}
+        }
+
+    def _detect_offline_or_cached(self, text):
+        language = detect_language_offline(text)
+        if language:
+            self._count("detect_offline")
+            return language
+
+        cached = self._cache_get(self.detection_cache, text)
+        if cached:
+            self._count("detect_cache_hits")
+        return cached
+
+    @staticmethod
+    def _translation_key(text, target_language, text_format="text"):
+        # HTML segments come back entity-encoded, so they never share entries with plain text
+        return (text, target_language) if text_format == "text" else (text, target_language, text_format)
+
+    def _translation_cached(self, text, target_language, text_format="text"):
+        if not isinstance(text, str):
+            return None
+        cached = self._cache_get(self.translation_cache, self._translation_key(text, target_language, text_format))
+        if cached is not None:
+            self._count("translate_cache_hits")
+        return cached
+
+    def speech_to_text(self, audio_file,):
+        """Convert speech to text using Sarvam AI"""
         try:
-            response = requests.post(url, headers=headers, data=payload, files=files)
+            request_args = self._speech_to_text_request(audio_file)
+            response = self.session.post(request_args.pop("url"), timeout=self.stt_timeout, **request_args)
             json_response = response.json()
             return json_response.get('transcript', '')
         except requests.exceptions.RequestException as e:
             print(f"Speech-to-Text Error: {e}")
             return None
 
+    async def aspeech_to_text(self, audio_file):
+        """Convert speech to text using Sarvam AI without blocking the event loop"""
+        try:
+            request_args = self._speech_to_text_request(audio_file)
+            response = await self.http.post(request_args.pop("url"), timeout=self.stt_timeout, **request_args)
+            return response.json().get('transcript', '')
+        except Exception as e:
+            print(f"Speech-to-Text Error: {e}")
+            return None
+
     def detect_language(self, text):
-        """Detect language using Google Translation API"""
-        url = "https://translation.googleapis.com/language/translate/v2/detect"
-        params = {"key": self.google_api_key}
-        data = {"q": text}
+        """Detect language locally when unambiguous, otherwise with Google Translation API"""
+        language = self._detect_offline_or_cached(text)
+        if language:
+            return language
 
         try:
-            response = requests.post(url, params=params, json=data)
+            self._count("detect_api")
+            request_args = self._detect_request(text)
+            response = self.session.post(request_args.pop("url"), timeout=self.timeout, **request_args)
             response.raise_for_status()
             result = response.json()
-            return result["data"]["detections"][0][0]["language"]
+            language = result["data"]["detections"][0][0]["language"]
+            self._cache_set(self.detection_cache, text, language)
+            return language
+        except Exception as e:
+            print(f"Language Detection Error: {e}")
+            return None
+
+    async def adetect_language(self, text):
+        """Async variant of detect_language"""
+        language = self._detect_offline_or_cached(text)
+        if language:
+            return language
+
+        try:
+            self._count("detect_api")
+            request_args = self._detect_request(text)
+            response = await self.http.post(request_args.pop("url"), **request_args)
+            response.raise_for_status()
+            language = response.json()["data"]["detections"][0][0]["language"]
+            self._cache_set(self.detection_cache, text, language)
+            return language
         except Exception as e:
             print(f"Language Detection Error: {e}")
             return None
 
     def translate_text(self, text, target_language="en"):
         """Translate text using Google Translation API"""
-        url = "https://translation.googleapis.com/language/translate/v2"
-        params = {"key": self.google_api_key}
-        data = {"q": text, "target": target_language}
+        cached = self._translation_cached(text, target_language)
+        if cached is not None:
+            return cached
 
         try:
-            response = requests.post(url, params=params, json=data)
+            self._count("translate_api")
+            request_args = self._translate_request(text, target_language)
+            response = self.session.post(request_args.pop("url"), timeout=self.timeout, **request_args)
             response.raise_for_status()
             result = response.json()
-            return result["data"]["translations"][0]["translatedText"]
+            translated = result["data"]["translations"][0]["translatedText"]
+            if isinstance(text, str):
+                self._cache_set(self.translation_cache, (text, target_language), translated)
+            return translated
+        except Exception as e:
+            print(f"Translation Error: {e}")
+            return None
+
+    async def atranslate_batch(self, texts: List[str], target_language="en", text_format="text") -> List[str]:
+        """Translate many strings in one batched API call, skipping cached ones"""
+        translations = [self._translation_cached(text, target_language, text_format) for text in texts]
+        missing = list(dict.fromkeys(text for text, cached in zip(texts, translations) if cached is None))
+        if not missing:
+            return translations
+
+        # The v2 API accepts up to 128 segments per request; larger batches go out concurrently
+        batches = [missing[i:i + self.TRANSLATE_BATCH_LIMIT] for i in range(0, len(missing), self.TRANSLATE_BATCH_LIMIT)]
+        url = f"{self.google_base_url}/language/translate/v2"
+        params = {"key": self.google_api_key}
+
+        async def translate_batch(batch):
+            self._count("translate_api")
+            response = await self.http.post(url, params=params, json={"q": batch, "target": target_language, "format": text_format})
+            response.raise_for_status()
+            return [item["translatedText"] for item in response.json()["data"]["translations"]]
+
+        try:
+            results = await asyncio.gather(*(translate_batch(batch) for batch in batches))
+        except Exception as e:
+            print(f"Translation Error: {e}")
+            return None
+
+        translated = {}
+        for batch, batch_result in zip(batches, results):
+            for text, result in zip(batch, batch_result):
+                translated[text] = result
+                self._cache_set(self.translation_cache, self._translation_key(text, target_language, text_format), result)
+        return [cached if cached is not None else translated[text] for text, cached in zip(texts, translations)]
+
+    async def atranslate_response(self, result: Dict, target_language: str) -> Dict:
+        """Translate a chat result (answer plus optional explanation) in a single round trip.
+
+        Code, URLs and markdown markup pass through untouched. Each line is sent
+        whole, with its inline markup as placeholders, so sentences are not split.
+        """
+        fields = [("response", None)] + [("explanation", key) for key, value in (result.get("explanation") or {}).items()
+                                         if isinstance(value, str)]
+        documents = [MarkdownDocument(result[name] if key is None else result[name][key]) for name, key in fields]
+
+        segments = [segment for document in documents for segment in document.segments]
+        translations = await self.atranslate_batch(segments, target_language, SEGMENT_FORMAT) if segments else []
+        if translations is None:
+            return None
+
+        translated = dict(result)
+        if "explanation" in result:
+            translated["explanation"] = dict(result["explanation"])
+        offset = 0
+        for (name, key), document in zip(fields, documents):
+            count = len(document.segment_indices)
+            text = document.rebuild(translations[offset:offset + count])
+            offset += count
+            if key is None:
+                translated[name] = text
+            else:
+                translated[name][key] = text
+        return translated
+
+    async def atranslate_text(self, text, target_language="en"):
+        """Async variant of translate_text"""
+        cached = self._translation_cached(text, target_language)
+        if cached is not None:
+            return cached
+
+        try:
+            self._count("translate_api")
+            request_args = self._translate_request(text, target_language)
+            response = await self.http.post(request_args.pop("url"), **request_args)
+            response.raise_for_status()
+            translated = response.json()["data"]["translations"][0]["translatedText"]
+            if isinstance(text, str):
+                self._cache_set(self.translation_cache, (text, target_language), translated)
+            return translated
         except Exception as e:
             print(f"Translation Error: {e}")
             return None
@@ -509,34 +702,119 @@ class LLMExplainableAI:
             }
 
 class RAGChat:
-    def __init__(self):
-        # API Key Setup
+    # Enhanced system prompt
+    SYSTEM_PROMPT = """You are an AI assistant providing contextual information about government services, 
+                        personal chatbot and other general inquiries. Use retrieved documents and previous conversation 
+                        context to generate accurate and coherent responses.
+
+                        **Response Formatting:**  
+                        - Use Markdown (`.md`) syntax properly.
+                        - Use `#` for headings, `-` for lists, `**bold**` for emphasis, and `*italic*` where necessary.
+                        - Ensure that all responses adhere to valid Markdown formatting.
+                        - Always wrap code snippets in triple backticks (```).
+
+                        ### Example:
+                        #### Government Service Information
+                        - **Service Name:** XYZ Assistance Program
+                        - **Eligibility:** Citizens above 18 years
+                        - **Application Link:** [Click Here](https://example.com)
+
+                        Now generate a response strictly in this Markdown format."""
+
+    def __init__(self, retrieval_k: int = None, candidate_pool_size: int = None, session_store=None, model=None):
+        # API Key Setup (not needed when a chat model is passed in, e.g. a stand-in for benchmarks)
         self.api_key = os.getenv("GENAI_API_KEY")
-        if not self.api_key:
+        if model is None and not self.api_key:
             raise ValueError("API key is missing. Please set GENAI_API_KEY in .env file.")
         
-        # Initialize Embeddings
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name="sentence-transformers/all-mpnet-base-v2"
+        # Initialize Embeddings (shared process-wide through the registry)
+        self.embeddings = get_embeddings()
+        # Concurrent query embeddings are coalesced into batched forward passes
+        self.query_embedder = MicroBatchEmbedder(
+            self.embeddings,
+            window_ms=float(os.getenv("EMBED_BATCH_WINDOW_MS", 5)),
+            max_batch_size=int(os.getenv("EMBED_MAX_BATCH", 32))
         )
         
         # Initialize Vector Store
-        self.vector_store = Chroma(
-            persist_directory="./vector_db", 
-            embedding_function=self.embeddings
-        )
+        self._vector_store_lock = threading.Lock()
+        self.vector_store = self._open_vector_store()
         
         # Initialize Language Model
-        self.model = ChatGoogleGenerativeAI(
-            model="gemini-1.5-flash", 
-            google_api_key=self.api_key
-        )
+        if model is None:
+            from langchain_google_genai import ChatGoogleGenerativeAI
+
+            model = ChatGoogleGenerativeAI(
+                model="gemini-1.5-flash", 
+                google_api_key=self.api_key
+            )
+        self.model = model
         
-        # Chat History Management
-        self.chat_histories: Dict[str, List] = {}
+        # Chat History Management: bounded and optionally shared between workers
         self.MAX_HISTORY_LENGTH = 5
+        self.session_store = session_store or InMemorySessionStore(max_messages=self.MAX_HISTORY_LENGTH * 2)
 
         self.explainer = LLMExplainableAI(self.model)
+        # Explanations computed in the background, fetched from /explanations/<turn_id>; stored in a
+        # directory shared by every worker so any of them can answer the poll
+        self.explanations = ExplanationStore(
+            os.getenv("EXPLANATIONS_DIR", os.path.join(VECTOR_DB_DIR, "explanations")),
+            ttl=float(os.getenv("EXPLANATION_CACHE_TTL", 3600)),
+            max_entries=int(os.getenv("EXPLANATION_CACHE_SIZE", 1024))
+        )
+
+        # Retrieval settings: fetch a candidate pool, rescore it, keep the top-k
+        self.retrieval_k = retrieval_k or int(os.getenv("RAG_RETRIEVAL_K", 3))
+        self.candidate_pool_size = candidate_pool_size or int(os.getenv("RAG_CANDIDATE_POOL", 10))
+
+        # Token budget for system prompt, question, retrieved context and history
+        self.prompt_builder = PromptBuilder(
+            max_tokens=int(os.getenv("PROMPT_TOKEN_BUDGET", 4000)),
+            max_message_tokens=int(os.getenv("PROMPT_MAX_MESSAGE_TOKENS", 300))
+        )
+
+        # Exact-match cache of embeddings and retrieval results, invalidated by an index version
+        # shared by every worker on this vector store
+        self.index_version = IndexVersion.for_directory(VECTOR_DB_DIR)
+        self.retrieval_cache = RetrievalCache(
+            self.index_version,
+            max_entries=int(os.getenv("RETRIEVAL_CACHE_SIZE", 2048))
+        )
+
+        # Answers to repeated FAQ-style questions, shared across sessions
+        self.answer_cache = SemanticAnswerCache(
+            threshold=float(os.getenv("ANSWER_CACHE_THRESHOLD", 0.95)),
+            max_entries=int(os.getenv("ANSWER_CACHE_SIZE", 1000)),
+            ttl=float(os.getenv("ANSWER_CACHE_TTL", 3600))
+        )
+        self.index_version.add_listener(self._on_index_changed)
+
+        # BM25 index over the same chunks, fused with dense results (RAG_LEXICAL=0 disables it)
+        self.rrf_k = int(os.getenv("RAG_RRF_K", 60))
+        self.lexical_index = None
+        if os.getenv("RAG_LEXICAL", "1") == "1":
+            self.lexical_index = get_lexical_index(VECTOR_DB_DIR)
+            # Index chunks ingested before the lexical index existed, without delaying startup
+            threading.Thread(
+                target=self.lexical_index.backfill, args=(self.vector_store._collection,),
+                name="lexical-backfill", daemon=True
+            ).start()
+
+        # Optional cross-encoder rerank stage with a hard per-request budget (RAG_RERANK=1)
+        self.reranker = None
+        self.rerank_pool_size = int(os.getenv("RERANK_POOL", 20))
+        if os.getenv("RAG_RERANK", "0") == "1":
+            self.reranker = CrossEncoderReranker(
+                model_name=os.getenv("RERANK_MODEL", DEFAULT_RERANK_MODEL),
+                budget_ms=float(os.getenv("RERANK_BUDGET_MS", 150))
+            )
+
+        # Embedding-based router deciding whether a query needs retrieval
+        self.router = SemanticRouter(
+            self.embeddings,
+            min_score=float(os.getenv("ROUTER_MIN_SCORE", 0.25)),
+            margin=float(os.getenv("ROUTER_MARGIN", 0.0))
+        )
 
     def cosine_similarity(self, vec1, vec2):
         """Compute cosine similarity between two vectors."""
@@ -552,146 +830,306 @@ class RAGChat:
         
         return dot_product / (magnitude1 * magnitude2)
 
+    def _open_vector_store(self):
+        from langchain_chroma import Chroma
+
+        return Chroma(
+            persist_directory=VECTOR_DB_DIR,
+            embedding_function=self.embeddings
+        )
+
+    def _on_index_changed(self, version: int, external: bool):
+        """Drop cached answers; reopen Chroma if another process wrote to it."""
+        if external:
+            self.reload_vector_store()
+        self.answer_cache.invalidate(version)
+
+    def reload_vector_store(self):
+        """Reopen the vector store so chunks written by another process become searchable.
+
+        Chroma keeps each collection's vector index in memory and only reads
+        other processes' writes when the client is created.
+        """
+        from chromadb.api.client import SharedSystemClient
+
+        with self._vector_store_lock:
+            SharedSystemClient.clear_system_cache()
+            self.vector_store = self._open_vector_store()
+        print("Reloaded vector store after an update from another process.")
+
+    def prepare_to_write(self):
+        """Called by the ingestion writer with the ingest lock held, before it writes."""
+        self.index_version.sync()
+
     def add_to_chat_history(self, session_id: str, role: str, message: str):
         """Add a message to the session's chat history."""
-        if session_id not in self.chat_histories:
-            self.chat_histories[session_id] = []
-        
-        # Maintain maximum history length
-        if len(self.chat_histories[session_id]) >= self.MAX_HISTORY_LENGTH * 2:
-            self.chat_histories[session_id] = self.chat_histories[session_id][-self.MAX_HISTORY_LENGTH * 2:]
-        
-        self.chat_histories[session_id].append({
+        # The store trims each session to its most recent messages
+        self.session_store.append(session_id, {
             'role': role,
             'content': message
         })
 
-    def get_chat_context(self, session_id: str) -> str:
-        """Compile chat history context."""
-        if session_id not in self.chat_histories:
-            return ""
-        
-        history_context = "\nPrevious Conversation Context:\n"
-        for msg in self.chat_histories[session_id]:
-            history_context += f"{msg['role'].upper()}: {msg['content']}\n"
-        
-        return history_context
+    def add_turn_to_chat_history(self, session_id: str, question: str, answer: str):
+        """Record a completed turn: the question and its answer are written together."""
+        self.session_store.extend(session_id, [
+            {'role': 'user', 'content': question},
+            {'role': 'assistant', 'content': answer}
+        ])
+
+    def rescore_candidates(self, query_embedding, candidate_embeddings, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Score all candidates against the query in one pass and return the top-k indices and scores."""
+        query = np.asarray(query_embedding, dtype=np.float32)
+        candidates = np.asarray(candidate_embeddings, dtype=np.float32)
+        if candidates.size == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
 
-    def hybrid_retrieval(self, question: str, session_id: str = 'default') -> Tuple[List, float]:
-        """Perform ensemble retrieval using multiple search methods."""
+        norms = np.linalg.norm(candidates, axis=1) * np.linalg.norm(query)
+        scores = np.divide(candidates @ query, norms, out=np.zeros(len(candidates), dtype=np.float32), where=norms > 0)
+
+        # argpartition keeps the selection linear in the pool size; only the k winners get sorted
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+        top = top[np.argsort(-scores[top])]
+        return top, scores[top]
+
+    def hybrid_retrieval(self, question: str, session_id: str = 'default',
+                         query_embedding: List[float] = None) -> Tuple[List, float, bool]:
+        """Fuse dense candidates with BM25 matches by reciprocal rank and keep the top-k.
+
+        Each document's metadata carries its dense and lexical ranks; the
+        returned score is the fused RRF score, or the cross-encoder score when
+        reranking is enabled and finished within its budget. The last value is
+        False when the reranker was enabled but skipped (over budget, busy or
+        still loading), so the caller can avoid caching the fallback order.
+        """
         # Start timing the retrieval process
         start_time = time.time()
         
-        # Enhance query with chat history context
-        history_context = self.get_chat_context(session_id)
         enhanced_query = f"{question}"
 
         # Retrieve documents
         try:
-            docs = self.vector_store.similarity_search(enhanced_query, k=3)
-            
-            # Compute and rank documents by relevance
-            query_embedding = self.embeddings.embed_query(enhanced_query)
-            
-            # Score and sort documents
-            scored_docs = []
-            for doc in docs:
-                doc_embedding = self.embeddings.embed_query(doc.page_content)
-                similarity_score = self.cosine_similarity(query_embedding, doc_embedding)
-                scored_docs.append((doc, similarity_score))
-            
-            # Sort by relevance
-            sorted_docs = sorted(scored_docs, key=lambda x: x[1], reverse=True)
+            # The query embedding is the only forward pass; chunk vectors come back from Chroma
+            if query_embedding is None:
+                query_embedding = self.query_embedder.embed_query(enhanced_query)
+            pool_size = self.pool_size()
+            results = self.vector_store._collection.query(
+                query_embeddings=[query_embedding],
+                n_results=pool_size,
+                include=["documents", "metadatas", "distances", "embeddings"]
+            )
+
+            ids = results["ids"][0]
+            contents = results["documents"][0]
+            metadatas = results["metadatas"][0]
+            distances = results["distances"][0]
+            # Rank the whole dense pool; fusion decides which k survive
+            top, scores = self.rescore_candidates(query_embedding, results["embeddings"][0], len(ids))
+
+            candidates = {}
+            for rank, (idx, score) in enumerate(zip(top, scores), start=1):
+                metadata = dict(metadatas[idx] or {})
+                metadata["chunk_id"] = ids[idx]
+                metadata["vector_distance"] = float(distances[idx])
+                metadata["dense_score"] = float(score)
+                metadata["dense_rank"] = rank
+                candidates[ids[idx]] = Document(page_content=contents[idx], metadata=metadata)
+            dense_ranking = [ids[idx] for idx in top]
+
+            # Exact identifiers (plan names, section and policy numbers) are found by BM25
+            lexical_ranking = []
+            if self.lexical_index is not None:
+                for rank, (cid, text, metadata, bm25) in enumerate(
+                        self.lexical_index.search(enhanced_query, pool_size), start=1):
+                    if cid not in candidates:
+                        metadata = dict(metadata)
+                        metadata["chunk_id"] = cid
+                        candidates[cid] = Document(page_content=text, metadata=metadata)
+                    candidates[cid].metadata["bm25"] = bm25
+                    candidates[cid].metadata["lexical_rank"] = rank
+                    lexical_ranking.append(cid)
+
+            fused = reciprocal_rank_fusion([dense_ranking, lexical_ranking], k=self.rrf_k)
+            sorted_docs = [(candidates[cid], score) for cid, score in fused[:self.retrieval_k]]
+            reranked_or_disabled = self.reranker is None
+
+            # Optional cross-encoder pass over the wider pool; keeps the fused order if over budget
+            if self.reranker is not None:
+                reranked = self.reranker.rerank(
+                    enhanced_query, [candidates[cid] for cid, _ in fused[:self.rerank_pool_size]], self.retrieval_k
+                )
+                if reranked is not None:
+                    sorted_docs = reranked
+                    reranked_or_disabled = True
             
             # Calculate retrieval time
             retrieval_time = time.time() - start_time
             
-            return sorted_docs, retrieval_time
+            return sorted_docs, retrieval_time, reranked_or_disabled
         
         except Exception as e:
             print(f"Retrieval error: {e}")
             retrieval_time = time.time() - start_time
-            return [], retrieval_time
+            return [], retrieval_time, False
 
+    def pool_size(self) -> int:
+        """Candidates fetched from each index; reranking looks at a wider pool."""
+        pool_size = max(self.candidate_pool_size, self.retrieval_k)
+        if self.reranker is not None:
+            pool_size = max(pool_size, self.rerank_pool_size)
+        return pool_size
 
-    async def get_chat_response(self, question: str, session_id: str = 'default', explain: bool = False) -> Dict:
-        """Generate response using ensemble retrieval and chat history with optional explanation."""
-        try:
-            print(f"Starting response generation for query: {question}")
-            
-            # Add user's question to chat history
-            self.add_to_chat_history(session_id, 'user', question)
-            print("Added user message to chat history.")
+    def retrieval_params(self) -> Tuple:
+        return (self.retrieval_k, self.pool_size(), self.lexical_index is not None, self.rrf_k,
+                self.reranker is not None)
 
-            context = ""
-            insurance_keywords_found = contains_insurance_keywords(question)
-            print(f"Insurance keywords found: {insurance_keywords_found}")
-            
-            # Retrieve relevant documents
-            if insurance_keywords_found:
-                print("Triggering RAG search...")
-                relevant_docs, retrieval_time = self.hybrid_retrieval(question, session_id)
-                print(f"Documents retrieved: {len(relevant_docs)}")
-                print(f"Retrieval time: {retrieval_time} seconds")
-                
-                # Extract document content for context
-                context = "\n\n".join([doc.page_content for doc, _ in relevant_docs])
-                print("Context extracted from documents.")
-            else:
-                print("Skipping RAG search, directly invoking LLM...")
-                context = ""
-                relevant_docs, retrieval_time = [], 0
-            
-            # Enhanced system prompt
-            system_prompt = """You are an AI assistant providing contextual information about government services, 
-                        personal chatbot and other general inquiries. Use retrieved documents and previous conversation 
-                        context to generate accurate and coherent responses.
+    def prepare_turn(self, question: str, session_id: str = 'default') -> Dict:
+        """Route the question, retrieve context and build the LLM messages.
 
-                        **Response Formatting:**  
-                        - Use Markdown (`.md`) syntax properly.
-                        - Use `#` for headings, `-` for lists, `**bold**` for emphasis, and `*italic*` where necessary.
-                        - Ensure that all responses adhere to valid Markdown formatting.
-                        - Always wrap code snippets in triple backticks (```).
+        Nothing is written to chat history here; the caller records the whole
+        turn once the answer is complete.
+        """
+        print(f"Starting response generation for query: {question}")
 
-                        ### Example:
-                        #### Government Service Information
-                        - **Service Name:** XYZ Assistance Program
-                        - **Eligibility:** Citizens above 18 years
-                        - **Application Link:** [Click Here](https://example.com)
+        # Identical questions reuse the embedding and results until ingestion bumps the index version
+        lookup_start = time.time()
+        index_version = self.index_version.value
+        cached = self.retrieval_cache.get(question, self.retrieval_params())
+        cache_status = "hit" if cached else "miss"
 
-                        Now generate a response strictly in this Markdown format."""
-                            
-            # Include chat history in system message
-            history_context = self.get_chat_context(session_id)
-            print("Chat history context compiled.")
-            
-            system_message = SystemMessage(content=f"{system_prompt}\n\nContext:\n{context}\n\n{history_context}")
-            user_message = HumanMessage(content=question)
-            print("System and user messages created.")
+        # One query embedding serves both routing and retrieval
+        with stage("embed"):
+            query_embedding = cached["embedding"] if cached else self.query_embedder.embed_query(question)
+        route = self.router.route(
+            query_embedding,
+            keyword_phrase=insurance_keyword_phrases.get().find_phrase(question)
+        )
+        print(f"Routed to '{route.route}' (score {route.score:.2f}), retrieval: {route.retrieve}")
+        
+        # Retrieve relevant documents
+        if route.retrieve and cached and cached["docs"] is not None:
+            relevant_docs, retrieval_time = cached["docs"], time.time() - lookup_start
+            print(f"Documents retrieved: {len(relevant_docs)} (retrieval cache hit)")
+            print(f"Retrieval time: {retrieval_time} seconds")
+        elif route.retrieve:
+            print("Triggering RAG search...")
+            relevant_docs, retrieval_time, reranked_or_disabled = self.hybrid_retrieval(
+                question, session_id, query_embedding=query_embedding
+            )
+            print(f"Documents retrieved: {len(relevant_docs)} (retrieval cache {cache_status})")
+            print(f"Retrieval time: {retrieval_time} seconds")
+            # A fused order the reranker skipped is not cached, so the next ask gets reranked
+            if relevant_docs and reranked_or_disabled:
+                self.retrieval_cache.put(question, self.retrieval_params(), query_embedding, relevant_docs, index_version)
+        else:
+            print("Skipping RAG search, directly invoking LLM...")
+            relevant_docs, retrieval_time = [], 0
+            if not cached:
+                self.retrieval_cache.put(question, self.retrieval_params(), query_embedding, None, index_version)
+        stage_timing.record("retrieve", retrieval_time)
+                        
+        history = self.session_store.get(session_id)
+        
+        # Fit context and history into the token budget
+        with stage("prompt"):
+            prompt = self.prompt_builder.build(self.SYSTEM_PROMPT, question, relevant_docs, history)
+        relevant_docs = prompt.documents
+        tokens = prompt.tokens
+        print(f"Prompt tokens: system {tokens['system']}, question {tokens['question']}, "
+              f"context {tokens['context']} ({len(prompt.documents)} chunks, {prompt.chunks_dropped} dropped, "
+              f"{prompt.chunks_truncated} truncated), history {tokens['history']} "
+              f"({prompt.messages_dropped} messages dropped, {prompt.messages_truncated} truncated), "
+              f"total {tokens['total']}/{tokens['budget']}")
+        
+        system_message = SystemMessage(content=f"{self.SYSTEM_PROMPT}\n\nContext:\n{prompt.context}\n\n{prompt.history}")
+        user_message = HumanMessage(content=question)
+        print("System and user messages created.")
+
+        return {
+            "messages": [system_message, user_message],
+            "query_embedding": query_embedding,
+            "first_turn": not history,
+            "relevant_docs": relevant_docs,
+            "retrieval_time": retrieval_time,
+            "retrieval_cache": cache_status,
+            "index_version": index_version,
+            "route": route,
+            "prompt": prompt
+        }
+
+    def cacheable(self, question: str, turn: Dict) -> bool:
+        """Only opening questions answered from documents, with nothing personal in them, share answers."""
+        return (turn["route"].retrieve and bool(turn["relevant_docs"]) and turn["first_turn"]
+                and not is_personalised(question))
+
+    def cached_answer(self, question: str, turn: Dict) -> Optional[str]:
+        if not self.cacheable(question, turn):
+            return None
+        chunk_ids = [doc.metadata.get("chunk_id") for doc, _ in turn["relevant_docs"]]
+        return self.answer_cache.lookup(turn["query_embedding"], chunk_ids)
+
+    def remember_answer(self, question: str, turn: Dict, answer: str, latency: float):
+        if self.cacheable(question, turn):
+            chunk_ids = [doc.metadata.get("chunk_id") for doc, _ in turn["relevant_docs"]]
+            self.answer_cache.store(turn["query_embedding"], chunk_ids, answer, latency, turn["index_version"])
+
+    @staticmethod
+    def retrieval_metadata(turn: Dict) -> Dict:
+        """Summarise what retrieval contributed to a turn, for clients and logs."""
+        return {
+            "route": turn["route"].route,
+            "retrieved": turn["route"].retrieve,
+            "retrieval_time": turn["retrieval_time"],
+            "retrieval_cache": turn["retrieval_cache"],
+            "prompt": turn["prompt"].to_dict(),
+            "sources": [
+                {
+                    "file_name": doc.metadata.get("file_name"),
+                    "page_start": doc.metadata.get("page_start"),
+                    "page_end": doc.metadata.get("page_end"),
+                    "score": score
+                }
+                for doc, score in turn["relevant_docs"]
+            ]
+        }
+
+    async def get_chat_response(self, question: str, session_id: str = 'default', explain: bool = False) -> Dict:
+        """Generate response using ensemble retrieval and chat history with optional explanation.
+
+        The explanation is produced in the background after the answer is returned;
+        poll it with get_explanation(result["turn_id"]).
+        """
+        try:
+            # Embedding and vector search are CPU and disk bound; keep them off the event loop
+            turn = await asyncio.to_thread(self.prepare_turn, question, session_id)
+            relevant_docs = turn["relevant_docs"]
             
-            # Generate response
-            print("Invoking LLM to generate response...")
-            response = self.model.invoke([system_message, user_message])
-            response_content = response.content
-            print("Response generated by LLM.")
+            # Repeated FAQ-style questions are answered from the cache
+            with stage("answer_cache"):
+                response_content = self.cached_answer(question, turn)
+            if response_content is not None:
+                print("Response served from answer cache.")
+            else:
+                # Generate response
+                print("Invoking LLM to generate response...")
+                llm_start = time.time()
+                response = await self.ainvoke_model(turn["messages"])
+                response_content = response.content
+                stage_timing.record("llm", time.time() - llm_start)
+                print("Response generated by LLM.")
+                self.remember_answer(question, turn, response_content, time.time() - llm_start)
             
-            # Add AI's response to chat history
-            self.add_to_chat_history(session_id, 'assistant', response_content)
-            print("Added bot response to chat history.")
+            # Add the question and AI's response to chat history
+            self.add_turn_to_chat_history(session_id, question, response_content)
+            print("Added turn to chat history.")
             
             result = {"response": response_content}
             
-            # Generate explanation if requested
+            # Schedule the explanation off the critical path if requested
             if explain:
-                print("Generating explanation...")
-                explanation = await self.explainer.generate_explanation(
-                    query=question,
-                    retrieved_docs=relevant_docs,
-                    chat_history=self.chat_histories.get(session_id, []),
-                    response=response_content
-                )
-                result["explanation"] = explanation
-                print("Explanation generated.")
+                result["turn_id"] = self.schedule_explanation(question, relevant_docs, session_id, response_content)
+                result["explanation_status"] = "pending"
+                print("Explanation scheduled.")
             
             return result
         
@@ -708,10 +1146,172 @@ class RAGChat:
                 }
             return error_response
 
+    async def ainvoke_model(self, messages: List):
+        """Await the chat model on the process-wide background loop.
+
+        The model's async client binds to the first loop that uses it, and
+        explanations already run on the background loop. Under ASGI that loop
+        is the server's own, so this is a plain await; under the Flask dev
+        server each request has its own loop, so the call is handed over.
+        """
+        if background_loop.in_loop_thread():
+            return await self.model.ainvoke(messages)
+        return await asyncio.wrap_future(background_loop.submit(self.model.ainvoke(messages)))
+
+    def schedule_explanation(self, question: str, relevant_docs: List, session_id: str, response_content: str) -> str:
+        """Start generating an explanation on the background loop and return its turn id."""
+        turn_id = uuid.uuid4().hex
+        # Snapshot the history now so later turns do not leak into this explanation
+        chat_history = self.session_store.get(session_id)
+        self.explanations.put(turn_id, {"status": "pending", "explanation": None})
+        self.explanations.evict()
+
+        background_loop.submit(self._explain_turn(turn_id, question, relevant_docs, chat_history, response_content))
+        return turn_id
+
+    async def _explain_turn(self, turn_id: str, question: str, relevant_docs: List, chat_history: List,
+                            response_content: str):
+        print("Generating explanation...")
+        explanation = await self.explainer.generate_explanation(
+            query=question,
+            retrieved_docs=relevant_docs,
+            chat_history=chat_history,
+            response=response_content
+        )
+        self.explanations.put(turn_id, {"status": "ready", "explanation": explanation})
+        print("Explanation generated.")
+
+    def get_explanation(self, turn_id: str) -> Dict:
+        """Return {'status', 'explanation'} for a turn, or None if unknown or expired."""
+        return self.explanations.get(turn_id)
+
+    def stream_chat_response(self, question: str, session_id: str = 'default') -> Iterator[Dict]:
+        """Stream the answer as token events, ending with a 'done' event carrying metadata.
+
+        Chat history only receives the turn once the stream has completed, so a
+        client that disconnects mid-answer leaves no half-recorded turn behind.
+        """
+        start_time = time.time()
+        first_token_time = None
+        try:
+            turn = self.prepare_turn(question, session_id)
+
+            response_content = self.cached_answer(question, turn)
+            cached = response_content is not None
+            if cached:
+                first_token_time = time.time()
+                yield {"event": "token", "data": {"text": response_content}}
+            else:
+                chunks = []
+                llm_start = time.time()
+                for chunk in self.model.stream(turn["messages"]):
+                    if not chunk.content:
+                        continue
+                    if first_token_time is None:
+                        first_token_time = time.time()
+                    chunks.append(chunk.content)
+                    yield {"event": "token", "data": {"text": chunk.content}}
+
+                response_content = "".join(chunks)
+                self.remember_answer(question, turn, response_content, time.time() - llm_start)
+            self.add_turn_to_chat_history(session_id, question, response_content)
 
-# Initialize RAGChat instance
-rag_chat = RAGChat()
-speech_processor = SpeechProcessor()
+            total_latency = time.time() - start_time
+            time_to_first_token = (first_token_time or time.time()) - start_time
+            print(f"Streamed response: first token after {time_to_first_token:.2f}s, total {total_latency:.2f}s")
+            yield {
+                "event": "done",
+                "data": {
+                    "response": response_content,
+                    "retrieval": self.retrieval_metadata(turn),
+                    "cached": cached,
+                    "time_to_first_token": time_to_first_token,
+                    "total_latency": total_latency
+                }
+            }
+        except Exception as e:
+            print(f"Response streaming error: {e}")
+            yield {"event": "error", "data": {"response": f"Sorry, I encountered an error: {str(e)}"}}
+
+
+def _build_ingestion_queue() -> IngestionQueue:
+    from database_create import DocumentProcessor
+
+    rag_chat = get_rag_chat()
+    # Uploads are spooled for whichever worker holds the ingest lock; it writes through its
+    # retriever's own vector store, reopened first if another process changed it
+    queue = IngestionQueue(
+        DocumentProcessor(persist_directory=VECTOR_DB_DIR),
+        lambda: rag_chat.vector_store,
+        spool_dir=os.getenv("INGEST_SPOOL_DIR", os.path.join(VECTOR_DB_DIR, "ingest_jobs")),
+        prepare=rag_chat.prepare_to_write
+    )
+    # Every worker's cached retrieval results and answers may be stale once new documents land
+    queue.add_listener(rag_chat.index_version.bump)
+    queue.start()
+    return queue
+
+# Process-wide instances, built on first use
+components = {
+    "mongo": mongo,
+    "rag_chat": LazyComponent("rag_chat", lambda: RAGChat(session_store=create_session_store(get_db()))),
+    "speech_processor": LazyComponent("speech_processor", SpeechProcessor),
+    "keyword_phrases": insurance_keyword_phrases,
+    "ingestion_queue": LazyComponent("ingestion_queue", _build_ingestion_queue)
+}
+
+def get_rag_chat() -> RAGChat:
+    return components["rag_chat"].get()
+
+def get_speech_processor() -> SpeechProcessor:
+    return components["speech_processor"].get()
+
+def get_ingestion_queue() -> IngestionQueue:
+    return components["ingestion_queue"].get()
+
+warm_up_state = {"state": "idle", "time": None, "error": None}
+
+def warm_up():
+    """Build every component and run a first pass through the models."""
+    warm_up_state["state"] = "running"
+    start_time = time.time()
+    try:
+        rag_chat = get_rag_chat()
+        get_speech_processor()
+        get_ingestion_queue()
+        insurance_keyword_phrases.get()
+        embedding_registry.warm_up()
+        if rag_chat.reranker:
+            rag_chat.reranker.warm_up()
+    except Exception as e:
+        warm_up_state.update(state="failed", error=str(e))
+        print(f"Warm-up failed: {e}")
+        return
+    warm_up_state.update(state="done", time=time.time() - start_time)
+    print(f"Warm-up finished in {warm_up_state['time']:.2f}s")
+
+def start_warm_up():
+    """Warm up in a background thread unless WARM_UP=0; requests are served meanwhile."""
+    if os.getenv("WARM_UP", "1") != "1" or warm_up_state["state"] != "idle":
+        return
+    threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+
+@app.route('/ready', methods=['GET'])
+def ready():
+    """Report what has loaded; 200 once chat requests no longer pay a cold start."""
+    model_stats = embedding_registry.stats()["models"].get(DEFAULT_EMBEDDING_MODEL, {})
+    rag_chat = components["rag_chat"].peek()
+    status = {
+        "components": {name: component.status() for name, component in components.items()},
+        "embeddings": {"loaded": bool(model_stats), "warmed_up": model_stats.get("warmed_up", False)},
+        "reranker": rag_chat.reranker.stats()["loaded"] if rag_chat and rag_chat.reranker else None,
+        "warm_up": warm_up_state
+    }
+    status["ready"] = (
+        components["rag_chat"].loaded and components["speech_processor"].loaded
+        and status["embeddings"]["warmed_up"] and status["reranker"] is not False
+    )
+    return jsonify(status), 200 if status["ready"] else 503
 
 @app.route('/speech-to-text', methods=['POST'])
 async def process_speech():
@@ -722,19 +1322,25 @@ async def process_speech():
         audio_file = request.files['audio']
         session_id = request.form.get('session_id', 'default')
         
+        speech_processor = get_speech_processor()
+        rag_chat = get_rag_chat()
+
         # Process speech to text
-        speech_text = speech_processor.speech_to_text(audio_file)
+        with stage("stt"):
+            speech_text = await speech_processor.aspeech_to_text(audio_file)
         
         if not speech_text:
             return jsonify({'error': 'Speech-to-Text processing failed'}), 500
         
         # Detect language
-        detected_lang = speech_processor.detect_language(speech_text)
+        with stage("detect"):
+            detected_lang = await speech_processor.adetect_language(speech_text)
         print("Detected language:", detected_lang)
         
         # Translate speech text to English if detected language is not English
         if detected_lang != 'en':
-            translated_text = speech_processor.translate_text(speech_text)
+            with stage("translate"):
+                translated_text = await speech_processor.atranslate_text(speech_text)
             if not translated_text:
                 return jsonify({'error': 'Translation failed'}), 500
             speech_text = translated_text
@@ -744,7 +1350,8 @@ async def process_speech():
         
         # Translate response back to detected language if necessary
         if detected_lang != 'en':
-            response = speech_processor.translate_text(response, target_language=detected_lang)
+            with stage("translate"):
+                response = await speech_processor.atranslate_response(response, target_language=detected_lang)
             if not response:
                 return jsonify({'error': 'Translation failed'}), 500
         
@@ -757,6 +1364,26 @@ async def process_speech():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    # Only report what has loaded; scraping metrics must not trigger a cold start
+    rag_chat = components["rag_chat"].peek()
+    ingestion_queue = components["ingestion_queue"].peek()
+    speech_processor = components["speech_processor"].peek()
+    keyword_phrases = insurance_keyword_phrases.peek()
+    return jsonify({
+        'embeddings': embedding_registry.stats(),
+        'query_batching': rag_chat.query_embedder.stats() if rag_chat else None,
+        'ingestion': ingestion_queue.stats() if ingestion_queue else None,
+        'keyword_phrases': keyword_phrases.stats() if keyword_phrases else None,
+        'router': rag_chat.router.stats() if rag_chat else None,
+        'sessions': rag_chat.session_store.stats() if rag_chat else None,
+        'retrieval_cache': rag_chat.retrieval_cache.stats() if rag_chat else None,
+        'reranker': rag_chat.reranker.stats() if rag_chat and rag_chat.reranker else None,
+        'answer_cache': rag_chat.answer_cache.stats() if rag_chat else None,
+        'speech': speech_processor.stats() if speech_processor else None
+    }), 200
+
 @app.route('/chat', methods=['POST'])
 async def chat():
     try:
@@ -768,22 +1395,32 @@ async def chat():
         if not message:
             return jsonify({'response': 'No message provided'}), 400
         
+        speech_processor = get_speech_processor()
+        rag_chat = get_rag_chat()
+
         # Detect language
-        detected_lang = speech_processor.detect_language(message)
+        with stage("detect"):
+            detected_lang = await speech_processor.adetect_language(message)
         
         # Translate message to English if detected language is not English
         if detected_lang != 'en':
-            translated_message = speech_processor.translate_text(message)
+            with stage("translate"):
+                translated_message = await speech_processor.atranslate_text(message)
             if not translated_message:
                 return jsonify({'response': 'Translation failed'}), 500
             message = translated_message
         
         # Pass the explain flag to get_chat_response
         response = await rag_chat.get_chat_response(message, session_id, explain=explain)
+        if 'turn_id' in response:
+            response['explanation_url'] = f"/explanations/{response['turn_id']}"
+            if detected_lang != 'en':
+                response['explanation_url'] += f"?lang={detected_lang}"
         
         # Translate response back to detected language if necessary
         if detected_lang != 'en':
-            response = speech_processor.translate_text(response, target_language=detected_lang)
+            with stage("translate"):
+                response = await speech_processor.atranslate_response(response, target_language=detected_lang)
             if not response:
                 return jsonify({'response': 'Translation failed'}), 500
         
@@ -794,6 +1431,69 @@ async def chat():
     except Exception as e:
         return jsonify({'response': f"Error: {str(e)}"}), 500
 
+@app.route('/explanations/<turn_id>', methods=['GET'])
+async def get_explanation(turn_id):
+    record = get_rag_chat().get_explanation(turn_id)
+    if record is None:
+        return jsonify({'error': 'Unknown or expired turn id'}), 404
+    if record['status'] == 'pending':
+        return jsonify({'turn_id': turn_id, 'status': 'pending'}), 202
+    
+    explanation = record['explanation']
+    target_language = request.args.get('lang')
+    if target_language and target_language != 'en':
+        translated = await get_speech_processor().atranslate_response(
+            {'response': '', 'explanation': explanation}, target_language=target_language
+        )
+        if translated:
+            explanation = translated['explanation']
+    
+    return jsonify({'turn_id': turn_id, 'status': 'ready', 'explanation': explanation}), 200
+
+def format_sse(event: Dict) -> str:
+    """Encode one event as a server-sent events frame."""
+    return f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+
+@app.route('/chat/stream', methods=['POST'])
+async def chat_stream():
+    data = request.get_json()
+    message = data.get('message', '')
+    session_id = data.get('session_id', 'default')
+    
+    if not message:
+        return jsonify({'response': 'No message provided'}), 400
+    
+    speech_processor = get_speech_processor()
+    rag_chat = get_rag_chat()
+    detected_lang = await speech_processor.adetect_language(message)
+    if detected_lang != 'en':
+        translated_message = await speech_processor.atranslate_text(message)
+        if not translated_message:
+            return jsonify({'response': 'Translation failed'}), 500
+        message = translated_message
+
+    def generate():
+        for event in rag_chat.stream_chat_response(message, session_id):
+            if detected_lang == 'en':
+                yield format_sse(event)
+            elif event["event"] == "done":
+                # Token-by-token translation is not possible; non-English clients get the translated answer at the end
+                translated = background_loop.run(speech_processor.atranslate_response(
+                    {"response": event["data"]["response"]}, target_language=detected_lang
+                ))
+                event["data"]["response"] = translated["response"] if translated else event["data"]["response"]
+                yield format_sse(event)
+            elif event["event"] == "error":
+                yield format_sse(event)
+        
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 if __name__ == "__main__":
+    # Load models in the background while already serving; see /ready
+    start_warm_up()
     port = int(os.getenv("PORT", 5001))
     app.run(host="0.0.0.0", port=port, debug=False) 
\ No newline at end of file
@@ -0,0 +1,109 @@
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Dict, List
+
+from langchain_core.embeddings import Embeddings
+
+
+class MicroBatchEmbedder(Embeddings):
+    """Coalesce concurrent embed_query calls into batched forward passes.
+
+    A worker thread takes the first waiting query, keeps collecting for up to
+    `window_ms` or until `max_batch_size` queries are waiting, embeds them all
+    in one embed_documents call and resolves each caller's future. Queries that
+    arrive while a pass runs are picked up by the next one, so batches grow
+    with concurrency. embed_documents is passed straight through; ingestion
+    already batches.
+
+    If the wrapped embeddings cache queries (CachedEmbeddings), hits are
+    answered without queueing and batches go through its query tier.
+    """
+
+    def __init__(self, embeddings: Embeddings, window_ms: float = 5.0, max_batch_size: int = 32):
+        self.embeddings = embeddings
+        self._cached_query = getattr(embeddings, "cached_query", None)
+        self._embed_batch = getattr(embeddings, "embed_queries", embeddings.embed_documents)
+        self.window_ms = window_ms
+        self.max_batch_size = max_batch_size
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._batch_sizes = deque(maxlen=1000)
+        self._queue_delays = deque(maxlen=1000)
+        self.counters = {"queries": 0, "batches": 0, "errors": 0}
+
+    def _ensure_worker(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="embed-batcher", daemon=True)
+                    self._thread.start()
+
+    def embed_query(self, text: str) -> List[float]:
+        if self._cached_query is not None:
+            vector = self._cached_query(text)
+            if vector is not None:
+                return vector
+        self._ensure_worker()
+        future: Future = Future()
+        self._queue.put((text, future, time.perf_counter()))
+        return future.result()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def _collect(self) -> List:
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.window_ms / 1000
+        while len(batch) < self.max_batch_size:
+            try:
+                # Take whatever is already waiting, then wait out the window for stragglers
+                batch.append(self._queue.get_nowait())
+                continue
+            except queue.Empty:
+                pass
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            try:
+                vectors = self._embed_batch([text for text, _, _ in batch])
+            except Exception as e:
+                self.counters["errors"] += 1
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future, enqueued), vector in zip(batch, vectors):
+                self._queue_delays.append(started - enqueued)
+                future.set_result(vector)
+            self._batch_sizes.append(len(batch))
+            self.counters["queries"] += len(batch)
+            self.counters["batches"] += 1
+
+    def stats(self) -> Dict:
+        sizes = list(self._batch_sizes)
+        delays = sorted(self._queue_delays)
+        return {
+            "window_ms": self.window_ms,
+            "max_batch_size": self.max_batch_size,
+            "mean_batch_size": sum(sizes) / len(sizes) if sizes else 0.0,
+            "max_recent_batch_size": max(sizes) if sizes else 0,
+            "queue_delay_mean_ms": sum(delays) / len(delays) * 1000 if delays else 0.0,
+            "queue_delay_p95_ms": delays[int(len(delays) * 0.95)] * 1000 if delays else 0.0,
+            "waiting": self._queue.qsize(),
+            **self.counters
+        }
@@ -0,0 +1,81 @@
+import os
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# Where export_onnx.py writes models unless ONNX_MODEL_ROOT says otherwise
+DEFAULT_ONNX_ROOT = "./models"
+
+# Minimum cosine similarity between ONNX and PyTorch embeddings of the same text;
+# above it, vectors already stored by the torch backend stay comparable
+COSINE_TOLERANCE = 0.99
+
+
+def default_onnx_dir(model_name: str) -> str:
+    return os.path.join(os.getenv("ONNX_MODEL_ROOT", DEFAULT_ONNX_ROOT), model_name.split("/")[-1] + "-onnx")
+
+
+class OnnxEmbeddings(Embeddings):
+    """Sentence-transformers embeddings computed with onnxruntime on CPU.
+
+    Reproduces the all-mpnet-base-v2 pipeline (truncate to 384 tokens, mean
+    pooling over the attention mask, L2 normalisation) on a model exported
+    by export_onnx.py, preferring its int8-quantized variant. Texts are
+    batched by length so padding stays short.
+    """
+
+    def __init__(self, model_dir: str, max_seq_length: int = 384, batch_size: int = 32,
+                 quantized: bool = True, intra_op_threads: int = None):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self.model_dir = model_dir
+        self.batch_size = batch_size
+
+        model_file = "model_quantized.onnx" if quantized else "model.onnx"
+        model_path = os.path.join(model_dir, model_file)
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"{model_path} not found; run export_onnx.py first")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_seq_length)
+        pad_token = "<pad>" if self.tokenizer.token_to_id("<pad>") is not None else "[PAD]"
+        self.tokenizer.enable_padding(pad_id=self.tokenizer.token_to_id(pad_token), pad_token=pad_token)
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.asarray([encoding.ids for encoding in encodings], dtype=np.int64)
+        attention_mask = np.asarray([encoding.attention_mask for encoding in encodings], dtype=np.int64)
+
+        inputs = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            inputs["token_type_ids"] = np.zeros_like(input_ids)
+        token_embeddings = self.session.run(None, inputs)[0]
+
+        mask = attention_mask[..., None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        texts = [text.replace("\n", " ") for text in texts]
+        vectors = np.empty((len(texts), 0), dtype=np.float32)
+        # Longest first, so each batch pads to similar lengths
+        order = sorted(range(len(texts)), key=lambda idx: len(texts[idx]), reverse=True)
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            embedded = self._embed_batch([texts[idx] for idx in batch])
+            if vectors.shape[1] == 0:
+                vectors = np.empty((len(texts), embedded.shape[1]), dtype=np.float32)
+            vectors[batch] = embedded
+        return vectors.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
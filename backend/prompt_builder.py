@@ -0,0 +1,119 @@
+import math
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+from langchain_core.documents import Document
+
+# Gemini and GPT tokenizers average roughly four characters per token on English text
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def truncate_to_tokens(text: str, tokens: int) -> str:
+    """Cut text to about `tokens` tokens at a word boundary."""
+    limit = tokens * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    cut = text[:limit]
+    boundary = cut.rfind(" ")
+    if boundary > limit // 2:
+        cut = cut[:boundary]
+    return cut.rstrip() + " …"
+
+
+@dataclass
+class BuiltPrompt:
+    """The sections of a prompt that fit the budget, with token accounting."""
+    context: str
+    history: str
+    documents: List[Tuple[Document, float]]
+    tokens: Dict[str, int] = field(default_factory=dict)
+    chunks_dropped: int = 0
+    chunks_truncated: int = 0
+    messages_dropped: int = 0
+    messages_truncated: int = 0
+
+    def to_dict(self) -> Dict:
+        return {
+            "tokens": self.tokens,
+            "chunks_used": len(self.documents),
+            "chunks_dropped": self.chunks_dropped,
+            "chunks_truncated": self.chunks_truncated,
+            "messages_dropped": self.messages_dropped,
+            "messages_truncated": self.messages_truncated
+        }
+
+
+class PromptBuilder:
+    """Fill a prompt token budget in priority order.
+
+    The system prompt and the question are always included. Retrieved chunks
+    come next, best score first; a chunk that does not fit whole is truncated
+    if at least `min_chunk_tokens` remain, and lower-scoring chunks are
+    dropped. The remaining budget goes to chat history, newest message first,
+    with each message capped at `max_message_tokens` so one long markdown
+    answer cannot crowd out the rest of the conversation.
+    """
+
+    def __init__(self, max_tokens: int = 4000, min_chunk_tokens: int = 64, max_message_tokens: int = 300):
+        self.max_tokens = max_tokens
+        self.min_chunk_tokens = min_chunk_tokens
+        self.max_message_tokens = max_message_tokens
+
+    def build(self, system_prompt: str, question: str, documents: List[Tuple[Document, float]],
+              history: List[Dict]) -> BuiltPrompt:
+        tokens = {"system": estimate_tokens(system_prompt), "question": estimate_tokens(question)}
+        remaining = self.max_tokens - tokens["system"] - tokens["question"]
+
+        # Retrieved chunks, highest score first
+        chunks = []
+        used_documents = []
+        truncated_chunks = 0
+        for doc, score in sorted(documents, key=lambda item: item[1], reverse=True):
+            text = doc.page_content
+            cost = estimate_tokens(text)
+            if cost > remaining:
+                if remaining < self.min_chunk_tokens:
+                    break
+                text = truncate_to_tokens(text, remaining)
+                cost = estimate_tokens(text)
+                truncated_chunks += 1
+            chunks.append(text)
+            used_documents.append((doc, score))
+            remaining -= cost
+        tokens["context"] = sum(estimate_tokens(chunk) for chunk in chunks)
+
+        # Chat history, most recent message first, restored to chronological order
+        lines = []
+        truncated_messages = 0
+        for message in reversed(history):
+            content = message["content"]
+            truncated = estimate_tokens(content) > self.max_message_tokens
+            if truncated:
+                content = truncate_to_tokens(content, self.max_message_tokens)
+            line = f"{message['role'].upper()}: {content}\n"
+            cost = estimate_tokens(line)
+            if cost > remaining:
+                break
+            lines.append(line)
+            remaining -= cost
+            truncated_messages += truncated
+        lines.reverse()
+        history_text = "\nPrevious Conversation Context:\n" + "".join(lines) if lines else ""
+        tokens["history"] = estimate_tokens(history_text)
+        tokens["total"] = sum(tokens.values())
+        tokens["budget"] = self.max_tokens
+
+        return BuiltPrompt(
+            context="\n\n".join(chunks),
+            history=history_text,
+            documents=used_documents,
+            tokens=tokens,
+            chunks_dropped=len(documents) - len(used_documents),
+            chunks_truncated=truncated_chunks,
+            messages_dropped=len(history) - len(lines),
+            messages_truncated=truncated_messages
+        )
@@ -0,0 +1,110 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+DEFAULT_RERANK_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+
+class CrossEncoderReranker:
+    """Rerank retrieval candidates with a small cross-encoder under a time budget.
+
+    All (query, chunk) pairs of a request are scored in one batched CPU
+    forward pass on a dedicated thread. The caller waits at most
+    `budget_ms`; if scoring (including a first-use model load) takes longer,
+    or `max_pending` requests are already queued, rerank() returns None and
+    the caller keeps its own order.
+    """
+
+    def __init__(self, model_name: str = DEFAULT_RERANK_MODEL, budget_ms: float = 150.0,
+                 max_length: int = 512, max_pending: int = 2):
+        self.model_name = model_name
+        self.budget_ms = budget_ms
+        self.max_length = max_length
+        self.max_pending = max_pending
+
+        self._model = None
+        self._load_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rerank")
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        self._latencies = deque(maxlen=500)
+        self.counters = {"requests": 0, "reranked": 0, "timeouts": 0, "skipped_busy": 0, "errors": 0}
+        self.load_time = None
+
+    def _load(self):
+        with self._load_lock:
+            if self._model is None:
+                from sentence_transformers import CrossEncoder
+
+                start_time = time.time()
+                self._model = CrossEncoder(self.model_name, max_length=self.max_length, device="cpu")
+                self.load_time = time.time() - start_time
+                print(f"Loaded rerank model {self.model_name} in {self.load_time:.2f}s")
+        return self._model
+
+    def warm_up(self):
+        self.score("warm up", ["warm up"])
+
+    def score(self, query: str, texts: List[str]) -> np.ndarray:
+        """Score every (query, text) pair in one batch; blocks without a budget."""
+        model = self._load()
+        return np.asarray(model.predict([(query, text) for text in texts], batch_size=len(texts) or 1))
+
+    def _score_job(self, query: str, texts: List[str]) -> np.ndarray:
+        try:
+            return self.score(query, texts)
+        finally:
+            with self._pending_lock:
+                self._pending -= 1
+
+    def rerank(self, query: str, documents: List[Document], k: int) -> Optional[List[Tuple[Document, float]]]:
+        """Return the top-k documents by cross-encoder score, or None if the budget ran out."""
+        if not documents:
+            return []
+        self.counters["requests"] += 1
+
+        with self._pending_lock:
+            if self._pending >= self.max_pending:
+                self.counters["skipped_busy"] += 1
+                return None
+            self._pending += 1
+
+        start_time = time.perf_counter()
+        future = self._executor.submit(self._score_job, query, [doc.page_content for doc in documents])
+        try:
+            scores = future.result(timeout=self.budget_ms / 1000)
+        except TimeoutError:
+            # The pass finishes in the background; this request keeps its fused order
+            self.counters["timeouts"] += 1
+            return None
+        except Exception as e:
+            print(f"Rerank error: {e}")
+            self.counters["errors"] += 1
+            return None
+
+        self._latencies.append(time.perf_counter() - start_time)
+        self.counters["reranked"] += 1
+        top = np.argsort(-scores)[:k]
+        reranked = []
+        for idx in top:
+            doc = documents[idx]
+            doc.metadata["rerank_score"] = float(scores[idx])
+            reranked.append((doc, float(scores[idx])))
+        return reranked
+
+    def stats(self) -> Dict:
+        latencies = sorted(self._latencies)
+        return {
+            "model": self.model_name,
+            "loaded": self._model is not None,
+            "load_time": self.load_time,
+            "budget_ms": self.budget_ms,
+            "latency_p50_ms": latencies[len(latencies) // 2] * 1000 if latencies else None,
+            "latency_p95_ms": latencies[int(len(latencies) * 0.95)] * 1000 if latencies else None,
+            **self.counters
+        }
@@ -0,0 +1,160 @@
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+_WHITESPACE = re.compile(r"\s+")
+_TRAILING_PUNCTUATION = re.compile(r"[\s?.!,;:]+$")
+
+
+def normalise_query(text: str) -> str:
+    """Case, spacing and trailing punctuation do not change what a question retrieves."""
+    return _TRAILING_PUNCTUATION.sub("", _WHITESPACE.sub(" ", text.strip().lower()))
+
+
+INDEX_VERSION_FILE = "index_version"
+
+
+class IndexVersion:
+    """Counter bumped whenever the vector store changes.
+
+    With a path, the version is shared between processes through a small
+    token file: bump() rewrites it, and reading ``value`` notices (at most
+    every ``check_interval`` seconds) when another worker or an offline
+    ingestion rewrote it. Listeners are called as ``callback(value, external)``
+    whenever the version moves, so each worker can drop what it cached; for
+    external changes they run before the new value is published.
+    """
+
+    def __init__(self, path: str = None, check_interval: float = 1.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._value = 0
+        # Held while a change is detected and its listeners run
+        self._sync_lock = threading.Lock()
+        self._listeners: List[Callable[[int, bool], None]] = []
+        self._token = self._read_token()
+        self._checked_at = time.monotonic()
+
+    @classmethod
+    def for_directory(cls, persist_directory: str, **kwargs) -> "IndexVersion":
+        """The version shared by every process using this vector store directory."""
+        return cls(os.path.join(persist_directory, INDEX_VERSION_FILE), **kwargs)
+
+    def add_listener(self, callback: Callable[[int, bool], None]):
+        self._listeners.append(callback)
+
+    @property
+    def value(self) -> int:
+        if self.path and time.monotonic() - self._checked_at >= self.check_interval:
+            # Requests never wait for another thread's reload; they read the current value
+            self.sync(wait=False)
+        return self._value
+
+    def _read_token(self) -> Optional[str]:
+        if not self.path:
+            return None
+        try:
+            with open(self.path) as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def sync(self, wait: bool = True) -> int:
+        """Pick up a bump made by another process now; its listeners have run when this returns."""
+        if not self._sync_lock.acquire(blocking=wait):
+            return self._value
+        try:
+            self._checked_at = time.monotonic()
+            token = self._read_token()
+            if token != self._token:
+                self._token = token
+                self._notify(self._value + 1, external=True)
+                self._value += 1
+            return self._value
+        finally:
+            self._sync_lock.release()
+
+    def bump(self, *_) -> int:
+        with self._sync_lock:
+            if self.path:
+                token = f"{os.getpid()}-{time.time_ns()}"
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                temp_path = f"{self.path}.{os.getpid()}.tmp"
+                with open(temp_path, "w") as f:
+                    f.write(token)
+                os.replace(temp_path, self.path)
+                self._token = token
+            self._value += 1
+            value = self._value
+        self._notify(value, external=False)
+        return value
+
+    def _notify(self, value: int, external: bool):
+        for callback in self._listeners:
+            try:
+                callback(value, external)
+            except Exception as e:
+                print(f"Index version listener error: {e}")
+
+
+class RetrievalCache:
+    """Exact-match LRU cache of query embeddings and retrieval results.
+
+    Keys are the normalised query plus the retrieval parameters. Each entry
+    records the index version it was computed against; once ingestion bumps
+    the version, older entries are treated as misses and dropped.
+    """
+
+    def __init__(self, version: IndexVersion, max_entries: int = 2048):
+        self.version = version
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "stale": 0, "evictions": 0}
+
+    def get(self, query: str, params: Tuple) -> Optional[Dict]:
+        """Return {'embedding', 'docs'} for the query, or None."""
+        key = (normalise_query(query), params)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry["version"] != self.version.value:
+                del self._entries[key]
+                self.counters["stale"] += 1
+                entry = None
+            if entry is None:
+                self.counters["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.counters["hits"] += 1
+            return {"embedding": entry["embedding"], "docs": list(entry["docs"]) if entry["docs"] is not None else None}
+
+    def put(self, query: str, params: Tuple, embedding: List[float], docs: Optional[List], version: int):
+        """Store results computed against index `version` (read before retrieval started)."""
+        if version != self.version.value:
+            # Ingestion finished while we were retrieving; these results may already be stale
+            return
+        key = (normalise_query(query), params)
+        with self._lock:
+            self._entries[key] = {
+                "embedding": embedding,
+                "docs": list(docs) if docs is not None else None,
+                "version": version
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.counters["evictions"] += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.counters["hits"] + self.counters["misses"]
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "index_version": self.version.value,
+                "hit_rate": self.counters["hits"] / lookups if lookups else 0.0,
+                **self.counters
+            }
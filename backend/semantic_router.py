@@ -0,0 +1,163 @@
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+# Exemplar queries per route; each route is represented by the normalised mean of its exemplars
+DEFAULT_ROUTES: Dict[str, List[str]] = {
+    "insurance": [
+        "What is the surrender value of my life insurance policy?",
+        "How do I file a death claim with LIC?",
+        "What riders can I add to a term plan?",
+        "When is my policy premium due and how can I pay it?",
+        "What is the maturity benefit of an endowment plan?",
+        "How do I change the nominee on my insurance policy?",
+        "Does health insurance cover pre-existing diseases?",
+        "How is the bonus calculated on a participating policy?",
+        "Can I get a loan against my life insurance policy?",
+        "What happens if my policy lapses because I missed a premium?",
+        "Which pension plan gives a guaranteed annuity?",
+        "What tax benefits do I get on insurance premiums?",
+    ],
+    "government": [
+        "How do I apply for a new Aadhaar card?",
+        "How can I update the address on my Aadhaar?",
+        "What documents are needed for a passport application?",
+        "How do I link my PAN card with Aadhaar?",
+        "How to register for a voter ID card?",
+        "Who is eligible for a ration card?",
+        "How do I apply for an income certificate?",
+        "What government schemes are available for farmers?",
+        "How can I book an appointment at the Aadhaar Seva Kendra?",
+        "How do I get a driving licence renewed?",
+        "How to apply for a caste certificate online?",
+        "Where can I check my PM Kisan payment status?",
+    ],
+    "general": [
+        "Hi, how are you?",
+        "Tell me a joke",
+        "What is the weather like today?",
+        "Write a short poem about the sea",
+        "What is the capital of France?",
+        "Thank you for your help",
+        "Can you translate this sentence into Hindi?",
+        "Explain how a neural network works",
+        "Order an iPad from Amazon for me",
+        "Recommend a good book to read",
+        "What time is it in London?",
+        "Good morning!",
+    ],
+}
+
+# Routes whose answers come from the document store
+DEFAULT_RETRIEVAL_ROUTES = ("insurance", "government")
+
+
+@dataclass
+class RouteDecision:
+    """Outcome of routing one query."""
+    route: str
+    score: float
+    scores: Dict[str, float]
+    retrieve: bool
+    keyword_phrase: str = None
+
+    def to_dict(self) -> Dict:
+        return {
+            "route": self.route,
+            "score": self.score,
+            "scores": self.scores,
+            "retrieve": self.retrieve,
+            "keyword_phrase": self.keyword_phrase
+        }
+
+
+class SemanticRouter:
+    """Decides whether a query needs RAG retrieval from its embedding.
+
+    Route centroids are embedded once (one batch, on first use); routing a query
+    is then a single matrix-vector product against the centroids, reusing the
+    query embedding that retrieval needs anyway.
+
+    Retrieval runs when the best route is a retrieval route with a score of at
+    least ``min_score`` that beats the best non-retrieval route by ``margin``, or
+    when the query contains an exact keyword phrase.
+    """
+
+    def __init__(self, embeddings, routes: Dict[str, List[str]] = None,
+                 retrieval_routes: Sequence[str] = DEFAULT_RETRIEVAL_ROUTES,
+                 min_score: float = 0.25, margin: float = 0.0):
+        self.embeddings = embeddings
+        self.routes = routes or DEFAULT_ROUTES
+        self.retrieval_routes = set(retrieval_routes)
+        self.min_score = min_score
+        self.margin = margin
+
+        self.route_names = list(self.routes)
+        self._retrieval_mask = np.array([name in self.retrieval_routes for name in self.route_names])
+        self._centroids = None
+        self._lock = threading.Lock()
+
+        self.counts = {name: 0 for name in self.route_names}
+        self.retrievals = 0
+        self.retrievals_skipped = 0
+
+    def _get_centroids(self) -> np.ndarray:
+        if self._centroids is None:
+            with self._lock:
+                if self._centroids is None:
+                    texts = [text for name in self.route_names for text in self.routes[name]]
+                    vectors = np.asarray(self.embeddings.embed_documents(texts), dtype=np.float32)
+                    vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+                    centroids = []
+                    offset = 0
+                    for name in self.route_names:
+                        count = len(self.routes[name])
+                        centroids.append(vectors[offset:offset + count].mean(axis=0))
+                        offset += count
+                    centroids = np.stack(centroids)
+                    centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+                    self._centroids = centroids
+        return self._centroids
+
+    def route(self, query_embedding, keyword_phrase: str = None) -> RouteDecision:
+        """Route a query given its embedding and any exact keyword phrase found in it."""
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        scores = self._get_centroids() @ query
+
+        best = int(np.argmax(scores))
+        route = self.route_names[best]
+        best_retrieval = float(scores[self._retrieval_mask].max()) if self._retrieval_mask.any() else -1.0
+        best_other = float(scores[~self._retrieval_mask].max()) if (~self._retrieval_mask).any() else -1.0
+
+        retrieve = bool(keyword_phrase) or (
+            route in self.retrieval_routes
+            and best_retrieval >= self.min_score
+            and best_retrieval - best_other >= self.margin
+        )
+
+        self.counts[route] += 1
+        if retrieve:
+            self.retrievals += 1
+        else:
+            self.retrievals_skipped += 1
+
+        return RouteDecision(
+            route=route,
+            score=float(scores[best]),
+            scores={name: float(score) for name, score in zip(self.route_names, scores)},
+            retrieve=retrieve,
+            keyword_phrase=keyword_phrase
+        )
+
+    def stats(self) -> Dict:
+        return {
+            "routes": dict(self.counts),
+            "retrievals": self.retrievals,
+            "retrievals_skipped": self.retrievals_skipped,
+            "min_score": self.min_score,
+            "margin": self.margin
+        }
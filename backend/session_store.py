@@ -0,0 +1,282 @@
+import atexit
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from pymongo import UpdateOne
+from pymongo.errors import PyMongoError
+
+
+def _message_bytes(message: Dict) -> int:
+    return sys.getsizeof(message) + sum(sys.getsizeof(value) for value in message.values())
+
+
+class InMemorySessionStore:
+    """Chat histories in an LRU map with a TTL and a cap on sessions.
+
+    Sessions are kept in access order, so the least recently used one is
+    evicted when ``max_sessions`` is exceeded and expired ones are dropped
+    from the front whenever a session is written. The TTL is idle time by
+    default; with ``sliding=False`` it counts from when the session was put,
+    which suits a cache in front of a shared store.
+    """
+
+    def __init__(self, max_sessions: int = 10000, ttl: float = 3600.0, max_messages: int = 10,
+                 sliding: bool = True):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.max_messages = max_messages
+        self.sliding = sliding
+        self._sessions: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    def _live(self, session_id: str, now: float) -> Optional[Dict]:
+        session = self._sessions.get(session_id)
+        if session is not None and now - session["last_access"] > self.ttl:
+            del self._sessions[session_id]
+            self.counters["expirations"] += 1
+            session = None
+        return session
+
+    def _purge_expired(self, now: float):
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session["last_access"] <= self.ttl:
+                break
+            del self._sessions[session_id]
+            self.counters["expirations"] += 1
+
+    def get(self, session_id: str) -> List[Dict]:
+        """Return a copy of the session's messages, oldest first ([] if unknown)."""
+        now = time.time()
+        with self._lock:
+            session = self._live(session_id, now)
+            if session is None:
+                self.counters["misses"] += 1
+                return []
+            self.counters["hits"] += 1
+            if self.sliding:
+                session["last_access"] = now
+            self._sessions.move_to_end(session_id)
+            return list(session["messages"])
+
+    def contains(self, session_id: str) -> bool:
+        with self._lock:
+            return self._live(session_id, time.time()) is not None
+
+    def put(self, session_id: str, messages: List[Dict]):
+        """Replace a session's messages (used to fill the cache from a backing store)."""
+        now = time.time()
+        with self._lock:
+            self._sessions[session_id] = {"messages": list(messages[-self.max_messages:]), "last_access": now}
+            self._sessions.move_to_end(session_id)
+            self._evict(now)
+
+    def append(self, session_id: str, message: Dict):
+        self.extend(session_id, [message])
+
+    def extend(self, session_id: str, messages: List[Dict], create: bool = True):
+        """Append several messages at once, so readers never see only some of them.
+
+        With ``create=False`` a session that is not held (or has expired) is
+        left alone instead of being started from these messages.
+        """
+        now = time.time()
+        with self._lock:
+            session = self._live(session_id, now)
+            if session is None:
+                if not create:
+                    return
+                session = {"messages": [], "last_access": now}
+                self._sessions[session_id] = session
+            session["messages"].extend(messages)
+            del session["messages"][:-self.max_messages]
+            if self.sliding:
+                session["last_access"] = now
+            self._sessions.move_to_end(session_id)
+            self._evict(now)
+
+    def _evict(self, now: float):
+        self._purge_expired(now)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.counters["evictions"] += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            messages = [message for session in self._sessions.values() for message in session["messages"]]
+            return {
+                "backend": "memory",
+                "sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "messages": len(messages),
+                "approx_bytes": sum(_message_bytes(message) for message in messages),
+                **self.counters
+            }
+
+
+class MongoSessionStore:
+    """Chat histories persisted in MongoDB and shared between workers.
+
+    Reads go through a local LRU whose entries expire ``cache_ttl`` seconds
+    after they were loaded, however often they are read, so each turn
+    re-reads the session from Mongo and sees messages written by other
+    workers; the short TTL only saves repeat reads within one turn. Writes
+    update the local copy immediately and are queued for a background thread
+    that flushes them in one ``bulk_write`` every ``flush_interval`` seconds,
+    so persisting a turn never adds a round trip to the response.
+    """
+
+    def __init__(self, db, collection_name: str = "ChatSessions", max_messages: int = 10,
+                 max_sessions: int = 10000, cache_ttl: float = 2.0, session_ttl: float = 7 * 24 * 3600,
+                 flush_interval: float = 0.5, max_batch: int = 500):
+        self.collection = db[collection_name]
+        self.max_messages = max_messages
+        self.session_ttl = session_ttl
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.cache = InMemorySessionStore(max_sessions=max_sessions, ttl=cache_ttl, max_messages=max_messages,
+                                          sliding=False)
+
+        self._pending: Dict[str, List[Dict]] = {}
+        # Batch being written by flush(); a reload meanwhile may not see it in Mongo yet
+        self._flushing: Dict[str, List[Dict]] = {}
+        self._pending_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        self.counters = {"loads": 0, "flushes": 0, "writes": 0, "write_failures": 0, "load_failures": 0}
+        self._ttl_index_ready = False
+
+        self._thread = threading.Thread(target=self._run, name="session-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def get(self, session_id: str) -> List[Dict]:
+        if self.cache.contains(session_id):
+            return self.cache.get(session_id)
+
+        self.counters["loads"] += 1
+        try:
+            document = self.collection.find_one({"_id": session_id}, {"messages": 1})
+        except PyMongoError as e:
+            print(f"Session load error: {e}")
+            self.counters["load_failures"] += 1
+            return []
+        messages = (document or {}).get("messages", [])
+        # Writes queued here but not yet flushed are newer than what Mongo returned
+        with self._pending_lock:
+            in_flight = self._flushing.get(session_id, [])
+            if in_flight and messages[-len(in_flight):] != in_flight:
+                messages = messages + in_flight
+            messages = messages + self._pending.get(session_id, [])
+            self.cache.put(session_id, messages)
+        return messages[-self.max_messages:]
+
+    def append(self, session_id: str, message: Dict):
+        self.extend(session_id, [message])
+
+    def extend(self, session_id: str, messages: List[Dict]):
+        # Write-only: the $push needs no prior read. The local copy is only updated while it
+        # is cached; otherwise the next get() loads Mongo plus the pending messages. Both
+        # happen under the pending lock so a concurrent load sees the messages exactly once.
+        with self._pending_lock:
+            self.cache.extend(session_id, messages, create=False)
+            self._pending.setdefault(session_id, []).extend(messages)
+            pending = len(self._pending)
+        if pending >= self.max_batch:
+            self._wake.set()
+
+    def _run(self):
+        while not self._stopped:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def _ensure_ttl_index(self):
+        if self._ttl_index_ready:
+            return
+        # Mongo removes sessions idle for longer than session_ttl
+        self.collection.create_index("updated_at", expireAfterSeconds=int(self.session_ttl))
+        self._ttl_index_ready = True
+
+    def flush(self):
+        """Write all queued messages to Mongo in one bulk request."""
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+            self._flushing = pending
+        if not pending:
+            return
+
+        now = time.time()
+        operations = [
+            UpdateOne(
+                {"_id": session_id},
+                {
+                    "$push": {"messages": {"$each": messages, "$slice": -self.max_messages}},
+                    "$currentDate": {"updated_at": True}
+                },
+                upsert=True
+            )
+            for session_id, messages in pending.items()
+        ]
+        try:
+            self._ensure_ttl_index()
+            self.collection.bulk_write(operations, ordered=False)
+            self.counters["flushes"] += 1
+            self.counters["writes"] += len(operations)
+        except PyMongoError as e:
+            print(f"Session flush error: {e}")
+            self.counters["write_failures"] += len(operations)
+            # Put the batch back in front of anything queued meanwhile and retry on the next tick
+            with self._pending_lock:
+                for session_id, messages in pending.items():
+                    newer = self._pending.get(session_id, [])
+                    self._pending[session_id] = (messages + newer)[-self.max_messages:]
+        with self._pending_lock:
+            self._flushing = {}
+        self.counters["last_flush_seconds"] = round(time.time() - now, 4)
+
+    def close(self):
+        self._stopped = True
+        self._wake.set()
+        self.flush()
+
+    def stats(self) -> Dict:
+        with self._pending_lock:
+            pending = sum(len(messages) for messages in self._pending.values())
+        return {
+            **self.cache.stats(),
+            "backend": "mongo",
+            "pending_messages": pending,
+            **self.counters
+        }
+
+
+def create_session_store(db=None):
+    """Build the store selected by SESSION_STORE ('memory' or 'mongo')."""
+    backend = os.getenv("SESSION_STORE", "memory").lower()
+    max_messages = int(os.getenv("SESSION_MAX_MESSAGES", 10))
+    max_sessions = int(os.getenv("SESSION_MAX_SESSIONS", 10000))
+
+    if backend == "mongo":
+        if db is None:
+            raise ValueError("SESSION_STORE=mongo needs a MongoDB database")
+        return MongoSessionStore(
+            db,
+            max_messages=max_messages,
+            max_sessions=max_sessions,
+            cache_ttl=float(os.getenv("SESSION_CACHE_TTL", 2)),
+            session_ttl=float(os.getenv("SESSION_TTL", 7 * 24 * 3600)),
+            flush_interval=float(os.getenv("SESSION_FLUSH_INTERVAL", 0.5))
+        )
+    if backend != "memory":
+        raise ValueError(f"Unknown SESSION_STORE: {backend}")
+    return InMemorySessionStore(
+        max_sessions=max_sessions,
+        ttl=float(os.getenv("SESSION_TTL", 3600)),
+        max_messages=max_messages
+    )
@@ -0,0 +1,41 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+# Stage durations (seconds) of the request being handled. The dict is shared,
+# not copied, so stages recorded from asyncio.to_thread workers and awaited
+# coroutines land in the same request's timings.
+_stages: ContextVar[Optional[Dict[str, float]]] = ContextVar("stage_timings", default=None)
+
+
+def start_request() -> Dict[str, float]:
+    """Begin collecting stage timings for the current request."""
+    stages: Dict[str, float] = {}
+    _stages.set(stages)
+    return stages
+
+
+def current() -> Optional[Dict[str, float]]:
+    return _stages.get()
+
+
+def record(name: str, seconds: float):
+    """Add time to a stage; repeated stages (e.g. two translations) accumulate. No-op outside a request."""
+    stages = _stages.get()
+    if stages is not None:
+        stages[name] = stages.get(name, 0.0) + seconds
+
+
+@contextmanager
+def stage(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+def server_timing_header(stages: Dict[str, float]) -> str:
+    """Format stages as a Server-Timing header value, durations in milliseconds."""
+    return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in stages.items())
@@ -0,0 +1,112 @@
+import html
+import re
+from typing import List
+
+# Markdown that must reach the user untouched. Block markup (code blocks, line
+# prefixes, rules, table pipes, line breaks) separates segments; inline markup
+# (code spans, URLs, link targets, emphasis) stays inside its sentence as a
+# placeholder, so the translator sees whole sentences.
+_MARKUP = re.compile(
+    r"(?P<block>```.*?(?:```|\Z))"                      # fenced code blocks
+    r"|(?P<code>`[^`\n]+`)"                            # inline code
+    r"|(?P<target>\]\([^)\n]*\))"                      # link targets: ](https://...)
+    r"|(?P<url><?https?://[^\s)>\]]+>?)"               # bare URLs
+    r"|(?P<prefix>^[ \t]*(?:#{1,6}|[-*+]|\d+[.)]|>)[ \t]+)"  # headings, list items, quotes
+    r"|(?P<rule>^[ \t]*[-*_:| ]{3,}[ \t]*$)"           # rules and table separators
+    r"|(?P<pipe>\|)"                                   # table cells are translated one by one
+    r"|(?P<emphasis>\*\*|__|~~|\*|\[)"                 # emphasis, link openers
+    r"|(?P<newline>\n+)",                              # line breaks keep segments to single lines
+    re.S | re.M
+)
+
+_INLINE_GROUPS = {"code", "target", "url", "emphasis"}
+
+# Sent with format=html: the API leaves translate="no" spans alone and moves them with the words
+_PLACEHOLDER = '<span translate="no">{}</span>'
+_PLACEHOLDER_PATTERN = re.compile(r"""<span[^>]*\btranslate=["']?no["']?[^>]*>(.*?)</span>""", re.S | re.I)
+
+_HAS_LETTER = re.compile(r"[^\W\d_]")
+
+# Format to request from the translation API for MarkdownDocument segments
+SEGMENT_FORMAT = "html"
+
+
+class MarkdownDocument:
+    """A markdown string split into protected block markup and translatable segments.
+
+    Each segment is one line (or table cell) of prose encoded as HTML, with its
+    inline markup swapped for placeholders the translator must not touch;
+    rebuild() restores the markup from the translated segments.
+    """
+
+    def __init__(self, text: str):
+        self.parts: List[str] = []
+        self.segment_indices: List[int] = []
+
+        pieces: List[tuple] = []
+        position = 0
+        for match in _MARKUP.finditer(text):
+            if match.start() > position:
+                pieces.append((False, text[position:match.start()]))
+            if match.lastgroup in _INLINE_GROUPS:
+                pieces.append((True, match.group(0)))
+            else:
+                self._add_segment(pieces)
+                pieces = []
+                self.parts.append(match.group(0))
+            position = match.end()
+        if position < len(text):
+            pieces.append((False, text[position:]))
+        self._add_segment(pieces)
+
+    def _add_segment(self, pieces: List[tuple]):
+        """Add one run of prose and inline markup; (is_markup, text) pieces."""
+        raw = "".join(text for _, text in pieces)
+        if not any(not is_markup and _HAS_LETTER.search(text) for is_markup, text in pieces):
+            if raw:
+                self.parts.append(raw)
+            return
+
+        # Keep surrounding whitespace out of the request and put it back verbatim
+        core = raw.strip()
+        start = raw.index(core)
+        if start:
+            self.parts.append(raw[:start])
+
+        encoded, offset = [], 0
+        for is_markup, text in pieces:
+            # Trim the pieces to the stripped core
+            begin, end = max(start - offset, 0), min(start + len(core) - offset, len(text))
+            offset += len(text)
+            text = text[begin:end]
+            if not text:
+                continue
+            encoded.append(_PLACEHOLDER.format(html.escape(text)) if is_markup else html.escape(text, quote=False))
+        self.segment_indices.append(len(self.parts))
+        self.parts.append("".join(encoded))
+
+        if start + len(core) < len(raw):
+            self.parts.append(raw[start + len(core):])
+
+    @property
+    def segments(self) -> List[str]:
+        """Segments to translate, as HTML; request them with SEGMENT_FORMAT."""
+        return [self.parts[index] for index in self.segment_indices]
+
+    @staticmethod
+    def decode(segment: str) -> str:
+        """Turn a (translated) HTML segment back into markdown, restoring its placeholders."""
+        out, position = [], 0
+        for match in _PLACEHOLDER_PATTERN.finditer(segment):
+            out.append(html.unescape(segment[position:match.start()]))
+            out.append(html.unescape(match.group(1)))
+            position = match.end()
+        out.append(html.unescape(segment[position:]))
+        return "".join(out)
+
+    def rebuild(self, translations: List[str]) -> str:
+        """Reassemble the document with the translated segments in place."""
+        parts = list(self.parts)
+        for index, translated in zip(self.segment_indices, translations):
+            parts[index] = self.decode(translated)
+        return "".join(parts)
@@ -17,6 +17,8 @@ interface Message {
   file?: File | null;
   image?: string;
   audio?: string;
+  // A PDF upload rejected because a different file already has its name; offered for replacement
+  replaceFile?: File;
   reasoning?: {
     query_analysis: string;
     retrieval_analysis: string;
@@ -277,6 +279,11 @@ export const ChatArea: React.FC<ChatAreaProps> = ({ className, category }) => {
       };
   
       setMessages((prev) => [...prev, botMessage]);
+
+      // The explanation is generated after the answer; fetch it once it is ready
+      if (data.response.explanation_url) {
+        pollExplanation(botMessage.id, data.response.explanation_url);
+      }
     } catch (error) {
       console.error('Error fetching from backend:', error);
       const errorMessage: Message = {
@@ -291,6 +298,25 @@ export const ChatArea: React.FC<ChatAreaProps> = ({ className, category }) => {
     }
   };
 
+  const pollExplanation = async (messageId: number, explanationUrl: string) => {
+    try {
+      for (let attempt = 0; attempt < 60; attempt++) {
+        const response = await fetch(`http://localhost:5001${explanationUrl}`);
+        if (response.status === 200) {
+          const data = await response.json();
+          setMessages(prev => prev.map(msg =>
+            msg.id === messageId ? { ...msg, reasoning: data.explanation } : msg
+          ));
+          return;
+        }
+        if (response.status !== 202) return;
+        await new Promise(resolve => setTimeout(resolve, 1000));
+      }
+    } catch (error) {
+      console.error('Error fetching explanation:', error);
+    }
+  };
+
   const handleFileChange = (e: React.ChangeEvent<HTMLInputElement>) => {
     if (e.target.files?.[0]) {
       const selectedFile = e.target.files[0];
@@ -303,11 +329,12 @@ export const ChatArea: React.FC<ChatAreaProps> = ({ className, category }) => {
     }
   };
 
-  const handlePdfProcessing = async (pdfFile: File) => {
+  const handlePdfProcessing = async (pdfFile: File, replace = false) => {
     setLoading(true);
     const formData = new FormData();
     formData.append('pdf', pdfFile);
     formData.append('session_id', sessionId || '');
+    formData.append('replace', replace ? 'true' : 'false');
 
     try {
       const response = await fetch('http://localhost:5001/process-pdf', {
@@ -315,7 +342,31 @@ export const ChatArea: React.FC<ChatAreaProps> = ({ className, category }) => {
         body: formData,
       });
       
-      const data = await response.json();
+      let data = await response.json();
+
+      // Ingestion runs in the background; poll the job until it finishes
+      while (data.job_id && (data.status === 'queued' || data.status === 'running')) {
+        await new Promise(resolve => setTimeout(resolve, 1000));
+        const jobResponse = await fetch(`http://localhost:5001/jobs/${data.job_id}`);
+        data = await jobResponse.json();
+      }
+
+      if (data.status === 'failed' && data.conflict) {
+        // Same name, different document: explain and let the user replace the stored one
+        const conflictMessage: Message = {
+          id: Date.now() + 1,
+          text: data.response,
+          sender: 'bot',
+          timestamp: new Date(),
+          replaceFile: pdfFile,
+        };
+        setMessages(prev => [...prev, conflictMessage]);
+        return;
+      }
+
+      if (data.status === 'failed') {
+        throw new Error(data.error || 'PDF ingestion failed');
+      }
       
       const botMessage: Message = {
         id: Date.now() + 1,
@@ -339,6 +390,13 @@ export const ChatArea: React.FC<ChatAreaProps> = ({ className, category }) => {
     }
   };
   
+  const replaceUploadedPdf = (messageId: number, pdfFile: File) => {
+    setMessages(prev => prev.map(msg =>
+      msg.id === messageId ? { ...msg, replaceFile: undefined } : msg
+    ));
+    handlePdfProcessing(pdfFile, true);
+  };
+  
   const openCameraPreview = async () => {
     try {
       // Stop any existing stream
@@ -589,6 +647,15 @@ export const ChatArea: React.FC<ChatAreaProps> = ({ className, category }) => {
               <>
                 <ReactMarkdown>{msg.text}</ReactMarkdown>
                 {msg.reasoning && <ReasoningDisplay reasoning={msg.reasoning} />}
+                {msg.replaceFile && (
+                  <button
+                    onClick={() => replaceUploadedPdf(msg.id, msg.replaceFile!)}
+                    disabled={loading}
+                    className="mt-2 px-3 py-1 text-sm rounded-md bg-blue-700 text-white hover:bg-blue-600 disabled:opacity-50"
+                  >
+                    Replace with this file
+                  </button>
+                )}
               </>
             ) : (
               <p>{msg.text}</p>